@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""Content-quality audit of the generated modules.
+
+Reads every module in epub-generated/ with the tolerant reader in
+_ts_reader.py (in parallel, --workers) and reports per module and overall:
+
+    fallback    chunks holding the template paragraph used when a chapter
+                had no usable text (FALLBACK_CHUNK), and questions whose
+                context or answer is a template (FALLBACK_QUESTION_RE)
+    padded      chunks drawn from a chapter repeated to fill a short book
+                ("Further Analysis: …")
+    duplicate   real chunks repeating an earlier chunk of the same module;
+                "shared" counts chunk texts found in more than one module
+    empty quiz  quiz lessons without questions, or an empty `questions` list
+    options     questions with two identical options, and distractor
+                overlap: mean word-set Jaccard similarity between the correct
+                option and each distractor (0 = disjoint, 1 = the same words)
+    errors      problems the reader had to work around (broken strings,
+                unbalanced brackets), with the first one's line
+
+Results are cached per file by mtime and size (.module-audit-cache.json next
+to this script), so a re-audit reads only modules that changed. `show`
+prints the first real chunks of modules for a manual spot check.
+
+Usage:  py -3 scripts/_audit_modules.py report [PATTERN ...] [--generator NAME]
+                                               [--sort KEY] [--json OUT]
+        py -3 scripts/_audit_modules.py show SLUG [SLUG ...] [--chunks N]
+        (both take [--dir DIR] [--workers N] [--no-cache] before the command)
+"""
+import argparse
+import fnmatch
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from pathlib import Path
+
+from _provenance import load_manifest
+from _ts_reader import read_module
+
+DEFAULT_CACHE = Path(__file__).parent / ".module-audit-cache.json"
+# Part of the cache key; bump whenever audit_module's metrics change.
+AUDIT_VERSION = 1
+
+FALLBACK_CHUNK = "This section examines the fundamental concepts"
+PADDED_TITLE_RE = re.compile(r"^(?:Deeper Analysis: )?Further Analysis: ")
+# generate-modules' keyword without a context sentence, and a batch 3 quiz
+# answer taken from a chapter with no paragraphs
+FALLBACK_QUESTION_RE = re.compile(r"^Context: The concept of .+ is central to this topic\.$"
+                                  r"|^Key aspects of ")
+FLAG_FALLBACK = 0.5
+_WORD_RE = re.compile(r"\w{3,}")
+
+
+def _norm(s: str) -> str:
+    return " ".join(s.lower().split())
+
+
+def _words(s: str) -> frozenset[str]:
+    return frozenset(_WORD_RE.findall(s.lower()))
+
+
+def _jaccard(a: frozenset, b: frozenset) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+def _items(lesson: dict, key: str) -> list[dict]:
+    items = lesson.get(key)
+    return [i for i in items if isinstance(i, dict)] if isinstance(items, list) else []
+
+
+def _text(item: dict, key: str) -> str:
+    value = item.get(key)
+    return value if isinstance(value, str) else ""
+
+
+def audit_module(path: str) -> dict:
+    """Quality metrics of one module file (pool worker entry point)."""
+    module = read_module(path)
+    m = {
+        "slug": Path(path).stem,
+        "errors": len(module.errors),
+        "first_error": "{}: {}".format(*min(module.errors)) if module.errors else "",
+        "lessons": 0, "quiz_lessons": 0, "empty_quizzes": 0,
+        "chunks": 0, "fallback_chunks": 0, "padded_chunks": 0, "duplicate_chunks": 0,
+        "flashcards": 0,
+        "questions": 0, "fallback_questions": 0, "duplicate_options": 0,
+        "distractor_overlap": 0.0,
+        "chunk_hashes": [],
+    }
+    value = module.value if isinstance(module.value, dict) else {}
+    lessons = [l for l in value.get("lessons") or () if isinstance(l, dict)]
+    seen_chunks: set[str] = set()
+    overlaps: list[float] = []
+    for lesson in lessons:
+        m["lessons"] += 1
+        questions = _items(lesson, "questions")
+        if lesson.get("type") == "quiz":
+            m["quiz_lessons"] += 1
+        if (lesson.get("type") == "quiz" or "questions" in lesson) and not questions:
+            m["empty_quizzes"] += 1
+
+        for chunk in _items(lesson, "chunks"):
+            m["chunks"] += 1
+            content = _text(chunk, "content")
+            if content.startswith(FALLBACK_CHUNK):
+                m["fallback_chunks"] += 1
+                continue
+            if PADDED_TITLE_RE.match(_text(chunk, "title")):
+                m["padded_chunks"] += 1
+            key = hashlib.sha1(_norm(content).encode("utf-8")).hexdigest()[:16]
+            if key in seen_chunks:
+                m["duplicate_chunks"] += 1
+            else:
+                seen_chunks.add(key)
+        m["flashcards"] += len(_items(lesson, "flashcards"))
+
+        for q in questions:
+            m["questions"] += 1
+            options = {_text(o, "id"): _text(o, "text") for o in _items(q, "options")}
+            texts = [_norm(t) for t in options.values()]
+            if len(set(texts)) < len(texts):
+                m["duplicate_options"] += 1
+            correct = options.get(_text(q, "correctOptionId"))
+            if FALLBACK_QUESTION_RE.match(_text(q, "explanation")) or \
+                    (correct and FALLBACK_QUESTION_RE.match(correct)):
+                m["fallback_questions"] += 1
+            if correct is not None and len(options) > 1:
+                answer = _words(correct)
+                overlaps.append(sum(_jaccard(answer, _words(t)) for oid, t in options.items()
+                                    if oid != q.get("correctOptionId")) / (len(options) - 1))
+    m["distractor_overlap"] = sum(overlaps) / len(overlaps) if overlaps else 0.0
+    m["chunk_hashes"] = sorted(seen_chunks)
+    return m
+
+
+# ── Cache ───────────────────────────────────────────────────────────────────
+
+def load_cache(path: Path) -> dict[str, dict]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    return data.get("modules", {}) if data.get("version") == AUDIT_VERSION else {}
+
+
+def save_cache(path: Path, modules: dict[str, dict]) -> None:
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": AUDIT_VERSION, "modules": modules}, f)
+    os.replace(tmp, path)
+
+
+def audit_directory(directory: Path, slugs: list[str], workers: int,
+                    cache_path: Path | None) -> tuple[list[dict], int]:
+    """Metrics for the given modules of `directory`, reading only files whose
+    mtime or size differs from the cache. Returns (metrics, files read)."""
+    cache = load_cache(cache_path) if cache_path else {}
+    results: dict[str, dict] = {}
+    stale: list[tuple[str, str, os.stat_result]] = []
+    for slug in slugs:
+        path = str((directory / f"{slug}.ts").resolve())
+        st = os.stat(path)
+        hit = cache.get(path)
+        if hit and hit["mtime_ns"] == st.st_mtime_ns and hit["size"] == st.st_size:
+            results[slug] = hit["metrics"]
+        else:
+            stale.append((slug, path, st))
+
+    paths = [path for _, path, _ in stale]
+    with ProcessPoolExecutor(max_workers=workers) if workers > 1 and len(paths) > 1 else nullcontext() as executor:
+        metrics = executor.map(audit_module, paths, chunksize=8) if executor else map(audit_module, paths)
+        for (slug, path, st), m in zip(stale, metrics):
+            results[slug] = m
+            cache[path] = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "metrics": m}
+
+    if cache_path and stale:
+        save_cache(cache_path, cache)
+    return [results[s] for s in slugs], len(stale)
+
+
+# ── Report ──────────────────────────────────────────────────────────────────
+
+def fallback_ratio(m: dict) -> float:
+    return m["fallback_chunks"] / m["chunks"] if m["chunks"] else 0.0
+
+
+SORT_KEYS = {
+    "slug":      lambda m: m["slug"],
+    "fallback":  lambda m: (-fallback_ratio(m), -m["fallback_questions"], m["slug"]),
+    "duplicate": lambda m: (-m["duplicate_chunks"], -m["duplicate_options"], m["slug"]),
+    "overlap":   lambda m: (-m["distractor_overlap"], m["slug"]),
+    "errors":    lambda m: (-m["errors"], m["slug"]),
+}
+
+
+def totals(modules: list[dict]) -> dict:
+    keys = ("lessons", "quiz_lessons", "empty_quizzes", "chunks", "fallback_chunks",
+            "padded_chunks", "duplicate_chunks", "flashcards", "questions",
+            "fallback_questions", "duplicate_options", "errors")
+    t = {k: sum(m[k] for m in modules) for k in keys}
+    t["modules"] = len(modules)
+    t["modules_with_errors"] = sum(1 for m in modules if m["errors"])
+    t["fallback_ratio"] = t["fallback_chunks"] / t["chunks"] if t["chunks"] else 0.0
+    t["distractor_overlap"] = (sum(m["distractor_overlap"] * m["questions"] for m in modules)
+                               / t["questions"] if t["questions"] else 0.0)
+    owners: dict[str, int] = {}
+    for m in modules:
+        for h in m["chunk_hashes"]:
+            owners[h] = owners.get(h, 0) + 1
+    t["shared_chunks"] = sum(1 for n in owners.values() if n > 1)
+    return t
+
+
+def print_report(modules: list[dict], t: dict) -> None:
+    real = t["chunks"] - t["fallback_chunks"]
+    print(f"Chunks:    {t['chunks']:,}  |  real {real:,}  |  fallback {t['fallback_chunks']:,} "
+          f"({t['fallback_ratio']:.1%})  |  padded {t['padded_chunks']:,}  |  "
+          f"duplicate {t['duplicate_chunks']:,}  |  shared across modules {t['shared_chunks']:,}")
+    print(f"Questions: {t['questions']:,}  |  fallback {t['fallback_questions']:,}  |  "
+          f"duplicate options {t['duplicate_options']:,}  |  "
+          f"distractor overlap {t['distractor_overlap']:.2f}")
+    print(f"Lessons:   {t['lessons']:,}  |  quiz {t['quiz_lessons']:,}  |  "
+          f"empty quizzes {t['empty_quizzes']:,}")
+    print(f"Modules:   {t['modules']:,}  |  with read errors {t['modules_with_errors']:,}")
+    print()
+    print(f"{'Slug':<52s} {'Chunks':>6s} {'Fall%':>5s} {'Pad':>4s} {'Dup':>4s} "
+          f"{'Qs':>4s} {'FbQ':>4s} {'DupO':>4s} {'Ovlp':>5s} {'Empty':>5s} {'Err':>4s}")
+    print("-" * 106)
+    for m in modules:
+        ratio = fallback_ratio(m)
+        flag = " <<<" if ratio >= FLAG_FALLBACK else ""
+        print(f"{m['slug'][:52]:<52s} {m['chunks']:6d} {ratio:5.0%} {m['padded_chunks']:4d} "
+              f"{m['duplicate_chunks']:4d} {m['questions']:4d} {m['fallback_questions']:4d} "
+              f"{m['duplicate_options']:4d} {m['distractor_overlap']:5.2f} "
+              f"{m['empty_quizzes']:5d} {m['errors']:4d}{flag}")
+    broken = [m for m in modules if m["errors"]]
+    if broken:
+        print("\nRead errors (first per module):")
+        for m in broken:
+            print(f"  {m['slug']}: line {m['first_error']} ({m['errors']} total)")
+
+
+def show(directory: Path, slugs: list[str], n_chunks: int) -> bool:
+    """Print the first real chunks of each module; False if a slug has no file."""
+    found = True
+    for slug in slugs:
+        path = directory / f"{slug}.ts"
+        if not path.exists():
+            print(f"no such module: {slug}\n")
+            found = False
+            continue
+        module = read_module(path)
+        lessons = (module.value.get("lessons") or []) if isinstance(module.value, dict) else []
+        real = [_text(c, "content") for l in lessons if isinstance(l, dict)
+                for c in _items(l, "chunks")
+                if not _text(c, "content").startswith(FALLBACK_CHUNK)][:n_chunks]
+        print(f"=== {slug[:55]} ===")
+        for i, c in enumerate(real, 1):
+            print(f"  Chunk {i}: {c[:300]}...")
+        if not real:
+            print("  (no real chunks)")
+        print()
+    return found
+
+
+def main():
+    from _module_index import EPUB_GENERATED_DIR
+
+    parser = argparse.ArgumentParser(description="Audit the content quality of generated modules.")
+    parser.add_argument("--dir", default=str(EPUB_GENERATED_DIR), help="Module directory.")
+    parser.add_argument("--workers", type=int, default=min(8, os.cpu_count() or 4),
+                        help="Parallel reader processes (1 = run in-process)")
+    parser.add_argument("--cache", default=str(DEFAULT_CACHE), help="Audit cache file.")
+    parser.add_argument("--no-cache", action="store_true", help="Read every module.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_report = sub.add_parser("report", help="Per-module and overall metrics.")
+    p_report.add_argument("patterns", nargs="*", help="Slug glob patterns (default: all).")
+    p_report.add_argument("--generator", help="Only modules the provenance manifest "
+                          "attributes to this generator (e.g. _gen_batch3_auto.py).")
+    p_report.add_argument("--sort", choices=sorted(SORT_KEYS), default="slug")
+    p_report.add_argument("--json", help="Also write the metrics to this file.")
+    p_show = sub.add_parser("show", help="Print the first real chunks of modules.")
+    p_show.add_argument("slugs", nargs="+")
+    p_show.add_argument("--chunks", type=int, default=2)
+    args = parser.parse_args()
+
+    directory = Path(args.dir)
+    if args.command == "show":
+        if not show(directory, args.slugs, args.chunks):
+            sys.exit(1)
+        return
+
+    slugs = sorted(p.stem for p in directory.glob("*.ts"))
+    if args.patterns:
+        slugs = [s for s in slugs if any(fnmatch.fnmatchcase(s, p) for p in args.patterns)]
+    if args.generator:
+        manifest = load_manifest(directory)
+        slugs = [s for s in slugs if manifest.get(s, {}).get("generator") == args.generator]
+
+    start = time.perf_counter()
+    modules, n_read = audit_directory(directory, slugs, args.workers,
+                                      None if args.no_cache else Path(args.cache))
+    print(f"Audited {len(modules)} modules in {directory} ({n_read} read, "
+          f"{len(modules) - n_read} cached) in {time.perf_counter() - start:.2f} s\n")
+    modules.sort(key=SORT_KEYS[args.sort])
+    t = totals(modules)
+    print_report(modules, t)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"totals": t, "modules": [{k: v for k, v in m.items() if k != "chunk_hashes"}
+                                                for m in modules]}, f, indent=2)
+        print(f"\nMetrics written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
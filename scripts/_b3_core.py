@@ -1,10 +1,21 @@
 #!/usr/bin/env python3
-"""Batch 3 core: template engine for generating TypeScript LearningModule files."""
+"""Batch 3 core: template engine for generating TypeScript LearningModule files.
 
+write_modules records every module it writes in the output directory's
+provenance manifest (_provenance.py).
+"""
+
+import io
 import os
 import re
 
+from _epub_reader import book_fingerprint
+from _provenance import append_entries, module_entry
+from _ts_emitter import CurriculumWriter
+
 OUTPUT_DIR = r"D:\PythonProjects\Koydo\eduforge-web\src\lib\modules\catalog\epub-generated"
+# Recorded in the provenance manifest; bump when the module template changes.
+GENERATOR_VERSION = 1
 
 # ─── Helpers ────────────────────────────────────────────────────────────────
 
@@ -51,112 +62,74 @@ def mk(slug, title, author, src, subject, pfx, desc, tags, obj, lessons):
 
 # ─── TypeScript Generator ──────────────────────────────────────────────────
 
-def generate_ts(b):
-    """Generate complete TypeScript module source from book dict."""
-    slug = b['slug']
-    exp = P(slug)
+def write_ts(b, f):
+    """Stream the TypeScript module source for book dict `b` into file `f`.
+
+    Returns the CurriculumWriter, whose chars/lines count what was written.
+    """
     pfx = b['pfx']
-    L = []
-    a = L.append
-
-    # Header
-    a('import type { LearningModule } from "@/lib/modules/types";')
-    a('')
-    a('// High-quality curriculum module derived from EPUB.')
-    a(f'// Source: {b["src"]}')
-    a(f'// Author: {b["author"]}  |  Subject: {b["subject"]}')
-    a('')
-    a(f'export const {exp}: LearningModule = {{')
-    a(f'  id: "{slug}",')
-    a(f'  title: "{e(b["title"])}",')
-    a(f'  description:')
-    a(f'    "{e(b["desc"])}",')
-    a(f'  subject: "{e(b["subject"])}",')
-    tags_s = ', '.join(f'"{t}"' for t in b['tags'])
-    a(f'  tags: [{tags_s}],')
-    a(f'  minAge: 18,')
-    a(f'  maxAge: 99,')
-    a(f'  moduleVersion: "2.0.0",')
-    a(f'  version: "2.0.0",')
-    a(f'  learningObjectives: [')
-    for o in b['obj']:
-        a(f'    "{e(o)}",')
-    a(f'  ],')
-    a(f'  lessons: [')
+    w = CurriculumWriter(f, e, spaced_lessons=True, escape_banners=False)
+    w.open_module(
+        comments=['High-quality curriculum module derived from EPUB.',
+                  f'Source: {b["src"]}',
+                  f'Author: {b["author"]}  |  Subject: {b["subject"]}'],
+        export_name=P(b['slug']), slug=b['slug'], title=b['title'], description=b['desc'],
+        subject=b['subject'], tags=b['tags'], objectives=b['obj'])
 
     for li, lesson in enumerate(b['lessons'], 1):
         lid = f'{pfx}-l{li:02d}'
         lt = lesson['type']
-        a('')
-        a(f'    /* ─────────────────────────────────────────────────')
-        a(f'       L{li:02d}  {lesson["title"]}')
-        a(f'    ───────────────────────────────────────────────── */')
-        a(f'    {{')
-        a(f'      id: "{lid}",')
-        a(f'      title: "{e(lesson["title"])}",')
-        a(f'      type: "{lt}",')
-        a(f'      duration: {lesson["duration"]},')
+        w.open_lesson(lid, li, lesson['title'], lt, lesson['duration'])
         if lesson.get('objectives'):
-            a(f'      objectives: [')
-            for o in lesson['objectives']:
-                a(f'        "{e(o)}",')
-            a(f'      ],')
+            w.objectives(lesson['objectives'])
 
         if lt == 'video':
-            a(f'      chunks: [')
+            w.open_list('chunks')
             for ci, (ct, cc) in enumerate(lesson['chunks'], 1):
-                a(f'        {{')
-                a(f'          id: "{lid}-c{ci}",')
-                a(f'          title: "{e(ct)}",')
-                a(f'          content:')
-                a(f'            "{e(cc)}",')
-                a(f'        }},')
-            a(f'      ],')
-            a(f'      flashcards: [')
+                w.chunk(f'{lid}-c{ci}', ct, cc)
+            w.close_list()
+            w.open_list('flashcards')
             for fi, (ff, fb) in enumerate(lesson['flashcards'], 1):
-                a(f'        {{')
-                a(f'          id: "{lid}-f{fi}",')
-                a(f'          front: "{e(ff)}",')
-                a(f'          back:')
-                a(f'            "{e(fb)}",')
-                a(f'        }},')
-            a(f'      ],')
+                w.flashcard(f'{lid}-f{fi}', ff, fb)
+            w.close_list()
 
         elif lt == 'quiz':
-            a(f'      questions: [')
+            w.open_list('questions')
             for qi, q in enumerate(lesson['questions'], 1):
-                a(f'        {{')
-                a(f'          id: "{lid}-q{qi}",')
-                a(f'          text: "{e(q[0])}",')
-                a(f'          options: [')
-                for oid, ot in zip('abcd', q[1]):
-                    a(f'            {{ id: "{oid}", text: "{e(ot)}" }},')
-                a(f'          ],')
-                a(f'          correctOptionId: "{q[2]}",')
-                a(f'          explanation:')
-                a(f'            "{e(q[3])}",')
-                a(f'        }},')
-            a(f'      ],')
-
-        a(f'    }},')
-
-    a(f'  ],')
-    a(f'}};')
-    a('')
-    return '\n'.join(L)
+                w.question(f'{lid}-q{qi}', q[0], zip('abcd', q[1]), q[2], q[3])
+            w.close_list()
+
+        w.close_lesson()
+
+    w.close_module()
+    return w
+
+
+def generate_ts(b):
+    """Generate complete TypeScript module source from book dict."""
+    buf = io.StringIO()
+    write_ts(b, buf)
+    return buf.getvalue()
 
 
 def write_modules(books, label=""):
-    """Write all module .ts files from a list of book dicts."""
+    """Write all module .ts files from a list of book dicts.
+
+    A book's 'fingerprint' (the chapter store meta carries it) is recorded as
+    given; books without one have their EPUB fingerprinted.
+    """
     os.makedirs(OUTPUT_DIR, exist_ok=True)
     written = []
     for i, b in enumerate(books, 1):
         slug = b['slug']
-        content = generate_ts(b)
         fp = os.path.join(OUTPUT_DIR, f'{slug}.ts')
         with open(fp, 'w', encoding='utf-8') as f:
-            f.write(content)
-        nlines = content.count('\n') + 1
-        print(f'  [{label}{i:02d}/{len(books)}] {slug}.ts  ({nlines} lines, {len(content):,d} chars)')
+            w = write_ts(b, f)
+        append_entries(OUTPUT_DIR, [module_entry(
+            w, slug=slug, export_name=P(slug), title=b['title'], creator=b['author'],
+            source=b['src'],
+            fingerprint=b['fingerprint'] if 'fingerprint' in b else book_fingerprint(b['src']),
+            generator='_b3_core.py', generator_version=GENERATOR_VERSION)])
+        print(f'  [{label}{i:02d}/{len(books)}] {slug}.ts  ({w.lines} lines, {w.chars:,d} chars)')
         written.append(fp)
     return written
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""Benchmark the regex HTML-to-text engine against the old HTMLParser stripper.
+
+Reads the spine documents of real EPUBs (the books in the picks file, or every
+EPUB under --epub-dir), converts each chapter with both implementations,
+prints the timings and how often the two agree word for word. Differences
+are expected where inline markup split words ("<b>H</b>ello") — the old
+extractor put a space at every tag — so a few samples are printed for review.
+
+Usage:  py -3 scripts/_bench_html_text.py [--picks PATH | --epub-dir DIR]
+                                          [--max-books N] [--repeat N]
+"""
+import argparse
+import json
+import pathlib
+import sys
+import time
+import zipfile
+from html.parser import HTMLParser
+
+from _html_text import html_to_text
+
+HERE = pathlib.Path(__file__).parent
+
+
+# ── Reference implementation (the pre-engine code, kept verbatim) ────────────
+
+class _HTMLTextExtractor(HTMLParser):
+    SKIP_TAGS = {"script", "style", "head"}
+
+    def __init__(self):
+        super().__init__()
+        self.parts: list[str] = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag.lower() in self.SKIP_TAGS:
+            self._skip += 1
+
+    def handle_endtag(self, tag):
+        if tag.lower() in self.SKIP_TAGS:
+            self._skip = max(0, self._skip - 1)
+
+    def handle_data(self, data):
+        if self._skip == 0:
+            stripped = data.strip()
+            if stripped:
+                self.parts.append(stripped)
+
+
+def strip_html_ref(html: str) -> str:
+    p = _HTMLTextExtractor()
+    p.feed(html)
+    return " ".join(p.parts)
+
+
+# ── Corpus ───────────────────────────────────────────────────────────────────
+
+def book_paths(args) -> list[str]:
+    if args.epub_dir:
+        paths = sorted(str(p) for p in pathlib.Path(args.epub_dir).rglob("*.epub"))
+    else:
+        with open(args.picks, encoding="utf-8") as f:
+            picks = json.load(f)
+        paths = list(dict.fromkeys(b["filepath"] for books in picks.values() for b in books
+                                   if pathlib.Path(b.get("filepath", "")).exists()))
+    return paths[:args.max_books]
+
+
+def load_documents(paths: list[str]) -> list[str]:
+    docs = []
+    for path in paths:
+        try:
+            with zipfile.ZipFile(path) as zf:
+                for name in zf.namelist():
+                    if name.lower().endswith((".html", ".xhtml", ".htm")):
+                        docs.append(zf.read(name).decode("utf-8", errors="replace"))
+        except (OSError, zipfile.BadZipFile):
+            continue
+    return docs
+
+
+def _time(fn, docs, repeat):
+    best = float("inf")
+    out = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = [fn(d) for d in docs]
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HTML-to-text extraction on chapter HTML.")
+    parser.add_argument("--picks", default=str(HERE / "epub-educational-picks.json"))
+    parser.add_argument("--epub-dir", default=None, help="Use every EPUB under this directory instead.")
+    parser.add_argument("--max-books", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--samples", type=int, default=3, help="Differing documents to show.")
+    args = parser.parse_args()
+
+    docs = load_documents(book_paths(args))
+    if not docs:
+        print("ERROR: no chapter documents found (pass --epub-dir?)"); sys.exit(1)
+    size = sum(len(d) for d in docs)
+    print(f"{len(docs):,} chapter documents, {size / 1e6:.1f} M chars\n")
+
+    t_ref, out_ref = _time(strip_html_ref, docs, args.repeat)
+    t_new, out_new = _time(html_to_text, docs, args.repeat)
+    print(f"HTMLParser strip_html {t_ref * 1e3:9.1f} ms  ({size / t_ref / 1e6:6.1f} M chars/s)")
+    print(f"html_to_text          {t_new * 1e3:9.1f} ms  ({size / t_new / 1e6:6.1f} M chars/s)")
+    print(f"speedup               {t_ref / t_new:9.2f}x")
+
+    differing = [i for i, (a, b) in enumerate(zip(out_ref, out_new)) if a.split() != b.split()]
+    same_chars = sum(1 for a, b in zip(out_ref, out_new)
+                     if "".join(a.split()) == "".join(b.split()))
+    print(f"\nsame words            {len(docs) - len(differing):,} / {len(docs):,}")
+    print(f"same non-space text   {same_chars:,} / {len(docs):,}")
+    for i in differing[:args.samples]:
+        a, b = out_ref[i].split(), out_new[i].split()
+        k = next((j for j, (x, y) in enumerate(zip(a, b)) if x != y), min(len(a), len(b)))
+        print(f"\n  doc {i}: first difference at word {k}")
+        print(f"    old: {' '.join(a[max(0, k - 5):k + 8])}")
+        print(f"    new: {' '.join(b[max(0, k - 5):k + 8])}")
+
+
+if __name__ == "__main__":
+    main()
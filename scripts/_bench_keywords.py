@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""Benchmark the shared KeywordMatcher against the old per-keyword `in` loops.
+
+Runs categorize() (scan-epubs.py), academic_score() (catalog-analyze.py) and
+a full per-keyword hit count over every book in the catalog with both
+implementations, checks that the results are identical and prints the
+timings.
+
+Usage:  py -3 scripts/_bench_keywords.py [--catalog PATH] [--repeat N]
+"""
+import argparse
+import importlib.util
+import pathlib
+import sys
+import time
+
+from _epub_catalog import iter_catalog
+from _keyword_matcher import KeywordMatcher
+
+HERE = pathlib.Path(__file__).parent
+
+
+def _load(name, filename):
+    spec = importlib.util.spec_from_file_location(name, HERE / filename)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+scan = _load("scan_epubs", "scan-epubs.py")
+analyze = _load("catalog_analyze", "catalog-analyze.py")
+
+# Every keyword from both scripts, for the "all hit counts in one pass" case
+ALL_MATCHER = KeywordMatcher({
+    **{cat: kws for kws, cat in scan.SUBJECT_MAP},
+    **analyze.SIGNAL_MATCHER.groups,
+})
+ALL_KEYWORDS = ALL_MATCHER.keywords
+
+
+# ── Reference implementations (the pre-matcher code, kept verbatim) ──────────
+
+def categorize_ref(metadata):
+    haystack = " ".join([
+        metadata.get("title", ""),
+        metadata.get("description", ""),
+        " ".join(metadata.get("subjects", [])),
+    ]).lower()
+    matched = []
+    for keywords, category in scan.SUBJECT_MAP:
+        if any(kw in haystack for kw in keywords):
+            matched.append(category)
+    return matched or ["Uncategorized"]
+
+
+def academic_score_ref(book):
+    haystack = " ".join([
+        book.get("title", ""),
+        book.get("description", ""),
+        " ".join(book.get("subjects", [])),
+        book.get("publisher", ""),
+    ]).lower()
+    score = 50.0
+    for kw in analyze.ACADEMIC_SIGNALS:
+        if kw in haystack:
+            score += 5
+    for kw in analyze.FICTION_SIGNALS:
+        if kw in haystack:
+            score -= 4
+    pub = book.get("publisher", "").lower()
+    for acad in analyze.ACADEMIC_PUBLISHERS:
+        if acad in pub:
+            score += 15
+    if book.get("language", "en") in ("en", "eng", "english"):
+        score += 5
+    return max(0, min(100, score))
+
+
+def _haystack(book):
+    return " ".join([
+        book.get("title", ""),
+        book.get("description", ""),
+        " ".join(book.get("subjects", [])),
+        book.get("publisher", ""),
+    ]).lower()
+
+
+def all_counts_ref(book):
+    """Per-keyword hit counts the old way: one str.count() per keyword."""
+    haystack = _haystack(book)
+    return {kw: n for kw in ALL_KEYWORDS if (n := haystack.count(kw))}
+
+
+def all_counts(book):
+    return ALL_MATCHER.counts(_haystack(book))
+
+
+def _time(fn, books, repeat):
+    best = float("inf")
+    out = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = [fn(b) for b in books]
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark keyword matching over the catalog.")
+    parser.add_argument("--catalog", default=str(analyze.default_catalog_path()))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    books = list(iter_catalog(pathlib.Path(args.catalog)))
+    if not books:
+        print(f"ERROR: no books in {args.catalog}"); sys.exit(1)
+    print(f"{len(books):,} books from {args.catalog}\n")
+
+    ok = True
+    for label, ref, new in [
+        ("categorize", categorize_ref, scan.categorize),
+        ("academic_score", academic_score_ref, analyze.academic_score),
+        ("all hit counts", all_counts_ref, all_counts),
+    ]:
+        t_ref, out_ref = _time(ref, books, args.repeat)
+        t_new, out_new = _time(new, books, args.repeat)
+        mismatches = sum(1 for a, b in zip(out_ref, out_new) if a != b)
+        ok &= mismatches == 0
+        print(f"{label:<16} loop {t_ref*1e3:8.1f} ms   matcher {t_new*1e3:8.1f} ms   "
+              f"speedup {t_ref / t_new:4.2f}x   mismatches {mismatches}")
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""Benchmark scan-epubs.py and chapter extraction on a synthetic EPUB corpus.
+
+The real library lives on the G: drive, so this generates a reproducible
+stand-in: books with varying spine length, OPF size (extra manifest items),
+OPF namespace variants (dc:, a custom DC prefix, bare tags, opf:-prefixed
+package) and a share of deliberately broken archives (truncated, garbage,
+malformed OPF, missing container.xml). The corpus is cached next to a
+corpus.json spec and only regenerated when the spec changes.
+
+It then times, per book, scan_epub / parse_opf / categorize (scan-epubs.py)
+and extract_chapters (generate-modules-from-epubs.py), plus whole-corpus
+throughput of the scan and the extraction at several worker counts, and
+writes everything to a JSON file. Pass --baseline with an earlier results
+file to fail (exit 1) when a timing regresses past --tolerance.
+
+Usage:  py -3 scripts/_bench_scan.py [--books N] [--workers 1,2,4]
+                                     [--corpus DIR] [--out PATH]
+                                     [--baseline PATH] [--tolerance 0.25]
+"""
+import argparse
+import importlib.util
+import json
+import os
+import pathlib
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+from _epub_reader import find_opf_path, parse_opf
+from _zip_probe import ProbeUnsupported, ZipProbe
+
+HERE = pathlib.Path(__file__).parent
+RESULTS_VERSION = 1
+
+
+def _load(name, filename):
+    spec = importlib.util.spec_from_file_location(name, HERE / filename)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+scan = _load("scan_epubs", "scan-epubs.py")
+gen = _load("generate_modules", "generate-modules-from-epubs.py")
+
+
+# ── Synthetic corpus ─────────────────────────────────────────────────────────
+
+VARIANTS = ("dc", "dc-prefix", "bare", "opf-prefix")
+CORRUPTIONS = ("truncated", "garbage", "bad-opf", "no-container")
+
+_SUBJECT_WORDS = [kw for kws, _ in scan.SUBJECT_MAP for kw in kws]
+_FILLER = ("the of and a to in is that for it as with was on by this be are from "
+           "which an or at not have were their has been more one all also its "
+           "system theory method result process study example first between").split()
+_CONTAINER = ('<?xml version="1.0"?><container version="1.0" '
+              'xmlns="urn:oasis:names:tc:opendocument:xmlns:container"><rootfiles>'
+              '<rootfile full-path="OEBPS/content.opf" '
+              'media-type="application/oebps-package+xml"/></rootfiles></container>')
+
+
+def _words(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choice(_SUBJECT_WORDS) if rng.random() < 0.08 else rng.choice(_FILLER)
+                    for _ in range(n))
+
+
+def _opf(rng: random.Random, variant: str, i: int, chapters: int, extra_items: int) -> str:
+    fields = {
+        "title": _words(rng, rng.randint(2, 7)).title(),
+        "creator": f"Author {i % 97}",
+        "publisher": rng.choice(["Oxford University Press", "Penguin", "Springer", ""]),
+        "language": rng.choice(["en", "en", "en", "fr", "de"]),
+        "description": _words(rng, rng.randint(10, 120)),
+        "date": f"{rng.randint(1850, 2024)}-01-01",
+    }
+    subjects = [_words(rng, 2) for _ in range(rng.randint(0, 4))]
+    if variant == "bare":
+        pre, dc_ns = "", ""
+    elif variant == "dc-prefix":
+        pre, dc_ns = "dcx:", ' xmlns:dcx="http://purl.org/dc/elements/1.1/"'
+    else:
+        pre, dc_ns = "dc:", ' xmlns:dc="http://purl.org/dc/elements/1.1/"'
+    meta = "".join(f"<{pre}{k}>{v}</{pre}{k}>" for k, v in fields.items())
+    meta += "".join(f"<{pre}subject>{s}</{pre}subject>" for s in subjects)
+    items = "".join(f'<item id="c{j}" href="Text/ch{j:03d}.xhtml" '
+                    'media-type="application/xhtml+xml"/>' for j in range(chapters))
+    items += "".join(f'<item id="img{j}" href="Images/img{j:05d}.jpg" '
+                     'media-type="image/jpeg"/>' for j in range(extra_items))
+    spine = "".join(f'<itemref idref="c{j}"/>' for j in range(chapters))
+    if variant == "opf-prefix":
+        return (f'<?xml version="1.0"?><opf:package xmlns:opf="http://www.idpf.org/2007/opf" '
+                f'version="2.0"><opf:metadata{dc_ns}>{meta}</opf:metadata>'
+                f'<opf:manifest>{items.replace("<item ", "<opf:item ")}</opf:manifest>'
+                f'<opf:spine>{spine.replace("<itemref ", "<opf:itemref ")}</opf:spine>'
+                '</opf:package>')
+    package_ns = "" if variant == "bare" else ' xmlns="http://www.idpf.org/2007/opf"'
+    return (f'<?xml version="1.0"?><package{package_ns} version="2.0">'
+            f'<metadata{dc_ns}>{meta}</metadata><manifest>{items}</manifest>'
+            f'<spine>{spine}</spine></package>')
+
+
+def _chapter(rng: random.Random, j: int) -> str:
+    if j == 0 or rng.random() < 0.1:
+        body = f"<p>{_words(rng, 8)}</p>"            # cover / copyright stub
+    else:
+        body = "".join(f"<p>{_words(rng, rng.randint(30, 120))} &amp; more.</p>"
+                       for _ in range(rng.randint(3, 40)))
+        body = f"<h2>Chapter {j}: {_words(rng, 3).title()}</h2>{body}"
+    return (f'<html xmlns="http://www.w3.org/1999/xhtml"><head><title>ch{j}</title>'
+            f'<style>p {{ margin: 0 }}</style></head><body>{body}</body></html>')
+
+
+def _write_book(path: pathlib.Path, rng: random.Random, i: int, spec: dict) -> str:
+    variant = VARIANTS[i % len(VARIANTS)]
+    chapters = rng.randint(spec["spine_min"], spec["spine_max"])
+    extra_items = rng.choice([0, 0, 0, rng.randint(0, spec["opf_extra_max"])])
+    corruption = rng.choice(CORRUPTIONS) if rng.random() < spec["corrupt_rate"] else None
+    if corruption == "garbage":
+        path.write_bytes(rng.randbytes(rng.randint(0, 4096)))
+        return corruption
+    opf = _opf(rng, variant, i, chapters, extra_items)
+    if corruption == "bad-opf":
+        opf = opf[:len(opf) // 2]
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("mimetype", "application/epub+zip", compress_type=zipfile.ZIP_STORED)
+        if corruption != "no-container":
+            zf.writestr("META-INF/container.xml", _CONTAINER)
+        zf.writestr("OEBPS/content.opf", opf)
+        for j in range(chapters):
+            zf.writestr(f"OEBPS/Text/ch{j:03d}.xhtml", _chapter(rng, j))
+    if corruption == "truncated":
+        data = path.read_bytes()
+        path.write_bytes(data[:len(data) * 2 // 3])
+    return corruption or variant
+
+
+def make_corpus(corpus_dir: pathlib.Path, spec: dict) -> dict:
+    """Generate (or reuse) the synthetic corpus described by `spec`."""
+    spec_path = corpus_dir / "corpus.json"
+    try:
+        with open(spec_path, encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached.get("spec") == spec:
+            return cached
+    except (OSError, ValueError):
+        pass
+    if corpus_dir.exists():
+        shutil.rmtree(corpus_dir)
+    corpus_dir.mkdir(parents=True)
+    rng = random.Random(spec["seed"])
+    kinds: dict[str, int] = {}
+    for i in range(spec["books"]):
+        kind = _write_book(corpus_dir / f"file{i:06d}.epub", rng, i, spec)
+        kinds[kind] = kinds.get(kind, 0) + 1
+    size = sum(p.stat().st_size for p in corpus_dir.glob("*.epub"))
+    info = {"spec": spec, "kinds": dict(sorted(kinds.items())), "bytes": size}
+    with open(spec_path, "w", encoding="utf-8") as f:
+        json.dump(info, f, indent=2)
+    return info
+
+
+# ── Timing ───────────────────────────────────────────────────────────────────
+
+def _stats(samples_ms: list[float]) -> dict:
+    ordered = sorted(samples_ms)
+    total = sum(ordered)
+    return {
+        "n": len(ordered),
+        "total_s": round(total / 1000, 4),
+        "mean_ms": round(total / len(ordered), 4) if ordered else 0.0,
+        "p50_ms": round(scan.percentile(ordered, 50), 4),
+        "p95_ms": round(scan.percentile(ordered, 95), 4),
+        "max_ms": round(ordered[-1], 4) if ordered else 0.0,
+    }
+
+
+def _timed(fn, *args) -> tuple[float, object]:
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return (time.perf_counter() - t0) * 1000, out
+
+
+def _open(path: str):
+    try:
+        return ZipProbe(path)
+    except ProbeUnsupported:
+        return zipfile.ZipFile(path)
+
+
+def bench_serial(paths: list[str]) -> tuple[dict, list[dict]]:
+    """Per-book timings of each stage, run in this process."""
+    scan_ms, opf_ms, cat_ms, extract_ms = [], [], [], []
+    books = []
+    for p in paths:
+        ms, meta = _timed(scan.scan_epub, p)
+        scan_ms.append(ms)
+        if meta:
+            books.append(meta)
+        try:
+            with _open(p) as zf:
+                opf_path = find_opf_path(zf)
+                if opf_path:
+                    ms, _ = _timed(parse_opf, zf, opf_path)
+                    opf_ms.append(ms)
+        except (OSError, zipfile.BadZipFile, ProbeUnsupported):
+            pass
+        ms, _ = _timed(gen.extract_chapters, p)
+        extract_ms.append(ms)
+    for meta in books:
+        ms, _ = _timed(scan.categorize, meta)
+        cat_ms.append(ms)
+    return {
+        "scan_epub": _stats(scan_ms),
+        "parse_opf": _stats(opf_ms),
+        "categorize": _stats(cat_ms),
+        "extract_chapters": _stats(extract_ms),
+    }, books
+
+
+# Pool tasks are defined here (not in the loaded modules) so they pickle by
+# reference under the spawn start method used on Windows.
+def _scan_chunk(paths: list[str]) -> int:
+    return sum(1 for row in scan.scan_batch(paths) if row[1])
+
+
+def _extract_chunk(paths: list[str]) -> int:
+    return sum(len(gen.extract_chapters(p)) for p in paths)
+
+
+def bench_parallel(paths: list[str], workers: int, chunk_size: int) -> dict:
+    """Whole-corpus wall time of scan and extraction with a worker pool."""
+    chunks = [paths[i:i + chunk_size] for i in range(0, len(paths), chunk_size)]
+    out = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(len, chunks))                  # start the workers first
+        for label, task in (("scan", _scan_chunk), ("extract_chapters", _extract_chunk)):
+            t0 = time.perf_counter()
+            produced = sum(executor.map(task, chunks))
+            wall = time.perf_counter() - t0
+            out[label] = {
+                "wall_s": round(wall, 4),
+                "books_per_s": round(len(paths) / wall, 2) if wall else 0.0,
+                "produced": produced,
+            }
+    return out
+
+
+# ── Baseline comparison ──────────────────────────────────────────────────────
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Human-readable regressions beyond `tolerance` (0.25 = 25 % slower)."""
+    regressions = []
+    for stage, now in results["serial"].items():
+        before = baseline.get("serial", {}).get(stage)
+        if before and before["mean_ms"] and now["mean_ms"] > before["mean_ms"] * (1 + tolerance):
+            regressions.append(f"{stage}: mean {before['mean_ms']:.3f} → {now['mean_ms']:.3f} ms")
+    for workers, stages in results["parallel"].items():
+        for stage, now in stages.items():
+            before = baseline.get("parallel", {}).get(workers, {}).get(stage)
+            if before and now["books_per_s"] < before["books_per_s"] / (1 + tolerance):
+                regressions.append(f"{stage} @ {workers} workers: {before['books_per_s']:.1f} → "
+                                   f"{now['books_per_s']:.1f} books/s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark EPUB scanning and chapter extraction.")
+    parser.add_argument("--corpus", default=str(pathlib.Path(tempfile.gettempdir()) / "koydo-epub-bench"),
+                        help="Directory for the synthetic corpus (reused while the spec matches).")
+    parser.add_argument("--books", type=int, default=400)
+    parser.add_argument("--spine-min", type=int, default=3)
+    parser.add_argument("--spine-max", type=int, default=40)
+    parser.add_argument("--opf-extra-max", type=int, default=3000,
+                        help="Max extra manifest items, to grow some OPFs (default: 3000).")
+    parser.add_argument("--corrupt-rate", type=float, default=0.03)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--workers", default="1,2,4",
+                        help="Comma-separated worker counts for the pool runs.")
+    parser.add_argument("--chunk-size", type=int, default=16)
+    parser.add_argument("--out", default=str(HERE / "scan-bench-results.json"))
+    parser.add_argument("--baseline", default=None,
+                        help="Earlier results file to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    spec = {
+        "books": args.books, "spine_min": args.spine_min, "spine_max": args.spine_max,
+        "opf_extra_max": args.opf_extra_max, "corrupt_rate": args.corrupt_rate, "seed": args.seed,
+    }
+    corpus_dir = pathlib.Path(args.corpus)
+    t0 = time.perf_counter()
+    corpus = make_corpus(corpus_dir, spec)
+    print(f"Corpus {corpus_dir}: {args.books:,} books, {corpus['bytes'] / 1e6:.1f} MB "
+          f"({time.perf_counter() - t0:.1f}s)  {corpus['kinds']}\n")
+    paths = sorted(str(p) for p in corpus_dir.glob("*.epub"))
+
+    serial, books = bench_serial(paths)
+    print(f"{'stage':<18} {'n':>6} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+    for stage, st in serial.items():
+        print(f"{stage:<18} {st['n']:>6} {st['mean_ms']:>9.3f} {st['p50_ms']:>9.3f} "
+              f"{st['p95_ms']:>9.3f} {st['max_ms']:>9.3f}")
+
+    parallel = {}
+    print(f"\n{'workers':>7} {'scan books/s':>13} {'extract books/s':>16}")
+    for workers in (int(w) for w in args.workers.split(",") if w.strip()):
+        run = bench_parallel(paths, workers, max(1, args.chunk_size))
+        parallel[str(workers)] = run
+        print(f"{workers:>7} {run['scan']['books_per_s']:>13.1f} "
+              f"{run['extract_chapters']['books_per_s']:>16.1f}")
+
+    results = {
+        "version": RESULTS_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "corpus": {**corpus, "catalogued": len(books)},
+        "serial": serial,
+        "parallel": parallel,
+    }
+    out_path = pathlib.Path(args.out)
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults saved → {out_path}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"\nREGRESSIONS vs {args.baseline} (tolerance {args.tolerance:.0%}):")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nNo regressions vs {args.baseline} (tolerance {args.tolerance:.0%}).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""Columnar copy of the EPUB catalog for catalog-analyze.py.
+
+catalog-analyze.py used to stream the catalog as one dict per book and score
+each in Python. The table here holds the same books column by column, in
+catalog order, so whole-library passes become NumPy array operations:
+
+  * text columns (title, creator, publisher, language, filepath, subjects)
+    are stored Arrow-style, as one string plus character offsets, and sliced
+    per row only when a value is needed;
+  * `text_lc` (title + description + subjects + publisher) and
+    `publisher_lc` are lowercased once, at build time, for keyword matching;
+  * categories are a CSR list: `cat_codes[cat_offsets[i]:cat_offsets[i+1]]`
+    index the `categories` vocabulary (a book without a "categories" key is
+    "Uncategorized");
+  * derived columns (e.g. signal hit counts) are computed by the caller and
+    kept in a sidecar per name (epub-catalog.table.hits.npz), so updating
+    them never rewrites the text columns.
+
+The table is saved next to the catalog (epub-catalog.table.npz) and rebuilt
+when the catalog's size or mtime changes; sidecars of an older catalog are
+ignored. NumPy is required.
+"""
+
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+from _epub_catalog import iter_catalog
+
+TABLE_VERSION = 2
+TEXT_COLUMNS = ("title", "creator", "publisher", "language", "filepath", "subjects",
+                "text_lc", "publisher_lc")
+SUBJECT_SEP = "\x1f"
+
+
+def table_path_for(catalog_path: Path) -> Path:
+    """Table file for a catalog (epub-catalog.ndjson → epub-catalog.table.npz)."""
+    catalog_path = Path(catalog_path)
+    return catalog_path.with_name(f"{catalog_path.stem}.table.npz")
+
+
+class TextColumn:
+    """A column of strings stored as one string and n + 1 character offsets."""
+
+    __slots__ = ("text", "offsets")
+
+    def __init__(self, text: str, offsets: np.ndarray):
+        self.text = text
+        self.offsets = offsets
+
+    @classmethod
+    def from_values(cls, values: list[str]) -> "TextColumn":
+        offsets = np.zeros(len(values) + 1, dtype=np.int64)
+        np.cumsum(np.fromiter(map(len, values), dtype=np.int64, count=len(values)), out=offsets[1:])
+        return cls("".join(values), offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row: int) -> str:
+        return self.text[self.offsets[row]:self.offsets[row + 1]]
+
+    def take(self, rows) -> list[str]:
+        text, bounds = self.text, self.offsets.tolist()
+        return [text[bounds[r]:bounds[r + 1]] for r in rows]
+
+    def tolist(self) -> list[str]:
+        return self.take(range(len(self)))
+
+
+class CatalogTable:
+    """The catalog as columns; see the module docstring."""
+
+    def __init__(self, columns: dict[str, TextColumn], language_missing: np.ndarray,
+                 categories: np.ndarray, cat_offsets: np.ndarray, cat_codes: np.ndarray,
+                 source: dict):
+        self.columns = columns
+        self.language_missing = language_missing
+        self.categories = categories
+        self.cat_offsets = cat_offsets
+        self.cat_codes = cat_codes
+        self.source = source
+        self.path: Path | None = None
+
+    def __len__(self) -> int:
+        return len(self.language_missing)
+
+    # ── Build / save / load ─────────────────────────────────────────────────
+    @classmethod
+    def build(cls, catalog_path: Path) -> "CatalogTable":
+        """Read the whole catalog (NDJSON or legacy JSON) into columns."""
+        catalog_path = Path(catalog_path)
+        source = _source_stamp(catalog_path)
+        values: dict[str, list[str]] = {name: [] for name in TEXT_COLUMNS}
+        missing: list[bool] = []
+        vocab: dict[str, int] = {}
+        counts: list[int] = []
+        codes: list[int] = []
+        for book in iter_catalog(catalog_path):
+            title = book.get("title", "")
+            publisher = book.get("publisher", "")
+            subjects = [str(s) for s in book.get("subjects", [])]
+            values["title"].append(title)
+            values["creator"].append(book.get("creator", ""))
+            values["publisher"].append(publisher)
+            values["language"].append(book.get("language", ""))
+            values["filepath"].append(book.get("filepath", ""))
+            values["subjects"].append("".join(SUBJECT_SEP + x for x in subjects))
+            values["text_lc"].append(" ".join([title, book.get("description", ""),
+                                               " ".join(subjects), publisher]).lower())
+            values["publisher_lc"].append(publisher.lower())
+            missing.append("language" not in book)
+            cats = book.get("categories", ["Uncategorized"])
+            counts.append(len(cats))
+            codes.extend(vocab.setdefault(c, len(vocab)) for c in cats)
+        cat_offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(np.asarray(counts, dtype=np.int64), out=cat_offsets[1:])
+        return cls({name: TextColumn.from_values(v) for name, v in values.items()},
+                   np.asarray(missing, dtype=bool), np.asarray(list(vocab), dtype=str),
+                   cat_offsets, np.asarray(codes, dtype=np.int32), source)
+
+    def save(self, path: Path) -> None:
+        arrays = {
+            "language_missing": self.language_missing,
+            "categories": self.categories,
+            "cat_offsets": self.cat_offsets,
+            "cat_codes": self.cat_codes,
+            "info": np.asarray(json.dumps({"version": TABLE_VERSION, "source": self.source})),
+        }
+        for name, col in self.columns.items():
+            arrays[f"text.{name}"] = np.frombuffer(col.text.encode("utf-8", "surrogatepass"),
+                                                   dtype=np.uint8)
+            arrays[f"offsets.{name}"] = col.offsets
+        _save_npz(path, arrays)
+        self.path = path
+
+    @classmethod
+    def load(cls, path: Path) -> "CatalogTable | None":
+        """The saved table, or None if missing, unreadable or of another version."""
+        try:
+            with np.load(path, allow_pickle=False) as z:
+                info = json.loads(str(z["info"]))
+                if info.get("version") != TABLE_VERSION:
+                    return None
+                columns = {name: TextColumn(z[f"text.{name}"].tobytes().decode("utf-8", "surrogatepass"),
+                                            z[f"offsets.{name}"])
+                           for name in TEXT_COLUMNS}
+                table = cls(columns, z["language_missing"], z["categories"], z["cat_offsets"],
+                            z["cat_codes"], info["source"])
+        except (OSError, ValueError, KeyError):
+            return None
+        table.path = path
+        return table
+
+    # ── Derived columns ─────────────────────────────────────────────────────
+    def sidecar_path(self, name: str) -> Path | None:
+        """File of the `name` derived columns (epub-catalog.table.<name>.npz)."""
+        if self.path is None:
+            return None
+        return self.path.with_name(f"{self.path.name[:-len('.npz')]}.{name}.npz")
+
+    def load_derived(self, name: str) -> tuple[dict, dict[str, np.ndarray]]:
+        """(info, columns) saved under `name` for this catalog; empty when
+        missing, unreadable or computed from another version of the catalog."""
+        path = self.sidecar_path(name)
+        if path is None:
+            return {}, {}
+        try:
+            with np.load(path, allow_pickle=False) as z:
+                info = json.loads(str(z["info"]))
+                if info.get("source") != self.source:
+                    return {}, {}
+                return info, {k: z[k] for k in z.files if k != "info"}
+        except (OSError, ValueError, KeyError):
+            return {}, {}
+
+    def save_derived(self, name: str, info: dict, columns: dict[str, np.ndarray]) -> None:
+        """Keep `columns` (and the caller's `info`) as the `name` sidecar.
+
+        Not cached when the table has no file or the sidecar cannot be written.
+        """
+        path = self.sidecar_path(name)
+        if path is None:
+            return
+        try:
+            _save_npz(path, {**columns, "info": np.asarray(json.dumps({**info, "source": self.source}))})
+        except OSError:
+            pass
+
+    # ── Queries ─────────────────────────────────────────────────────────────
+    def row(self, row: int) -> dict:
+        """The stored fields of one book as a catalog-style dict."""
+        c = self.columns
+        book = {name: c[name][row] for name in ("title", "creator", "publisher", "filepath")}
+        book["subjects"] = c["subjects"][row].split(SUBJECT_SEP)[1:]
+        if not self.language_missing[row]:
+            book["language"] = c["language"][row]
+        return book
+
+    def category_rows(self) -> tuple[np.ndarray, np.ndarray]:
+        """(row, category code) for every category membership, in catalog order."""
+        rows = np.repeat(np.arange(len(self)), np.diff(self.cat_offsets))
+        return rows, self.cat_codes
+
+    def top_by_category(self, score: np.ndarray, mask: np.ndarray, n: int
+                        ) -> tuple[dict[str, list[int]], dict[str, float]]:
+        """Rows of the n best books per category, and each category's best score.
+
+        Only rows where `mask` is set take part. Books are ordered by score
+        (descending), then lowercased title, then catalog order. Every
+        category with at least one such book is present, in vocabulary order.
+        """
+        rows, codes = self.category_rows()
+        keep = mask[rows]
+        rows, codes = rows[keep], codes[keep]
+        order = np.argsort(codes, kind="stable")
+        rows, codes = rows[order], codes[order]
+        scores = score[rows]
+        bounds = np.searchsorted(codes, np.arange(len(self.categories) + 1))
+        top: dict[str, list[int]] = {}
+        best: dict[str, float] = {}
+        for code, cat in enumerate(self.categories.tolist()):
+            lo, hi = bounds[code], bounds[code + 1]
+            if lo == hi:
+                continue
+            s, r = scores[lo:hi], rows[lo:hi]
+            best[cat] = float(s.max())
+            if n <= 0:
+                top[cat] = []
+                continue
+            if n < len(s):
+                # Partial selection: everything scoring at least the n-th best
+                # score (ties included) goes on to the exact ordering.
+                kth = np.partition(s, len(s) - n)[len(s) - n]
+                sel = s >= kth
+                s, r = s[sel], r[sel]
+            titles = [t.lower() for t in self.columns["title"].take(r.tolist())]
+            ranked = sorted(zip((-s).tolist(), titles, r.tolist()))
+            top[cat] = [row for _, _, row in ranked[:n]]
+        return top, best
+
+
+def _save_npz(path: Path, arrays: dict[str, np.ndarray]) -> None:
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp.npz")
+    np.savez(tmp, **arrays)
+    os.replace(tmp, path)
+
+
+def _source_stamp(catalog_path: Path) -> dict:
+    st = os.stat(catalog_path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def load_table(catalog_path: Path, rebuild: bool = False) -> CatalogTable:
+    """The catalog's table, rebuilt (and saved) when the catalog has changed.
+
+    When the table file cannot be written the freshly built table is still
+    returned, just not cached.
+    """
+    catalog_path = Path(catalog_path)
+    path = table_path_for(catalog_path)
+    if not rebuild:
+        table = CatalogTable.load(path)
+        if table is not None and table.source == _source_stamp(catalog_path):
+            return table
+    table = CatalogTable.build(catalog_path)
+    try:
+        table.save(path)
+    except OSError:
+        pass
+    return table
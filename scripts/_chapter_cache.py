@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""Content-addressed on-disk cache of extracted chapters.
+
+generate-modules-from-epubs.py and the _extract_chapters*.py scripts used to
+reopen and re-extract every book on every run, so re-running a generator
+after a template tweak paid the full extraction cost again. Chapters are now
+cached per book under
+
+    <cache dir>/<fp[:2]>/<fingerprint>.<extractor>.v<version>.r<reader>.<params>.json.gz
+
+keyed by the book's content fingerprint (the scanner's: OPF bytes + spine
+document sizes, see _epub_reader.book_fingerprint), the extractor's name and
+version, the shared reader version (_epub_reader.READER_VERSION) and a hash of
+the extraction parameters. A renamed or moved copy of a book still hits; a
+changed book, extractor or parameter set misses. Working out the fingerprint
+reads only the archive's central directory, container.xml and OPF.
+
+Entries are written atomically, a hit refreshes the entry's mtime, and once
+the cache grows past its size budget the least recently used entries are
+evicted.
+
+Usage:  py -3 scripts/_chapter_cache.py [--cache-dir DIR] stats
+        py -3 scripts/_chapter_cache.py [--cache-dir DIR] list [--limit N]
+        py -3 scripts/_chapter_cache.py [--cache-dir DIR] prune [--max-mb N] [--stale]
+        py -3 scripts/_chapter_cache.py [--cache-dir DIR] clear
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable
+
+from _epub_reader import READER_VERSION, book_fingerprint
+
+DEFAULT_CACHE_DIR = Path(__file__).parent / ".chapter-cache"
+DEFAULT_MAX_MB = 512
+_SUFFIX = ".json.gz"
+
+
+class CacheEntry:
+    """One cached file, as parsed from its name."""
+
+    __slots__ = ("path", "fingerprint", "extractor", "version", "reader", "size", "mtime")
+
+    def __init__(self, path: Path, st: os.stat_result):
+        self.path = path
+        parts = path.name[:-len(_SUFFIX)].split(".")
+        self.fingerprint, self.extractor = parts[0], parts[1]
+        self.version, self.reader = parts[2], parts[3]
+        self.size = st.st_size
+        self.mtime = st.st_mtime
+
+
+class ChapterCache:
+    """Chapters of extracted books, keyed by content fingerprint and extractor."""
+
+    def __init__(self, root: str | Path = DEFAULT_CACHE_DIR, max_mb: float = DEFAULT_MAX_MB):
+        self.root = Path(root)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self._bytes: int | None = None      # running total, measured on first write
+        self._fingerprints: dict[str, str | None] = {}
+
+    # ── Keys ─────────────────────────────────────────────────────────────
+    def fingerprint(self, epub_path: str) -> str | None:
+        """book_fingerprint(epub_path), read once per path: callers recording
+        the fingerprint after chapters() get it without reopening the book."""
+        if epub_path not in self._fingerprints:
+            self._fingerprints[epub_path] = book_fingerprint(epub_path)
+        return self._fingerprints[epub_path]
+
+    def entry_path(self, fingerprint: str, extractor: str, version: int, params: dict) -> Path:
+        params_key = hashlib.sha1(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()[:10]
+        name = f"{fingerprint}.{extractor}.v{version}.r{READER_VERSION}.{params_key}{_SUFFIX}"
+        return self.root / fingerprint[:2] / name
+
+    # ── Read / write ─────────────────────────────────────────────────────
+    def get(self, path: Path) -> list[dict] | None:
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, EOFError, ValueError):
+            return None
+        try:
+            os.utime(path)                   # LRU: a hit makes the entry recent
+        except OSError:
+            pass
+        return payload.get("chapters")
+
+    def put(self, path: Path, chapters: list[dict], source: str = "") -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {"source": source, "created": time.time(), "chapters": chapters}
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=6) as f:
+            json.dump(payload, f, ensure_ascii=False)
+        os.replace(tmp, path)
+        if self._bytes is None:
+            self._bytes = sum(e.size for e in self.entries())
+        else:
+            self._bytes += path.stat().st_size
+        if self._bytes > self.max_bytes:
+            self._bytes = self.prune(self.max_bytes)[1]
+
+    def chapters(self, epub_path: str, extractor: str, version: int,
+                 extract: Callable[..., list[dict]], **params) -> list[dict]:
+        """`extract(epub_path, **params)`, served from the cache when possible.
+
+        Books whose fingerprint cannot be read (damaged archive, no OPF) are
+        extracted every time and never cached.
+        """
+        fingerprint = self.fingerprint(epub_path)
+        if fingerprint is None:
+            return extract(epub_path, **params)
+        path = self.entry_path(fingerprint, extractor, version, params)
+        chapters = self.get(path)
+        if chapters is not None:
+            self.hits += 1
+            return chapters
+        self.misses += 1
+        chapters = extract(epub_path, **params)
+        try:
+            self.put(path, chapters, source=epub_path)
+        except OSError as exc:
+            print(f"  [cache] could not write {path.name}: {exc}", file=sys.stderr)
+        return chapters
+
+    # ── Maintenance ──────────────────────────────────────────────────────
+    def entries(self) -> list[CacheEntry]:
+        found = []
+        if not self.root.is_dir():
+            return found
+        for path in self.root.glob(f"*/*{_SUFFIX}"):
+            try:
+                found.append(CacheEntry(path, path.stat()))
+            except (OSError, ValueError, IndexError):
+                continue
+        return found
+
+    def prune(self, max_bytes: int | None = None, stale: bool = False) -> tuple[int, int]:
+        """Evict least recently used entries until the cache fits `max_bytes`
+        (and, with stale, entries from another reader version). Returns
+        (entries removed, bytes remaining)."""
+        entries = sorted(self.entries(), key=lambda e: e.mtime)
+        total = sum(e.size for e in entries)
+        removed = 0
+        for e in entries:
+            too_big = max_bytes is not None and total > max_bytes
+            if not too_big and not (stale and e.reader != f"r{READER_VERSION}"):
+                continue
+            try:
+                e.path.unlink()
+            except FileNotFoundError:          # evicted by another process
+                pass
+            except OSError:
+                continue
+            total -= e.size
+            removed += 1
+        for tmp in self.root.glob("*/*.tmp") if self.root.is_dir() else ():
+            try:
+                if time.time() - tmp.stat().st_mtime > 3600:   # left by a crashed writer
+                    tmp.unlink()
+            except OSError:
+                pass
+        return removed, total
+
+
+@lru_cache(maxsize=None)
+def open_cache(root: str, max_mb: float = DEFAULT_MAX_MB) -> ChapterCache:
+    """One ChapterCache per directory and process (pool workers included)."""
+    return ChapterCache(root, max_mb)
+
+
+def _fmt_mb(n: int) -> str:
+    return f"{n / 1024 / 1024:,.1f} MB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and prune the extracted-chapter cache.")
+    parser.add_argument("--cache-dir", default=str(DEFAULT_CACHE_DIR))
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="Entry count and size per extractor.")
+    p_list = sub.add_parser("list", help="Most recently used entries.")
+    p_list.add_argument("--limit", type=int, default=20)
+    p_prune = sub.add_parser("prune", help="Evict least recently used entries.")
+    p_prune.add_argument("--max-mb", type=float, default=DEFAULT_MAX_MB)
+    p_prune.add_argument("--stale", action="store_true",
+                         help=f"Also drop entries from a reader version other than r{READER_VERSION}.")
+    sub.add_parser("clear", help="Delete every entry.")
+    args = parser.parse_args()
+
+    cache = ChapterCache(args.cache_dir)
+    entries = cache.entries()
+    if args.command == "stats":
+        total = sum(e.size for e in entries)
+        print(f"{cache.root}: {len(entries):,} entries, {_fmt_mb(total)}")
+        groups: dict[tuple, list[CacheEntry]] = {}
+        for e in entries:
+            groups.setdefault((e.extractor, e.version, e.reader), []).append(e)
+        for (extractor, version, reader), group in sorted(groups.items()):
+            stale = "" if reader == f"r{READER_VERSION}" else "  (stale reader)"
+            print(f"  {extractor:<24s} {version:>4s} {reader:>4s} {len(group):7,} entries "
+                  f"{_fmt_mb(sum(e.size for e in group)):>12s}{stale}")
+    elif args.command == "list":
+        for e in sorted(entries, key=lambda e: e.mtime, reverse=True)[:args.limit]:
+            used = time.strftime("%Y-%m-%d %H:%M", time.localtime(e.mtime))
+            print(f"  {used}  {e.fingerprint}  {e.extractor:<24s} {e.version:>4s} {e.reader:>4s} "
+                  f"{e.size / 1024:8.1f} KB")
+    elif args.command == "prune":
+        removed, total = cache.prune(int(args.max_mb * 1024 * 1024), stale=args.stale)
+        print(f"Removed {removed:,} entries; {_fmt_mb(total)} remain.")
+    elif args.command == "clear":
+        removed, _ = cache.prune(0)
+        print(f"Removed {removed:,} entries.")
+
+
+if __name__ == "__main__":
+    main()
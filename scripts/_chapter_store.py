@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""Sharded store for extracted chapter data.
+
+The chapter extractors used to write one monolithic JSON file
+(_chapter_data_batch3.json, {key: {"meta": ..., "chapters": [...]}}) that
+every consumer json.load()ed in full — _gen_batch3_auto.py to process one
+book at a time, _gen_previews_batch3.py just to print previews. A store is a
+directory instead:
+
+    _chapter_data_batch3/
+        index.json              book order, meta and chapter counts
+        <key>.json.gz           one compressed shard per book
+
+Writers add books one at a time (memory stays flat however many books a
+batch holds) and consumers read the small index, then only the shards of the
+books they touch. open_chapter_data() also reads the legacy single-file
+format, so old _chapter_data*.json files keep working.
+
+Usage:  py -3 scripts/_chapter_store.py info  STORE
+        py -3 scripts/_chapter_store.py convert LEGACY.json [--out STORE]
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Iterator
+
+INDEX_NAME = "index.json"
+STORE_VERSION = 1
+_SAFE_KEY_RE = re.compile(r"[^A-Za-z0-9_-]")
+
+
+def shard_name(key: str) -> str:
+    """File name of a book's shard; unsafe keys get a hash suffix."""
+    safe = _SAFE_KEY_RE.sub("_", key)[:80]
+    if safe != key:
+        safe += "-" + hashlib.sha1(key.encode("utf-8")).hexdigest()[:8]
+    return f"{safe}.json.gz"
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+class ChapterStoreWriter:
+    """Write a store book by book; the index is committed on close().
+
+        with ChapterStoreWriter(out_dir) as store:
+            store.add(key, {"meta": book, "chapters": chapters})
+    """
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.books: dict[str, dict] = {}
+
+    def __enter__(self) -> "ChapterStoreWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:     # a failed run leaves the previous index in place
+            self.close()
+
+    def add(self, key: str, entry: dict) -> None:
+        name = shard_name(key)
+        raw = json.dumps(entry, ensure_ascii=False).encode("utf-8")
+        _write_atomic(self.root / name, gzip.compress(raw, compresslevel=6, mtime=0))
+        chapters = entry.get("chapters", [])
+        self.books[key] = {
+            "shard":    name,
+            "meta":     entry.get("meta", {}),
+            "chapters": len(chapters),
+            "chars":    sum(len(ch.get("text", "")) for ch in chapters),
+        }
+
+    def close(self) -> None:
+        """Write the index and drop shards of books no longer in it."""
+        index = {"version": STORE_VERSION, "books": self.books}
+        _write_atomic(self.root / INDEX_NAME,
+                      json.dumps(index, indent=1, ensure_ascii=False).encode("utf-8"))
+        keep = {b["shard"] for b in self.books.values()}
+        for shard in self.root.glob("*.json.gz"):
+            if shard.name not in keep:
+                shard.unlink(missing_ok=True)
+
+
+class ChapterStore:
+    """Read side of a store: the index up front, each book's shard on demand."""
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+        with open(self.root / INDEX_NAME, encoding="utf-8") as f:
+            index = json.load(f)
+        if index.get("version") != STORE_VERSION:
+            raise ValueError(f"{self.root}: unsupported store version {index.get('version')}")
+        self.books: dict[str, dict] = index["books"]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.books
+
+    def __len__(self) -> int:
+        return len(self.books)
+
+    def keys(self) -> list[str]:
+        return list(self.books)
+
+    def meta(self, key: str) -> dict:
+        return self.books[key]["meta"]
+
+    def load(self, key: str) -> dict:
+        """One book's {"meta": ..., "chapters": [...]} entry."""
+        with gzip.open(self.root / self.books[key]["shard"], "rt", encoding="utf-8") as f:
+            return json.load(f)
+
+    def items(self) -> Iterator[tuple[str, dict]]:
+        for key in self.books:
+            yield key, self.load(key)
+
+    def describe(self) -> str:
+        size = sum((self.root / b["shard"]).stat().st_size for b in self.books.values())
+        return f"{len(self.books)} books, {size / 1e6:.1f} MB compressed"
+
+
+class LegacyChapterData:
+    """The old single-file format behind the ChapterStore interface."""
+
+    def __init__(self, path: str | Path):
+        self.root = Path(path)
+        with open(self.root, encoding="utf-8") as f:
+            self._data: dict[str, dict] = json.load(f)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def keys(self) -> list[str]:
+        return list(self._data)
+
+    def meta(self, key: str) -> dict:
+        return self._data[key]["meta"]
+
+    def load(self, key: str) -> dict:
+        return self._data[key]
+
+    def items(self) -> Iterator[tuple[str, dict]]:
+        yield from self._data.items()
+
+    def describe(self) -> str:
+        return f"{len(self._data)} books, {self.root.stat().st_size / 1e6:.1f} MB (legacy JSON)"
+
+
+def open_chapter_data(path: str | Path) -> ChapterStore | LegacyChapterData:
+    """Open a store directory, or the legacy `<name>.json` it replaced.
+
+    `path` may name either; a store directory wins when both exist.
+    """
+    path = Path(path)
+    store_dir = path.with_suffix("") if path.suffix == ".json" else path
+    if (store_dir / INDEX_NAME).exists():
+        return ChapterStore(store_dir)
+    legacy = store_dir.with_suffix(".json")
+    if legacy.exists():
+        return LegacyChapterData(legacy)
+    raise FileNotFoundError(f"no chapter store at {store_dir} (nor {legacy.name})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or create sharded chapter stores.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_info = sub.add_parser("info", help="List the books in a store.")
+    p_info.add_argument("store")
+    p_conv = sub.add_parser("convert", help="Shard a legacy _chapter_data*.json file.")
+    p_conv.add_argument("legacy")
+    p_conv.add_argument("--out", default=None, help="Store directory (default: next to the file).")
+    args = parser.parse_args()
+
+    if args.command == "info":
+        try:
+            data = open_chapter_data(args.store)
+        except (FileNotFoundError, ValueError) as exc:
+            print(f"ERROR: {exc}"); sys.exit(1)
+        print(f"{data.root}: {data.describe()}")
+        for key in data.keys():
+            meta = data.meta(key)
+            if isinstance(data, ChapterStore):
+                book = data.books[key]
+                n, chars = book["chapters"], book["chars"]
+            else:
+                chapters = data.load(key)["chapters"]
+                n, chars = len(chapters), sum(len(ch["text"]) for ch in chapters)
+            print(f"  {key:<28s} {n:3d} ch {chars:9,} chars  {meta.get('title', '')[:50]}")
+    elif args.command == "convert":
+        legacy = LegacyChapterData(args.legacy)
+        out = Path(args.out) if args.out else Path(args.legacy).with_suffix("")
+        with ChapterStoreWriter(out) as store:
+            for key, entry in legacy.items():
+                store.add(key, entry)
+        print(f"{legacy.describe()} -> {out}: {ChapterStore(out).describe()}")
+
+
+if __name__ == "__main__":
+    main()
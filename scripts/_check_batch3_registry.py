@@ -1,5 +1,5 @@
 """Check which batch 3 books already have modules in the registry."""
-import json, re, os
+from _module_index import ModuleIndex
 
 # Load batch 3 book list
 books = [
@@ -55,38 +55,22 @@ books = [
     ("tcp_ip_illustrated", "TCP/IP Illustrated, Volume 1: The Protocols", "W. Richard Stevens"),
 ]
 
-# Check existing epub-generated files
-epub_dir = "src/lib/modules/catalog/epub-generated"
-existing_files = set(f[:-3] for f in os.listdir(epub_dir) if f.endswith('.ts'))
+# Index the epub-generated files and the registry's imports of them
+index = ModuleIndex.build()
 
 # For each book, check if a matching file exists
-print(f"{'Key':25s} {'Has File':10s} {'Filename':60s}")
-print("-" * 100)
-
-# Title to filename slug matching
-def title_to_possible_slugs(title, creator):
-    """Generate possible filename slugs"""
-    results = []
-    # Full title + first creator
-    first_creator = creator.split(';')[0].strip()
-    raw = title + ' ' + first_creator
-    slug = re.sub(r'[^a-z0-9]+', '-', raw.lower()).strip('-')[:50]
-    results.append(slug)
-    # Just title
-    slug2 = re.sub(r'[^a-z0-9]+', '-', title.lower()).strip('-')[:50]
-    results.append(slug2)
-    return results
+print(f"{'Key':25s} {'Has File':10s} {'Match':14s} {'Registered':11s} {'Filename':60s}")
+print("-" * 125)
 
 for key, title, creator in books:
-    slugs = title_to_possible_slugs(title, creator)
-    found = None
-    for slug in slugs:
-        for ef in existing_files:
-            if slug[:20] in ef or ef[:20] in slug:
-                found = ef
-                break
-        if found:
-            break
-    status = "YES" if found else "NO"
-    fname = found or "(new file needed)"
-    print(f"{key:25s} {status:10s} {fname:60s}")
+    match = index.lookup(title, creator)
+    if match:
+        module = match.module
+        # An inexact match may be another book (a later volume, say): check it
+        status = ("YES" if match.exact else "maybe") if module.path else "NO"
+        kind = match.kind if match.exact else f"{match.kind} {match.score:.2f}"
+        registered = "yes" if module.registered else "no"
+        fname = module.slug
+    else:
+        status, kind, registered, fname = "NO", "-", "-", "(new file needed)"
+    print(f"{key:25s} {status:10s} {kind:14s} {registered:11s} {fname:60s}")
@@ -0,0 +1,195 @@
+"""NDJSON EPUB catalog format shared by scan-epubs.py and catalog-analyze.py.
+
+The catalog is one JSON object per line (one book per line), appended as scan
+results arrive, so peak memory stays flat and an interrupted scan still leaves
+a readable partial catalog. The run summary that used to live under "meta" is
+written to a small sidecar file next to it:
+
+    epub-catalog.ndjson       one book per line
+    epub-catalog.meta.json    {"complete": bool, "total_scanned": ..., ...}
+
+The legacy single-file epub-catalog.json ({"meta": ..., "books": [...]}) is
+still readable through the same functions.
+
+The library holds duplicate copies and editions of the same work under
+different file names. Each book carries a content `fingerprint` and a
+normalized title+creator `work_key`; books sharing either are grouped, and
+the sidecar lists the groups under "duplicate_groups" with one
+representative per group for downstream scoring and extraction.
+"""
+
+import json
+import os
+import re
+import unicodedata
+from pathlib import Path
+from typing import Iterator
+
+
+def meta_path_for(catalog_path: Path) -> Path:
+    """Sidecar summary path for an NDJSON catalog (foo.ndjson → foo.meta.json)."""
+    return catalog_path.with_name(catalog_path.stem + ".meta.json")
+
+
+def is_legacy_catalog(catalog_path: Path) -> bool:
+    return catalog_path.suffix.lower() == ".json"
+
+
+class CatalogWriter:
+    """Append-only NDJSON catalog writer.
+
+    Books are written one per line as they arrive; call flush() after each
+    result batch so a crash loses at most the batch in progress. The sidecar
+    is marked incomplete on open and rewritten with the summary on close().
+    """
+
+    def __init__(self, catalog_path: Path):
+        self.path = Path(catalog_path)
+        self.meta_path = meta_path_for(self.path)
+        self.count = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        write_meta(self.meta_path, {"complete": False})
+        self._f = open(self.path, "w", encoding="utf-8", newline="\n")
+
+    def write(self, book: dict) -> None:
+        self._f.write(json.dumps(book, ensure_ascii=False))
+        self._f.write("\n")
+        self.count += 1
+
+    def flush(self) -> None:
+        self._f.flush()
+
+    def close(self, summary: dict | None = None) -> None:
+        self._f.close()
+        if summary is not None:
+            write_meta(self.meta_path, {"complete": True, **summary})
+
+    def __enter__(self) -> "CatalogWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if not self._f.closed:
+            self._f.close()
+
+
+_LEADING_ARTICLE = re.compile(r"^(?:the|a|an)\s+")
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def _normalize_words(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text.replace("&", " and "))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    return _NON_WORD.sub(" ", text).strip()
+
+
+def work_key(title: str, creator: str) -> str:
+    """Normalized title+creator key shared by editions of the same work.
+
+    Case, accents, punctuation ("&" reads as "and") and a leading article
+    are ignored; creator words are sorted so "Austen, Jane" and "Jane Austen"
+    agree. Books without a creator get no key — bare titles like
+    "Introduction" collide too often.
+    """
+    title = _LEADING_ARTICLE.sub("", _normalize_words(title))
+    creator = " ".join(sorted(_normalize_words(creator).split()))
+    if not title or not creator:
+        return ""
+    return f"{title}|{creator}"
+
+
+class DuplicateIndex:
+    """Group books that share a content fingerprint or a work key.
+
+    Feed every catalogued book to add(); groups() then returns the connected
+    groups (union-find over both keys) with a representative chosen as the
+    copy with the most spine content, then the longest description, then the
+    lowest file path.
+    """
+
+    def __init__(self):
+        self._parent: dict[str, str] = {}
+        self._rank: dict[str, tuple] = {}
+        self._owner: dict[tuple[str, str], str] = {}
+
+    def _root(self, path: str) -> str:
+        parent = self._parent
+        while parent[path] != path:
+            parent[path] = parent[parent[path]]
+            path = parent[path]
+        return path
+
+    def add(self, book: dict) -> None:
+        path = book.get("filepath")
+        if not path or path in self._parent:
+            return
+        self._parent[path] = path
+        self._rank[path] = (-(book.get("spine_bytes") or 0),
+                            -len(book.get("description", "")), path)
+        for kind in ("fingerprint", "work_key"):
+            key = book.get(kind)
+            if not key:
+                continue
+            other = self._owner.setdefault((kind, key), path)
+            if other != path:
+                self._parent[self._root(path)] = self._root(other)
+
+    def groups(self) -> list[dict]:
+        """[{"representative": path, "duplicates": [path, ...]}] for groups of 2+."""
+        members: dict[str, list[str]] = {}
+        for path in self._parent:
+            members.setdefault(self._root(path), []).append(path)
+        groups = []
+        for paths in members.values():
+            if len(paths) < 2:
+                continue
+            paths.sort(key=self._rank.__getitem__)
+            groups.append({"representative": paths[0], "duplicates": sorted(paths[1:])})
+        groups.sort(key=lambda g: g["representative"])
+        return groups
+
+
+def duplicate_filepaths(meta: dict) -> set[str]:
+    """File paths of non-representative copies listed in a catalog summary."""
+    return {p for group in meta.get("duplicate_groups", []) for p in group["duplicates"]}
+
+
+def write_meta(meta_path: Path, meta: dict) -> None:
+    """Atomically write the catalog summary sidecar."""
+    tmp = meta_path.with_name(meta_path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, meta_path)
+
+
+def iter_catalog(catalog_path: Path) -> Iterator[dict]:
+    """Stream books from an NDJSON (or legacy JSON) catalog.
+
+    A truncated final line — left behind by an interrupted scan — is skipped.
+    """
+    catalog_path = Path(catalog_path)
+    if is_legacy_catalog(catalog_path):
+        with open(catalog_path, encoding="utf-8") as f:
+            yield from json.load(f).get("books", [])
+        return
+    with open(catalog_path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def load_catalog_meta(catalog_path: Path) -> dict:
+    """Return the catalog summary (sidecar for NDJSON, "meta" for legacy JSON)."""
+    catalog_path = Path(catalog_path)
+    try:
+        if is_legacy_catalog(catalog_path):
+            with open(catalog_path, encoding="utf-8") as f:
+                return {"complete": True, **json.load(f).get("meta", {})}
+        with open(meta_path_for(catalog_path), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
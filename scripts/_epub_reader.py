@@ -0,0 +1,675 @@
+"""Shared EPUB reader for the Python pipeline scripts.
+
+One importable module instead of each script carrying its own container.xml
+/ OPF code (scan-epubs.py had find_opf_path and an NS table, the chapter
+extractors exec'd the whole generate-modules CLI through importlib to borrow
+get_opf_path / get_spine_items):
+
+  * find_opf_path / parse_opf / read_opf — container.xml and single-pass OPF
+    parsing, working on a zipfile.ZipFile or a metadata-only ZipProbe;
+  * EpubBook — one open archive whose container, OPF, manifest, spine and
+    table of contents are read once and cached, for every stage that needs
+    them (metadata, chapter text, TOC);
+  * content_fingerprint / book_fingerprint — the scanner's content hash,
+    also the key of the chapter cache;
+  * read_chapter — lazy, size-aware reading of a single spine document.
+
+read_chapter() avoids inflating what is thrown away: chapter extraction used
+to `zf.read()` every spine document in full before its stub / heading filters
+ran, and generate-modules then kept only the first 2000 characters. It
+  * skips a document without inflating it when its uncompressed size
+    (ZipInfo.file_size) is too small to hold the minimum text — text is never
+    longer than the markup it came from;
+  * reads in growing increments through a streaming decompressor and stops
+    once it has the text the caller keeps (max_chars).
+"""
+
+import codecs
+import hashlib
+import posixpath
+import re
+import zipfile
+import zlib
+from functools import cached_property
+from typing import Iterable, Iterator
+from urllib.parse import unquote
+from xml.etree import ElementTree as ET
+
+from _html_text import ChapterText, parse_chapter
+from _zip_probe import ProbeUnsupported, ZipProbe
+
+# ── Dublin Core / OPF XML namespaces ────────────────────────────────────────
+NS = {
+    "dc":        "http://purl.org/dc/elements/1.1/",
+    "opf":       "http://www.idpf.org/2007/opf",
+    "container": "urn:oasis:names:tc:opendocument:xmlns:container",
+}
+
+NCX_MEDIA_TYPE = "application/x-dtbncx+xml"
+HTML_SUFFIXES = (".html", ".xhtml", ".htm")
+
+# Bump when chapter text or segmentation output changes, so cached chapters
+# (_chapter_cache.py) extracted by an older reader are not served.
+READER_VERSION = 1
+
+_FIRST_READ = 16 * 1024
+_MAX_READ = 1024 * 1024
+
+
+def find_opf_path(zf: zipfile.ZipFile | ZipProbe) -> str | None:
+    """Read META-INF/container.xml and return the path to the OPF file."""
+    try:
+        container_xml = zf.read("META-INF/container.xml")
+        root = ET.fromstring(container_xml)
+        rootfile = root.find(".//container:rootfile", NS)
+        if rootfile is not None:
+            return rootfile.get("full-path")
+    except (KeyError, ET.ParseError):
+        pass
+    # Fallback: find any .opf file in the archive
+    for name in zf.namelist():
+        if name.endswith(".opf"):
+            return name
+    return None
+
+
+def member_size(zf: zipfile.ZipFile | ZipProbe, name: str) -> int:
+    """Uncompressed size of an archive member, -1 if it is missing."""
+    try:
+        if isinstance(zf, ZipProbe):
+            return zf.file_size(name)
+        return zf.getinfo(name).file_size
+    except KeyError:
+        return -1
+
+
+def resolve_href(base_path: str, href: str) -> tuple[str, str]:
+    """Split an href relative to `base_path` into (member name, fragment)."""
+    href, _, fragment = href.partition("#")
+    href = unquote(href)
+    base = posixpath.dirname(base_path)
+    name = posixpath.normpath(posixpath.join(base, href)) if base else href
+    return name, unquote(fragment)
+
+
+def spine_member_names(spine: list[str], opf_path: str) -> list[str]:
+    """Archive member names of the OPF spine hrefs, in reading order."""
+    return [resolve_href(opf_path, href)[0] for href in spine]
+
+
+# ── Single-pass OPF reader ──────────────────────────────────────────────────
+_DC = "{" + NS["dc"] + "}"
+_DC_FIELDS = {"title", "creator", "publisher", "language", "description", "subject", "date"}
+# Streamed OPF bytes are fed to the parser in slices this size, so the walk can
+# stop shortly after </metadata> instead of parsing a whole inflated chunk.
+_OPF_SLICE = 8 * 1024
+
+
+class OpfData:
+    """What one walk over an OPF yields: Dublin Core metadata, spine hrefs and
+    the hrefs of the NCX / EPUB 3 nav tables of contents (None if absent)."""
+
+    __slots__ = ("metadata", "spine", "ncx", "nav")
+
+    def __init__(self, metadata: dict, spine: list[str],
+                 ncx: str | None = None, nav: str | None = None):
+        self.metadata = metadata
+        self.spine = spine
+        self.ncx = ncx
+        self.nav = nav
+
+
+class _DcCollector:
+    """Gather Dublin Core fields from the direct children of <metadata>.
+
+    dc:-namespaced elements (whatever prefix the file binds) win over bare,
+    un-namespaced tags, matching the old find("dc:x") / find("x") fallback.
+    """
+
+    def __init__(self):
+        self.dc: dict[str, list[str]] = {}
+        self.bare: dict[str, list[str]] = {}
+
+    def add(self, el: ET.Element) -> None:
+        tag = el.tag
+        if tag.startswith(_DC):
+            tag, found = tag[len(_DC):], self.dc
+        else:
+            found = self.bare
+        if tag in _DC_FIELDS:
+            found.setdefault(tag, []).append((el.text or "").strip())
+
+    def metadata(self) -> dict:
+        def values(tag: str) -> list[str]:
+            return self.dc.get(tag) or self.bare.get(tag) or []
+
+        def get(tag: str) -> str:
+            found = values(tag)
+            return found[0] if found else ""
+
+        desc = get("description")
+        date = get("date")
+        return {
+            "title":       get("title"),
+            "creator":     get("creator"),
+            "publisher":   get("publisher"),
+            "language":    get("language"),
+            "description": desc[:500] if desc else "",
+            "subjects":    [v for v in values("subject") if v],
+            "date":        date[:4] if date else "",
+        }
+
+
+def extract_opf_metadata(chunks: Iterable[bytes]) -> dict | None:
+    """Stream OPF bytes through a pull parser and stop at </metadata>.
+
+    The manifest and spine that follow — thousands of items in large books —
+    are never parsed, nor (when `chunks` streams from the archive) even
+    inflated. Returns {} if the package has no <metadata>, None if the XML is
+    malformed before </metadata>.
+    """
+    parser = ET.XMLPullParser(events=("start", "end"))
+    collector = _DcCollector()
+    depth = 0
+    in_metadata = False
+    try:
+        for chunk in chunks:
+            for i in range(0, len(chunk), _OPF_SLICE):
+                parser.feed(chunk[i:i + _OPF_SLICE])
+                for event, el in parser.read_events():
+                    if event == "start":
+                        depth += 1
+                        if depth == 2 and el.tag.endswith("metadata"):
+                            in_metadata = True
+                        continue
+                    if in_metadata:
+                        if depth == 2:
+                            return collector.metadata()
+                        if depth == 3:
+                            collector.add(el)
+                    depth -= 1
+        parser.close()
+    except ET.ParseError:
+        return None
+    return {}
+
+
+def _opf_walk(root: ET.Element) -> OpfData:
+    """Metadata, spine and TOC hrefs from one pass over the package's children."""
+    collector = _DcCollector()
+    hrefs: dict[str, str] = {}
+    idrefs: list[str] = []
+    seen_metadata = False
+    toc_id = ncx_id = nav = None
+    for section in root:
+        tag = section.tag.rsplit("}", 1)[-1]
+        if tag.endswith("metadata") and not seen_metadata:
+            seen_metadata = True
+            for el in section:
+                collector.add(el)
+        elif tag == "manifest":
+            for item in section:
+                item_id, href = item.get("id"), item.get("href")
+                if item_id and href:
+                    hrefs[item_id] = href
+                    if item.get("media-type") == NCX_MEDIA_TYPE:
+                        ncx_id = ncx_id or item_id
+                    elif nav is None and "nav" in (item.get("properties") or "").split():
+                        nav = href
+        elif tag == "spine":
+            toc_id = section.get("toc")
+            idrefs.extend(ref.get("idref") for ref in section if ref.get("idref"))
+    spine = [hrefs[i] for i in idrefs if i in hrefs]
+    ncx = hrefs.get(toc_id) or hrefs.get(ncx_id)
+    return OpfData(collector.metadata() if seen_metadata else {}, spine, ncx, nav)
+
+
+def _iter_member(zf: zipfile.ZipFile | ZipProbe, name: str) -> Iterator[bytes]:
+    """Yield an archive member's bytes in chunks so readers can stop early."""
+    if isinstance(zf, ZipProbe):
+        yield from zf.open_stream(name, _OPF_SLICE)
+        return
+    with zf.open(name) as f:
+        yield from iter(lambda: f.read(_OPF_SLICE), b"")
+
+
+def parse_opf(zf: zipfile.ZipFile | ZipProbe, opf_path: str) -> dict:
+    """Parse OPF metadata file and return a dict of book metadata.
+
+    Only the archive bytes up to </metadata> are read and parsed.
+    """
+    chunks = _iter_member(zf, opf_path)
+    try:
+        meta = extract_opf_metadata(chunks)
+    except KeyError:
+        return {}
+    finally:
+        chunks.close()
+    return meta or {}
+
+
+def read_opf(zf: zipfile.ZipFile | ZipProbe, opf_path: str) -> tuple[bytes, OpfData] | None:
+    """Return the raw OPF bytes with their metadata and spine (None if missing or malformed).
+
+    The whole OPF is parsed in one C-level pass and walked once; the scanner
+    needs the bytes too (they feed the content fingerprint).
+    """
+    try:
+        opf_data = zf.read(opf_path)
+        return opf_data, _opf_walk(ET.fromstring(opf_data))
+    except (KeyError, ET.ParseError):
+        return None
+
+
+# ── Content fingerprint ─────────────────────────────────────────────────────
+
+def content_fingerprint(zf: zipfile.ZipFile | ZipProbe, opf_path: str,
+                        opf_data: bytes, opf: OpfData) -> tuple[str, int]:
+    """Fingerprint a book's content without reading its chapters.
+
+    Hashes the OPF bytes together with the uncompressed size of every spine
+    document, so a renamed or re-zipped copy of the same EPUB matches while
+    a different edition (new OPF or changed chapters) does not. Returns
+    (fingerprint, total spine bytes).
+    """
+    sizes = [member_size(zf, name) for name in spine_member_names(opf.spine, opf_path)]
+    h = hashlib.sha1(opf_data)
+    h.update(b"\0" + ",".join(map(str, sizes)).encode("ascii"))
+    return h.hexdigest()[:20], sum(n for n in sizes if n > 0)
+
+
+def book_fingerprint(epub_path: str) -> str | None:
+    """The scanner's content fingerprint of an EPUB file (None if unreadable).
+
+    Only the central directory, container.xml and the OPF are read.
+    """
+    def fingerprint(zf: zipfile.ZipFile | ZipProbe) -> str | None:
+        opf_path = find_opf_path(zf)
+        package = read_opf(zf, opf_path) if opf_path else None
+        return content_fingerprint(zf, opf_path, *package)[0] if package else None
+
+    try:
+        try:
+            with ZipProbe(epub_path) as zp:
+                return fingerprint(zp)
+        except ProbeUnsupported:
+            with zipfile.ZipFile(epub_path, "r") as zf:
+                return fingerprint(zf)
+    except (OSError, zipfile.BadZipFile, zlib.error):
+        return None
+
+
+# ── Table of contents ───────────────────────────────────────────────────────
+
+class TocEntry:
+    """One table-of-contents entry: title, target member, #fragment, depth (1 = top)."""
+
+    __slots__ = ("title", "member", "fragment", "level")
+
+    def __init__(self, title: str, member: str, fragment: str, level: int):
+        self.title = title
+        self.member = member
+        self.fragment = fragment
+        self.level = level
+
+    def __repr__(self) -> str:
+        target = f"{self.member}#{self.fragment}" if self.fragment else self.member
+        return f"TocEntry({self.title!r}, {target!r}, level={self.level})"
+
+
+def _local(tag) -> str:
+    return tag.rsplit("}", 1)[-1] if isinstance(tag, str) else ""
+
+
+def _ncx_entries(root: ET.Element, ncx_path: str) -> list[TocEntry]:
+    entries: list[TocEntry] = []
+
+    def walk(parent: ET.Element, level: int) -> None:
+        for point in parent:
+            if _local(point.tag) != "navPoint":
+                continue
+            title = src = ""
+            for child in point:
+                name = _local(child.tag)
+                if name == "navLabel":
+                    title = " ".join("".join(child.itertext()).split())
+                elif name == "content":
+                    src = child.get("src", "")
+            if src:
+                entries.append(TocEntry(title, *resolve_href(ncx_path, src), level))
+            walk(point, level + 1)
+
+    for child in root:
+        if _local(child.tag) == "navMap":
+            walk(child, 1)
+    return entries
+
+
+def _nav_entries(root: ET.Element, nav_path: str) -> list[TocEntry]:
+    navs = [el for el in root.iter() if _local(el.tag) == "nav"]
+    toc = next((el for el in navs
+                if any(_local(k) == "type" and "toc" in v.split() for k, v in el.attrib.items())),
+               navs[0] if navs else None)
+    if toc is None:
+        return []
+    entries: list[TocEntry] = []
+
+    def walk(ol: ET.Element, level: int) -> None:
+        for li in ol:
+            if _local(li.tag) != "li":
+                continue
+            for child in li:
+                name = _local(child.tag)
+                if name == "a" and child.get("href"):
+                    title = " ".join("".join(child.itertext()).split())
+                    entries.append(TocEntry(title, *resolve_href(nav_path, child.get("href")), level))
+                elif name == "ol":
+                    walk(child, level + 1)
+
+    for child in toc:
+        if _local(child.tag) == "ol":
+            walk(child, 1)
+    return entries
+
+
+# ── Chapter segmentation ────────────────────────────────────────────────────
+
+# The table of contents drives segmentation only when it yields at least this
+# many sections; otherwise every spine document is its own chapter.
+MIN_TOC_SECTIONS = 3
+
+
+class Section:
+    """One chapter: its title ("" for a bare spine document) and the spine
+    slices it spans, as (member, start anchor, end anchor) — an empty anchor
+    meaning the start / end of the member."""
+
+    __slots__ = ("title", "parts")
+
+    def __init__(self, title: str, parts: list[tuple[str, str, str]]):
+        self.title = title
+        self.parts = parts
+
+    def __repr__(self) -> str:
+        return f"Section({self.title!r}, {len(self.parts)} part(s))"
+
+
+def _toc_level(toc: list[TocEntry], min_sections: int) -> int | None:
+    """Shallowest TOC depth with at least min_sections entries down to it."""
+    for level in sorted({e.level for e in toc}):
+        if sum(1 for e in toc if e.level <= level) >= min_sections:
+            return level
+    return None
+
+
+def toc_sections(toc: list[TocEntry], spine: list[str],
+                 min_sections: int = MIN_TOC_SECTIONS) -> list[Section]:
+    """Chapters as the table of contents delimits them.
+
+    Each section runs from its entry's target to the next entry's target in
+    spine order, so a chapter split across many files is joined and a file
+    holding several chapters is cut at their anchors. Entries outside the
+    spine or pointing backwards are dropped; front matter before the first
+    entry belongs to no section. Returns [] when the TOC is too coarse.
+    """
+    level = _toc_level(toc, min_sections)
+    if level is None:
+        return []
+    order = {name: i for i, name in enumerate(spine)}
+    marks: list[tuple[int, str, str]] = []     # (spine index, anchor, title)
+    for entry in toc:
+        if entry.level > level or entry.member not in order:
+            continue
+        idx = order[entry.member]
+        if marks:
+            last_idx, last_anchor, _ = marks[-1]
+            if idx < last_idx or (idx == last_idx and (not entry.fragment
+                                                       or entry.fragment == last_anchor)):
+                continue
+        marks.append((idx, entry.fragment, entry.title))
+
+    sections = []
+    for k, (idx, anchor, title) in enumerate(marks):
+        end_idx, end_anchor = marks[k + 1][:2] if k + 1 < len(marks) else (len(spine), "")
+        parts = []
+        for j in range(idx, end_idx + 1):
+            if j == end_idx and not end_anchor:
+                break
+            parts.append((spine[j], anchor if j == idx else "", end_anchor if j == end_idx else ""))
+        sections.append(Section(title, parts))
+    return sections if len(sections) >= min_sections else []
+
+
+# ── Open books ──────────────────────────────────────────────────────────────
+
+class EpubBook:
+    """An open EPUB archive with its package documents read once and cached.
+
+    Container, OPF (metadata, manifest, spine) and the table of contents are
+    parsed on first use and then served from memory, so the stages of one run
+    — metadata, spine walk, chapter text, TOC — share a single open archive:
+
+        with EpubBook(path) as book:
+            for name in book.spine:
+                chapter = book.chapter(name, min_chars=150)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.zf = zipfile.ZipFile(path, "r")
+
+    def __enter__(self) -> "EpubBook":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.zf.close()
+
+    # Unlike the scanner, which reports a damaged member as a failure, a book
+    # is read leniently here: chapters may survive a corrupt container.xml
+    # or OPF.
+
+    @cached_property
+    def opf_path(self) -> str | None:
+        try:
+            return find_opf_path(self.zf)
+        except (zipfile.BadZipFile, zlib.error):
+            return next((n for n in self.zf.namelist() if n.endswith(".opf")), None)
+
+    @cached_property
+    def opf(self) -> OpfData | None:
+        """Parsed OPF package (None if there is none or it is unreadable)."""
+        if not self.opf_path:
+            return None
+        try:
+            package = read_opf(self.zf, self.opf_path)
+        except (zipfile.BadZipFile, zlib.error):
+            return None
+        return package[1] if package else None
+
+    @property
+    def metadata(self) -> dict:
+        """Dublin Core metadata in the scanner's catalog shape ({} if unreadable)."""
+        return self.opf.metadata if self.opf else {}
+
+    @cached_property
+    def spine(self) -> list[str]:
+        """Archive member names of the spine documents, in reading order.
+
+        Books with an OPF but no usable spine fall back to every HTML member
+        in name order; books with no OPF at all have no spine.
+        """
+        if not self.opf_path:
+            return []
+        if self.opf and self.opf.spine:
+            return spine_member_names(self.opf.spine, self.opf_path)
+        return sorted(n for n in self.zf.namelist() if n.endswith(HTML_SUFFIXES))
+
+    @cached_property
+    def toc(self) -> list[TocEntry]:
+        """Table of contents from the NCX (EPUB 2) or, failing that, the nav
+        document (EPUB 3); [] when neither exists or parses."""
+        opf = self.opf
+        if opf is None:
+            return []
+        for href, parse in ((opf.ncx, _ncx_entries), (opf.nav, _nav_entries)):
+            if not href:
+                continue
+            path = resolve_href(self.opf_path, href)[0]
+            try:
+                entries = parse(ET.fromstring(self.zf.read(path)), path)
+            except (KeyError, ET.ParseError, zipfile.BadZipFile, zlib.error):
+                continue
+            if entries:
+                return entries
+        return []
+
+    @cached_property
+    def sections(self) -> list[Section]:
+        """Chapters to extract: delimited by the table of contents where it
+        is usable, otherwise one per spine document."""
+        return (toc_sections(self.toc, self.spine)
+                or [Section("", [(name, "", "")]) for name in self.spine])
+
+    def chapter(self, name: str, min_chars: int = 0,
+                max_chars: int | None = None) -> ChapterText | None:
+        """One spine document as text; see read_chapter()."""
+        return read_chapter(self.zf, name, min_chars, max_chars)
+
+    def read_section(self, section: Section, min_chars: int = 0,
+                     max_chars: int | None = None) -> ChapterText | None:
+        """One section as text; see read_section()."""
+        return read_section(self.zf, section, min_chars, max_chars)
+
+
+def read_chapter(zf: zipfile.ZipFile, name: str, min_chars: int = 0,
+                 max_chars: int | None = None) -> ChapterText | None:
+    """Parse a spine document, reading no more of it than the caller needs.
+
+    Returns None, without inflating anything, when the member is missing or
+    too small to yield `min_chars` of text. With `max_chars`, only a prefix
+    is read: enough markup for the text to exceed max_chars (its first
+    max_chars characters are then exact) and the result is marked
+    `truncated`; its paragraphs and headings cover that prefix only. Without
+    max_chars the whole document is parsed.
+    """
+    size = member_size(zf, name)
+    if size < 0 or size < min_chars:
+        return None
+    if max_chars is None or size <= _FIRST_READ:
+        return parse_chapter(zf.read(name).decode("utf-8", errors="replace"))
+
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    markup = ""
+    step = _FIRST_READ
+    with zf.open(name) as f:
+        while True:
+            data = f.read(step)
+            if not data:
+                return parse_chapter(markup + decoder.decode(b"", final=True))
+            markup += decoder.decode(data)
+            # Cut at the last complete tag so no half-read tag or entity is
+            # mistaken for text; everything before it converts exactly.
+            cut = markup.rfind(">") + 1
+            chapter = parse_chapter(markup[:cut])
+            if len(chapter) > max_chars:
+                chapter.truncated = True
+                return chapter
+            step = min(step * 2, _MAX_READ)
+
+
+# The opening tags directly before an anchor (e.g. <h2><a id="x">) belong to
+# the section the anchor starts.
+_OPEN_TAGS_TAIL = re.compile(r"(?:<[A-Za-z][^<>]*>\s*)+\Z")
+
+
+def _anchor_re(anchor: str) -> re.Pattern:
+    return re.compile(r"""\s(?:id|name)\s*=\s*["']%s["']""" % re.escape(anchor))
+
+
+def _cut_before(markup: str, pos: int) -> int:
+    """Offset of the tag holding the attribute at `pos`, moved back over any
+    opening tags right before it."""
+    tag = markup.rfind("<", 0, pos)
+    if tag < 0:
+        return pos
+    window = markup[max(0, tag - 512):tag]
+    m = _OPEN_TAGS_TAIL.search(window)
+    return tag - (len(window) - m.start()) if m else tag
+
+
+def read_slice(zf: zipfile.ZipFile, name: str, start: str = "", end: str = "") -> str:
+    """Markup of a member between two anchors ("" = its start / end).
+
+    Inflation stops as soon as the end anchor has been read, so a section
+    that ends early in a large file does not pay for the rest of it. A
+    missing anchor falls back to the start / end of the member.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    end_re = _anchor_re(end) if end else None
+    markup = ""
+    stop = None
+    step = _FIRST_READ
+    with zf.open(name) as f:
+        while stop is None:
+            data = f.read(step)
+            if not data:
+                markup += decoder.decode(b"", final=True)
+                break
+            search_from = max(0, len(markup) - len(end) - 64)
+            markup += decoder.decode(data)
+            if end_re is not None:
+                m = end_re.search(markup, search_from)
+                if m:
+                    stop = _cut_before(markup, m.start())
+            step = min(step * 2, _MAX_READ)
+    if stop is None:
+        stop = len(markup)
+    begin = 0
+    if start:
+        m = _anchor_re(start).search(markup, 0, stop)
+        begin = _cut_before(markup, m.start()) if m else 0
+    return markup[begin:stop]
+
+
+def read_section(zf: zipfile.ZipFile, section: Section, min_chars: int = 0,
+                 max_chars: int | None = None) -> ChapterText | None:
+    """Parse a section, reading only the anchored ranges of its members.
+
+    A bare spine document is read by read_chapter(). Otherwise the section's
+    slices are converted in order and merged; None (nothing inflated) if its
+    members are missing or too small to yield `min_chars`. With `max_chars`,
+    reading stops once the text exceeds it and the result is `truncated`.
+    """
+    parts = section.parts
+    if len(parts) == 1 and not parts[0][1] and not parts[0][2]:
+        return read_chapter(zf, parts[0][0], min_chars, max_chars)
+    sizes = [member_size(zf, name) for name, _, _ in parts]
+    if all(n < 0 for n in sizes) or sum(n for n in sizes if n > 0) < min_chars:
+        return None
+
+    blocks: list[str] = []
+    headings: list[tuple[int, str]] = []
+    paragraphs: list[str] = []
+    chars = -2                                  # len("\n\n".join(blocks))
+    truncated = False
+    for k, ((name, start, end), size) in enumerate(zip(parts, sizes)):
+        if size < 0:
+            continue
+        if start or end:
+            chapter = parse_chapter(read_slice(zf, name, start, end))
+        else:
+            left = None if max_chars is None else max(max_chars - chars, 0)
+            chapter = read_chapter(zf, name, max_chars=left)
+        blocks += chapter.blocks
+        headings += chapter.headings
+        paragraphs += chapter.paragraphs
+        chars += sum(len(b) + 2 for b in chapter.blocks)
+        if max_chars is not None and chars > max_chars:
+            truncated = chapter.truncated or k < len(parts) - 1
+            break
+    merged = ChapterText(blocks, headings, paragraphs)
+    merged.truncated = truncated
+    return merged
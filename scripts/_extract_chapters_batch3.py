@@ -2,19 +2,15 @@
 """
 Extract full chapter text from 50 priority EPUBs for Batch 3 module generation.
 """
-import sys, json, re, zipfile
-import importlib.util
+import sys
 import pathlib
 
-_spec = importlib.util.spec_from_file_location(
-    "gen_epub",
-    pathlib.Path(__file__).parent / "generate-modules-from-epubs.py"
-)
-_mod = importlib.util.module_from_spec(_spec)
-_spec.loader.exec_module(_mod)
-strip_html = _mod.strip_html
-get_opf_path = _mod.get_opf_path
-get_spine_items = _mod.get_spine_items
+from _chapter_cache import ChapterCache
+from _chapter_store import ChapterStoreWriter
+from _epub_reader import EpubBook
+
+# Cache key of extract_full_chapters() output; bump whenever it changes.
+EXTRACTOR_VERSION = 1
 
 SKIP_HEADINGS = {"contents","copyright","dedication","acknowledgments",
                  "acknowledgements","about the author","index","bibliography",
@@ -24,27 +20,33 @@ SKIP_HEADINGS = {"contents","copyright","dedication","acknowledgments",
 def extract_full_chapters(epub_path, max_chapters=12):
     chapters = []
     try:
-        with zipfile.ZipFile(epub_path, "r") as zf:
-            opf_path = get_opf_path(zf)
-            if not opf_path:
-                return []
-            spine = get_spine_items(zf, opf_path)
-            if not spine:
-                spine = sorted(n for n in zf.namelist() if n.endswith((".html",".xhtml",".htm")))
-            for item_path in spine[:max_chapters * 3]:
+        with EpubBook(epub_path) as book:
+            # Chapters follow the book's table of contents when it has one
+            # (joining split files, cutting packed ones at their anchors),
+            # otherwise one spine document each.
+            for section in book.sections[:max_chapters * 3]:
                 try:
-                    raw = zf.read(item_path).decode("utf-8", errors="replace")
-                    text = strip_html(raw)
+                    if section.title[:120].lower().strip() in SKIP_HEADINGS:
+                        continue
+                    # Peek at the start first: stubs are rejected from their
+                    # size and skipped sections (index, notes …) from their
+                    # heading without inflating the rest of the document.
+                    chapter = book.read_section(section, min_chars=150, max_chars=2000)
+                    if chapter is None:
+                        continue
+                    title = section.title or chapter.heading()
+                    if chapter.truncated and title[:120].lower().strip() not in SKIP_HEADINGS:
+                        chapter = book.read_section(section)
+                    text = chapter.text
                     if len(text) < 150:
                         continue
-                    heading_m = re.search(r"<h[1-4][^>]*>(.*?)</h[1-4]>", raw, re.IGNORECASE|re.DOTALL)
-                    heading = strip_html(heading_m.group(1)).strip()[:120] if heading_m else ""
-                    heading = heading or f"Chapter {len(chapters)+1}"
+                    heading = (section.title or chapter.heading())[:120] or f"Chapter {len(chapters)+1}"
                     if heading.lower().strip() in SKIP_HEADINGS:
                         continue
                     if len(text) < 400:
                         continue
-                    chapters.append({"heading": heading, "text": text})
+                    chapters.append({"heading": heading, "text": text,
+                                     "headings": chapter.headings})
                     if len(chapters) >= max_chapters:
                         break
                 except Exception:
@@ -121,28 +123,38 @@ BOOKS = [
 assert len(BOOKS) == 50, f"Expected 50 books, got {len(BOOKS)}"
 
 def main():
-    results = {}
+    # Books extracted before come from the chapter cache (--no-cache to re-read)
+    cache = None if "--no-cache" in sys.argv[1:] else ChapterCache()
+    out = pathlib.Path(__file__).parent / "_chapter_data_batch3"
+    store = ChapterStoreWriter(out)
     failed = []
     for i, book in enumerate(BOOKS):
         key = book["key"]
         print(f"\n[{i+1:02d}/50] === {key} ({book['title'][:50]}) ===")
-        chs = extract_full_chapters(book["filepath"], max_chapters=12)
+        if cache:
+            chs = cache.chapters(book["filepath"], "extract-chapters-batch3", EXTRACTOR_VERSION,
+                                 extract_full_chapters, max_chapters=12)
+        else:
+            chs = extract_full_chapters(book["filepath"], max_chapters=12)
         if not chs:
             print(f"  !! NO CHAPTERS EXTRACTED")
             failed.append(key)
-        results[key] = {
-            "meta": book,
-            "chapters": [{"heading": ch["heading"], "text": ch["text"], "char_count": len(ch["text"])} for ch in chs]
-        }
+        # The cache has the fingerprint already; generators record it as provenance
+        meta = {**book, "fingerprint": cache.fingerprint(book["filepath"])} if cache else book
+        store.add(key, {
+            "meta": meta,
+            "chapters": [{"heading": ch["heading"], "text": ch["text"], "char_count": len(ch["text"]),
+                          "headings": ch["headings"]} for ch in chs]
+        })
         for j, ch in enumerate(chs):
             preview = ch["heading"][:55]
             print(f"  [{j+1:02d}] {preview!r:58s} ({len(ch['text'])} chars)")
 
-    out = pathlib.Path(__file__).parent / "_chapter_data_batch3.json"
-    with open(out, "w", encoding="utf-8") as f:
-        json.dump(results, f, indent=2, ensure_ascii=False)
+    store.close()
     print(f"\n{'='*60}")
-    print(f"Saved {len(results)} books to {out}")
+    print(f"Saved {len(store.books)} books to {out}/")
+    if cache:
+        print(f"Chapter cache: {cache.hits} hits, {cache.misses} extracted")
     if failed:
         print(f"FAILED ({len(failed)}): {', '.join(failed)}")
     else:
@@ -1,16 +1,25 @@
 #!/usr/bin/env python3
 """Batch 3 Auto-Generator — Produces 50 TypeScript LearningModule files
-from the extracted chapter data in _chapter_data_batch3.json.
+from the extracted chapter data in the _chapter_data_batch3 store (or a
+legacy _chapter_data_batch3.json); only one book is loaded at a time.
 
 Usage:  python scripts/_gen_batch3_auto.py
-Output: 50 .ts files in src/lib/modules/catalog/epub-generated/
+Output: 50 .ts files in src/lib/modules/catalog/epub-generated/, each
+        recorded in its provenance manifest (_provenance.py)
 """
 
-import json, re, os, sys, hashlib
+import re, os, sys, hashlib
+
+from _chapter_store import open_chapter_data
+from _epub_reader import book_fingerprint
+from _provenance import append_entries, module_entry
+from _ts_emitter import CurriculumWriter
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 CHAPTER_DATA_PATH = os.path.join(SCRIPT_DIR, "_chapter_data_batch3.json")
 OUTPUT_DIR = os.path.join(SCRIPT_DIR, "..", "src", "lib", "modules", "catalog", "epub-generated")
+# Recorded in the provenance manifest; bump when the module template changes.
+GENERATOR_VERSION = 1
 
 # 2-char ID prefixes (all unique)
 PFX = {
@@ -81,34 +90,52 @@ def clean_heading(h, fallback_text=""):
             return None
     return h[:80] if h and len(h) >= 3 else None
 
+def chunk_sentences(text, target=130, min_w=40):
+    """Split continuous text into ~120-word passages at sentence boundaries."""
+    sentences = re.split(r'(?<=[.!?])\s+(?=[A-Z])', re.sub(r'\s+', ' ', text.strip()))
+    raw = []
+    current = []
+    wc = 0
+    for s in sentences:
+        sw = len(s.split())
+        if wc + sw > target and wc >= min_w:
+            raw.append(' '.join(current))
+            current = [s]
+            wc = sw
+        else:
+            current.append(s)
+            wc += sw
+    if current:
+        raw.append(' '.join(current))
+    return raw
+
 def get_paras(text, min_w=25, max_w=300):
     """Extract paragraph-sized chunks from text.
     
-    Handles both newline-separated and continuous text (no newlines).
-    For continuous text, splits into ~120-word passages at sentence boundaries.
+    Chapter text from the extractors keeps the real paragraph boundaries as
+    blank lines; those paragraphs are used as they are, one longer than max_w
+    is cut at sentence boundaries, and runs of paragraphs shorter than min_w
+    (dialogue, lists) are joined and chunked like continuous text. Older
+    chapter data without boundaries is chunked into ~120-word passages.
     """
     skip = {'copyright','isbn','published','edition','reserved','catalog','library','acknowledgment'}
-    text = re.sub(r'\s+', ' ', text.strip())
 
-    # Try double-newline split first
-    raw = re.split(r'\n\s*\n', text)
-    if len(raw) < 3:
-        # Continuous text: split at sentence boundaries into ~120-word chunks
-        sentences = re.split(r'(?<=[.!?])\s+(?=[A-Z])', text)
+    paras = [p for p in re.split(r'\n\s*\n', text.strip()) if p.strip()]
+    if len(paras) < 3:
+        raw = chunk_sentences(text)
+    else:
         raw = []
-        current = []
-        wc = 0
-        for s in sentences:
-            sw = len(s.split())
-            if wc + sw > 130 and wc >= 40:
-                raw.append(' '.join(current))
-                current = [s]
-                wc = sw
-            else:
-                current.append(s)
-                wc += sw
-        if current:
-            raw.append(' '.join(current))
+        short = []
+        for p in paras + [None]:
+            wc = len(p.split()) if p is not None else 0
+            if p is not None and wc < min_w:
+                short.append(p)
+                continue
+            if short:
+                raw.extend(chunk_sentences(' '.join(short)))
+                short = []
+            if p is not None:
+                raw.extend(chunk_sentences(p) if wc > max_w else [p])
 
     out = []
     for p in raw:
@@ -162,25 +189,31 @@ def make_tags(subject):
 # CONTENT EXTRACTION
 # ═══════════════════════════════════════════════════════════════════════════
 
+# Chunk text for a chapter with no usable paragraphs
+FALLBACK_PARA = ("This section examines the fundamental concepts and arguments "
+                 "presented by the author, exploring their significance within "
+                 "the broader context of the discipline and their implications "
+                 "for contemporary understanding.")
+
 def prepare_chapters(chapters, needed=12):
-    """Extract headings + paragraphs from raw chapters, padding to `needed`."""
+    """Extract headings + paragraphs from raw chapters, padding to `needed`.
+
+    Padding entries repeat an earlier chapter and are marked "padded".
+    """
     result = []
     for ch in chapters[:needed]:
         h = clean_heading(ch["heading"], ch.get("text", "")) or "Key Concepts"
         paras = get_paras(ch["text"])
-        result.append({"h": h, "p": paras})
+        result.append({"h": h, "p": paras, "padded": False})
     while len(result) < needed:
         src = result[len(result) % max(len(result), 1)]
-        result.append({"h": f"Further Analysis: {src['h']}", "p": src["p"]})
+        result.append({"h": f"Further Analysis: {src['h']}", "p": src["p"], "padded": True})
     return result
 
 def pick_para(paras, idx=0, words=130):
     """Pick paragraph at index, trim to words."""
     if not paras:
-        return ("This section examines the fundamental concepts and arguments "
-                "presented by the author, exploring their significance within "
-                "the broader context of the discipline and their implications "
-                "for contemporary understanding.")
+        return FALLBACK_PARA
     p = paras[min(idx, len(paras)-1)]
     return trim(p, words)
 
@@ -188,8 +221,8 @@ def pick_para(paras, idx=0, words=130):
 # TYPESCRIPT BUILDER
 # ═══════════════════════════════════════════════════════════════════════════
 
-def build_video_lesson(ch_data, ch_indices, pfx, lnum):
-    """Build lines for a video lesson."""
+def write_video_lesson(w, ch_data, ch_indices, pfx, lnum):
+    """Write a video lesson."""
     lid = f"{pfx}-l{lnum:02d}"
     # Merge headings for title
     heads = [ch_data[i]["h"] for i in ch_indices[:2]]
@@ -197,26 +230,15 @@ def build_video_lesson(ch_data, ch_indices, pfx, lnum):
     if len(title) > 70:
         title = heads[0]
 
-    lines = []
-    a = lines.append
-    a(f'    /* ─────────────────────────────────────────────────')
-    a(f'       L{lnum:02d}  {esc(title)}')
-    a(f'    ───────────────────────────────────────────────── */')
-    a(f'    {{')
-    a(f'      id: "{lid}",')
-    a(f'      title: "{esc(title)}",')
-    a(f'      type: "video",')
-    a(f'      duration: 12,')
-    a(f'      objectives: [')
-    for ci in ch_indices[:3]:
-        h = ch_data[ci]["h"]
-        a(f'        "Examine the key ideas and arguments related to {esc(h.lower())}",')
+    w.open_lesson(lid, lnum, title, "video", 12)
+    objectives = [f"Examine the key ideas and arguments related to {ch_data[ci]['h'].lower()}"
+                  for ci in ch_indices[:3]]
     if len(ch_indices) < 3:
-        a(f'        "Synthesize and compare the themes across the covered material",')
-    a(f'      ],')
+        objectives.append("Synthesize and compare the themes across the covered material")
+    w.objectives(objectives)
 
     # ── Chunks (3) ──
-    a(f'      chunks: [')
+    w.open_list("chunks")
     chunk_sources = []
     for ci in ch_indices:
         chunk_sources.append((ch_data[ci]["h"], ch_data[ci]["p"]))
@@ -227,16 +249,15 @@ def build_video_lesson(ch_data, ch_indices, pfx, lnum):
         h, paras = chunk_sources[src_idx]
         ct = h if c < len(chunk_sources) else f"Deeper Analysis: {h}"
         cc = pick_para(paras, para_idx, 130)
-        a(f'        {{')
-        a(f'          id: "{lid}-c{c+1}",')
-        a(f'          title: "{esc(ct)}",')
-        a(f'          content:')
-        a(f'            "{esc(cc)}",')
-        a(f'        }},')
-    a(f'      ],')
+        if cc == FALLBACK_PARA:
+            w.counts["fallback_chunks"] += 1
+        elif ch_data[ch_indices[src_idx]]["padded"]:
+            w.counts["padded_chunks"] += 1
+        w.chunk(f"{lid}-c{c+1}", ct, cc)
+    w.close_list()
 
     # ── Flashcards (4) ──
-    a(f'      flashcards: [')
+    w.open_list("flashcards")
     for f_i in range(4):
         src_idx = f_i % len(chunk_sources)
         para_idx = f_i // len(chunk_sources)
@@ -245,36 +266,21 @@ def build_video_lesson(ch_data, ch_indices, pfx, lnum):
         if f_i >= len(chunk_sources):
             front = f"Key concept: {h}"[:70]
         back = first_sent(pick_para(paras, para_idx + 1, 60), 180)
-        a(f'        {{')
-        a(f'          id: "{lid}-f{f_i+1}",')
-        a(f'          front: "{esc(front)}",')
-        a(f'          back:')
-        a(f'            "{esc(back)}",')
-        a(f'        }},')
-    a(f'      ],')
+        w.flashcard(f"{lid}-f{f_i+1}", front, back)
+    w.close_list()
 
-    a(f'    }},')
-    return lines
+    w.close_lesson()
 
 
-def build_quiz_lesson(ch_data, ch_indices, pfx, lnum):
-    """Build lines for a quiz lesson."""
+def write_quiz_lesson(w, ch_data, ch_indices, pfx, lnum):
+    """Write a quiz lesson."""
     lid = f"{pfx}-l{lnum:02d}"
     title = f"Checkpoint Quiz {lnum // 4 + 1}"
 
-    lines = []
-    a = lines.append
-    a(f'    /* ─────────────────────────────────────────────────')
-    a(f'       L{lnum:02d}  {title}')
-    a(f'    ───────────────────────────────────────────────── */')
-    a(f'    {{')
-    a(f'      id: "{lid}",')
-    a(f'      title: "{esc(title)}",')
-    a(f'      type: "quiz",')
-    a(f'      duration: 8,')
-    a(f'      objectives: ["Assess understanding of the concepts covered in the preceding lessons"],')
+    w.open_lesson(lid, lnum, title, "quiz", 8)
+    w.objectives(["Assess understanding of the concepts covered in the preceding lessons"], inline=True)
 
-    a(f'      questions: [')
+    w.open_list("questions")
 
     # Collect all available headings and sentences for question generation
     all_sents = []
@@ -312,25 +318,19 @@ def build_quiz_lesson(ch_data, ch_indices, pfx, lnum):
         correct_idx = options.index(correct)
         correct_letter = "abcd"[correct_idx]
 
-        a(f'        {{')
-        a(f'          id: "{lid}-q{qi+1}",')
-        a(f'          text: "{esc(q_text)}",')
-        a(f'          options: [')
-        for oi, opt in enumerate(options):
-            a(f'            {{ id: "{"abcd"[oi]}", text: "{esc(opt)}" }},')
-        a(f'          ],')
-        a(f'          correctOptionId: "{correct_letter}",')
-        a(f'          explanation:')
-        a(f'            "{esc(f"This question relates to {heading}. {correct}")}",')
-        a(f'        }},')
-
-    a(f'      ],')
-    a(f'    }},')
-    return lines
-
-
-def build_module(key, book_data):
-    """Build complete TypeScript module source."""
+        w.question(f"{lid}-q{qi+1}", q_text, zip("abcd", options), correct_letter,
+                   f"This question relates to {heading}. {correct}")
+
+    w.close_list()
+    w.close_lesson()
+
+
+def write_module(key, book_data, f):
+    """Stream the complete TypeScript module source into file `f`.
+
+    Returns the CurriculumWriter, whose chars/lines/counts/sha256 describe
+    what was written.
+    """
     meta = book_data["meta"]
     chapters = book_data["chapters"]
 
@@ -365,41 +365,22 @@ def build_module(key, book_data):
         ("quiz",  [6, 7, 8, 9, 10, 11]),
     ]
 
-    L = []
-    a = L.append
-    a('import type { LearningModule } from "@/lib/modules/types";')
-    a('')
-    a('// High-quality curriculum module derived from EPUB.')
-    a(f'// Source: {filepath}')
-    a(f'// Author: {esc(creator)}  |  Subject: {esc(subject)}')
-    a('')
-    a(f'export const {export_name}: LearningModule = {{')
-    a(f'  id: "{slug}",')
-    a(f'  title: "{esc(title)}",')
-    a(f'  description:')
-    a(f'    "{esc(desc)}",')
-    a(f'  subject: "{esc(subject)}",')
-    a(f'  tags: [{", ".join(chr(34)+t+chr(34) for t in tags)}],')
-    a(f'  minAge: 18,')
-    a(f'  maxAge: 99,')
-    a(f'  moduleVersion: "2.0.0",')
-    a(f'  version: "2.0.0",')
-    a(f'  learningObjectives: [')
-    for o in objectives:
-        a(f'    "{esc(o)}",')
-    a(f'  ],')
-    a(f'  lessons: [')
+    w = CurriculumWriter(f, esc)
+    w.open_module(
+        comments=["High-quality curriculum module derived from EPUB.",
+                  f"Source: {filepath}",
+                  f"Author: {esc(creator)}  |  Subject: {esc(subject)}"],
+        export_name=export_name, slug=slug, title=title, description=desc,
+        subject=subject, tags=tags, objectives=objectives)
 
     for lnum, (ltype, indices) in enumerate(plan, 1):
         if ltype == "video":
-            L.extend(build_video_lesson(ch, indices, pfx, lnum))
+            write_video_lesson(w, ch, indices, pfx, lnum)
         else:
-            L.extend(build_quiz_lesson(ch, indices, pfx, lnum))
+            write_quiz_lesson(w, ch, indices, pfx, lnum)
 
-    a(f'  ],')
-    a(f'}};')
-    a('')
-    return '\n'.join(L)
+    w.close_module()
+    return w
 
 
 # ═══════════════════════════════════════════════════════════════════════════
@@ -407,12 +388,12 @@ def build_module(key, book_data):
 # ═══════════════════════════════════════════════════════════════════════════
 
 def main():
-    if not os.path.exists(CHAPTER_DATA_PATH):
-        print(f"ERROR: {CHAPTER_DATA_PATH} not found"); sys.exit(1)
+    try:
+        all_data = open_chapter_data(CHAPTER_DATA_PATH)
+    except FileNotFoundError as e:
+        print(f"ERROR: {e}"); sys.exit(1)
 
-    print(f"Loading chapter data ({os.path.getsize(CHAPTER_DATA_PATH)/1e6:.1f} MB)...")
-    with open(CHAPTER_DATA_PATH, encoding="utf-8") as f:
-        all_data = json.load(f)
+    print(f"Chapter data: {all_data.describe()}")
 
     os.makedirs(OUTPUT_DIR, exist_ok=True)
     generated, failed = [], []
@@ -423,14 +404,19 @@ def main():
             failed.append(key)
             continue
         try:
-            ts = build_module(key, all_data[key])
-            meta = all_data[key]["meta"]
+            book_data = all_data.load(key)
+            meta = book_data["meta"]
             slug = slugify(meta["title"], meta["creator"])
             path = os.path.join(OUTPUT_DIR, f"{slug}.ts")
             with open(path, "w", encoding="utf-8") as f:
-                f.write(ts)
-            nlines = ts.count('\n') + 1
-            print(f"  OK [{len(generated)+1:02d}/50] {slug}.ts  ({nlines} lines)")
+                w = write_module(key, book_data, f)
+            append_entries(OUTPUT_DIR, [module_entry(
+                w, slug=slug, export_name=pascalize(slug), title=meta["title"],
+                creator=meta["creator"], source=meta["filepath"],
+                fingerprint=(meta["fingerprint"] if "fingerprint" in meta
+                             else book_fingerprint(meta["filepath"])),
+                generator="_gen_batch3_auto.py", generator_version=GENERATOR_VERSION)])
+            print(f"  OK [{len(generated)+1:02d}/50] {slug}.ts  ({w.lines} lines)")
             generated.append(slug)
         except Exception as e:
             import traceback
@@ -1,9 +1,10 @@
 """Generate chapter previews for batch 3 module writing."""
-import json, pathlib
+import pathlib
 
-data_path = pathlib.Path(__file__).parent / "_chapter_data_batch3.json"
-with open(data_path, encoding="utf-8") as f:
-    data = json.load(f)
+from _chapter_store import open_chapter_data
+
+# Sharded store (or legacy JSON); each book is loaded only when previewed
+data = open_chapter_data(pathlib.Path(__file__).parent / "_chapter_data_batch3.json")
 
 # Generate previews in 5 batches of 10
 keys = list(data.keys())
@@ -15,7 +16,7 @@ for batch_idx in range(5):
     out_path = pathlib.Path(f"D:/ch_preview_b3_{batch_idx+1}.txt")
     with open(out_path, "w", encoding="utf-8") as out:
         for key in batch_keys:
-            entry = data[key]
+            entry = data.load(key)
             meta = entry["meta"]
             chapters = entry["chapters"]
             
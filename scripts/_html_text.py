@@ -0,0 +1,136 @@
+"""Fast HTML → plain-text conversion for EPUB chapter documents.
+
+Replaces the HTMLParser-based strip_html of generate-modules-from-epubs.py,
+which created a parser per document and pushed every text node through a
+Python callback. Here a chapter is converted with a handful of C-level regex
+passes:
+
+  1. drop comments, CDATA, processing instructions / doctypes and the
+     contents of <script>, <style> and <head> (same skip rules as before);
+  2. turn block-level tags (p, div, h1–h6, li, br, tr, td, blockquote, …)
+     into a boundary marker and delete every other tag;
+  3. decode entities once, after tags are gone, so "&lt;b&gt;" stays text;
+  4. collapse layout whitespace (newlines, tabs, NBSP, runs of spaces).
+
+Unlike the old extractor, inline markup no longer splits words
+("<b>H</b>ello" → "Hello", not "H ello") and paragraph / heading boundaries
+survive as blank lines instead of everything being joined with spaces.
+
+parse_chapter() runs the same conversion once and also returns the heading
+hierarchy and the paragraph list, for the chapter extractors.
+"""
+
+import html
+import re
+
+# Skipped regions. <head> also ends at <body> for documents that omit
+# </head>; an unterminated <script>/<style> swallows the rest of the file,
+# as it did with HTMLParser.
+_SKIP_RE = re.compile(
+    r"<!--.*?(?:-->|\Z)"
+    r"|<!\[CDATA\[.*?(?:\]\]>|\Z)"
+    r"|<[?!][^>]*>"
+    r"|<(script|style)\b(?:[^>]*/>|[^>]*>.*?(?:</\1\s*>|\Z))"
+    r"|<head\b(?:[^>]*/>|[^>]*>.*?(?:</head\s*>|(?=<body\b)|\Z))",
+    re.IGNORECASE | re.DOTALL,
+)
+
+BLOCK_TAGS = (
+    "address", "article", "aside", "blockquote", "body", "br", "caption", "dd",
+    "div", "dl", "dt", "figcaption", "figure", "footer", "h[1-6]", "header",
+    "hr", "html", "li", "main", "nav", "ol", "p", "pre", "section", "table",
+    "tbody", "td", "tfoot", "th", "thead", "tr", "ul",
+)
+_BLOCK_RE = re.compile(r"</?(?:%s)\b[^>]*>" % "|".join(BLOCK_TAGS), re.IGNORECASE)
+_TAG_RE = re.compile(r"</?[A-Za-z][^>]*>")
+
+# Block boundary marker: a control character that does not occur in chapter
+# text and is deliberately left out of the layout-whitespace class below.
+_BOUNDARY = "\x1e"
+# Layout whitespace other than a plain space (newlines, tabs, NBSP, …). Runs
+# starting with a rare character, then runs of plain spaces, are collapsed in
+# two passes: a single class that also matched lone spaces would stop at
+# every word gap and cost several times more on long chapters.
+_LAYOUT_WS = "\t\n\r\x0b\x0c\x1c\x1d\x1f\x85\xa0"
+_LAYOUT_WS_RE = re.compile("[%s][%s ]*" % (_LAYOUT_WS, _LAYOUT_WS))
+_SPACES_RE = re.compile("  +")
+
+
+# Headings are tagged with a level marker in the same pass, so chapter
+# structure comes out of one conversion instead of a second regex search over
+# the raw HTML. Line breaks inside a heading become spaces.
+_HEADING_RE = re.compile(r"<h([1-6])\b[^>]*>(.*?)</h\1\s*>", re.IGNORECASE | re.DOTALL)
+_HEADING_MARK = "\x02"
+
+
+def _mark_heading(m: re.Match) -> str:
+    inner = _TAG_RE.sub("", _BLOCK_RE.sub(" ", m.group(2)))
+    return f"{_BOUNDARY}{_HEADING_MARK}{m.group(1)}{inner}{_BOUNDARY}"
+
+
+def _blocks(markup: str, headings: bool) -> list[str]:
+    text = _SKIP_RE.sub("", markup)
+    if headings:
+        text = _HEADING_RE.sub(_mark_heading, text)
+    text = _BLOCK_RE.sub(_BOUNDARY, text)
+    text = _TAG_RE.sub("", text)
+    if "&" in text:
+        text = html.unescape(text)
+    text = _SPACES_RE.sub(" ", _LAYOUT_WS_RE.sub(" ", text))
+    return [block for block in (b.strip() for b in text.split(_BOUNDARY)) if block]
+
+
+def html_blocks(markup: str) -> list[str]:
+    """Return the non-empty text blocks (paragraphs, headings, list items …)."""
+    return _blocks(markup, headings=False)
+
+
+def html_to_text(markup: str, sep: str = "\n\n") -> str:
+    """Plain text of an HTML/XHTML document, blocks joined by `sep`.
+
+    Pass sep=" " for single-line text such as a heading.
+    """
+    return sep.join(html_blocks(markup))
+
+
+class ChapterText:
+    """Structured text of one chapter document, from a single conversion.
+
+    `blocks` keeps document order (headings included), `headings` holds
+    (level, text) pairs and `paragraphs` every non-heading block. `truncated`
+    is set when only a prefix of the document was read.
+    """
+
+    __slots__ = ("blocks", "headings", "paragraphs", "text", "truncated")
+
+    def __init__(self, blocks: list[str], headings: list[tuple[int, str]], paragraphs: list[str]):
+        self.blocks = blocks
+        self.headings = headings
+        self.paragraphs = paragraphs
+        self.text = "\n\n".join(blocks)
+        self.truncated = False
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+    def heading(self, max_level: int = 4) -> str:
+        """First heading of level ≤ max_level in document order ("" if none)."""
+        return next((h for level, h in self.headings if level <= max_level), "")
+
+
+def parse_chapter(markup: str) -> ChapterText:
+    """Convert a chapter document once into blocks, headings and paragraphs."""
+    blocks: list[str] = []
+    headings: list[tuple[int, str]] = []
+    paragraphs: list[str] = []
+    for block in _blocks(markup, headings=True):
+        if block[0] == _HEADING_MARK:
+            text = block[2:].strip()
+            if not text:
+                continue
+            headings.append((int(block[1]), text))
+        else:
+            text = block
+            paragraphs.append(text)
+        blocks.append(text)
+    return ChapterText(blocks, headings, paragraphs)
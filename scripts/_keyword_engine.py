@@ -0,0 +1,148 @@
+"""TF-IDF keyword selection and sentence lookup for quiz generation.
+
+generate-modules-from-epubs.py used to rank each chapter's capitalized words
+by raw in-chapter frequency against a 20-word stop list, so sentence-initial
+discourse words ("However", "Although") and a novel's main characters topped
+every chapter, and make_mcq re-split the whole chapter into sentences once
+per keyword.
+
+Here every chapter of every book in a batch is tokenized once and scored in
+one sparse computation:
+
+  * candidate terms are capitalized words of 4+ letters, as before;
+  * score = tf × idf, with document frequency taken over the chapters of the
+    same book (scope="book") or of the whole batch (scope="corpus"), so terms
+    that appear everywhere — names, "However" — sink and terms particular to
+    a chapter rise; ties keep first-occurrence order;
+  * SentenceIndex splits a chapter into sentences once and maps each term to
+    its first context sentence.
+
+The batch is scored with NumPy (unique/bincount over (chapter, term) pairs)
+when it is installed, otherwise with collections.Counter; both rank
+identically.
+"""
+
+import math
+import re
+from collections import Counter
+
+try:
+    import numpy as np
+except ImportError:          # optional: the Counter path gives the same ranking
+    np = None
+
+TERM_RE = re.compile(r"\b[A-Z][a-z]{3,}\b")
+SENTENCE_SPLIT_RE = re.compile(r"[.!?]|\n\n")
+
+# Function words that open sentences; they never make a quiz term, whatever
+# their TF-IDF.
+STOP = frozenset({
+    "This", "That", "They", "There", "Their", "These", "With", "From", "Have",
+    "Will", "Your", "More", "Into", "When", "What", "Which", "Some", "About",
+    "Because", "After", "However", "Although", "Though", "Therefore", "Thus",
+    "Then", "Those", "Here", "Where", "While", "Whether", "Such", "Each",
+    "Every", "Many", "Most", "Much", "Both", "Even", "Only", "Also", "Once",
+    "Perhaps", "Still", "Yet", "Before", "During", "Since", "Until", "Unlike",
+    "Like", "Over", "Under", "Upon", "Within", "Without", "Between", "Among",
+    "Chapter", "Part", "Section", "Figure", "Table", "Page", "Note", "Notes",
+})
+
+
+def _rank_python(tokens: list[list[str]], groups: list[int], n: int, min_count: int) -> list[list[str]]:
+    counts = [Counter(toks) for toks in tokens]        # insertion order = first occurrence
+    df: dict[int, Counter] = {}
+    docs = Counter(groups)
+    for g, c in zip(groups, counts):
+        df.setdefault(g, Counter()).update(c.keys())
+    ranked = []
+    for g, c in zip(groups, counts):
+        n_docs, group_df = docs[g], df[g]
+        scored = [(-(cnt * (math.log((1 + n_docs) / (1 + group_df[t])) + 1)), first, t)
+                  for first, (t, cnt) in enumerate(c.items())
+                  if cnt >= min_count and t not in STOP]
+        scored.sort()
+        ranked.append([t for _, _, t in scored[:n]])
+    return ranked
+
+
+def _rank_numpy(tokens: list[list[str]], groups: list[int], n: int, min_count: int) -> list[list[str]]:
+    flat = [t for toks in tokens for t in toks]
+    if not flat:
+        return [[] for _ in tokens]
+    vocab, term_ids = np.unique(np.array(flat), return_inverse=True)
+    n_terms = len(vocab)
+    chapter_ids = np.repeat(np.arange(len(tokens)), [len(toks) for toks in tokens])
+
+    # Sparse (chapter, term) counts; return_index gives each pair's first token
+    pairs, first, tf = np.unique(chapter_ids * n_terms + term_ids,
+                                 return_index=True, return_counts=True)
+    ch, term = np.divmod(pairs, n_terms)
+    group = np.asarray(groups)[ch]
+    _, pair_group_term, df = np.unique(group * n_terms + term,
+                                       return_inverse=True, return_counts=True)
+    n_docs = np.bincount(groups)[group]
+    score = tf * (np.log((1 + n_docs) / (1 + df[pair_group_term])) + 1)
+
+    stop = np.isin(vocab, list(STOP))
+    keep = (tf >= min_count) & ~stop[term]
+    ch, term, first, score = ch[keep], term[keep], first[keep], score[keep]
+    order = np.lexsort((first, -score, ch))            # by chapter, best first
+    ch, term = ch[order], term[order]
+    rank = np.arange(len(ch)) - np.searchsorted(ch, ch)
+    top = rank < n
+    ch, term = ch[top], term[top]
+    bounds = np.searchsorted(ch, np.arange(len(tokens) + 1))
+    words = vocab[term].tolist()
+    return [words[bounds[i]:bounds[i + 1]] for i in range(len(tokens))]
+
+
+def rank_keywords(books: list[list[str]], n: int = 20, min_count: int = 2,
+                  scope: str = "book") -> list[list[list[str]]]:
+    """Top-n TF-IDF terms of every chapter of every book, as one batch.
+
+    `books` holds each book's chapter texts; the result mirrors that shape.
+    Terms must occur at least min_count times in the chapter. scope="book"
+    measures document frequency within each book, scope="corpus" across
+    every chapter in the batch.
+    """
+    tokens = [TERM_RE.findall(text) for chapters in books for text in chapters]
+    if scope == "corpus":
+        groups = [0] * len(tokens)
+    elif scope == "book":
+        groups = [b for b, chapters in enumerate(books) for _ in chapters]
+    else:
+        raise ValueError(f"unknown scope {scope!r}")
+    rank = _rank_numpy if np is not None else _rank_python
+    flat = rank(tokens, groups, n, min_count) if tokens else []
+    out, i = [], 0
+    for chapters in books:
+        out.append(flat[i:i + len(chapters)])
+        i += len(chapters)
+    return out
+
+
+def book_keywords(chapter_texts: list[str], n: int = 20) -> list[list[str]]:
+    """Top-n keywords of each chapter of one book (book-scoped TF-IDF)."""
+    return rank_keywords([chapter_texts], n)[0]
+
+
+class SentenceIndex:
+    """A chapter split into sentences once, with each term's first context.
+
+    A context sentence is the first one (over 20 characters) in which the
+    term occurs as a whole word.
+    """
+
+    __slots__ = ("_context",)
+
+    def __init__(self, text: str):
+        context: dict[str, str] = {}
+        for sentence in SENTENCE_SPLIT_RE.split(text):
+            sentence = sentence.strip()
+            if len(sentence) > 20:
+                for term in TERM_RE.findall(sentence):
+                    context.setdefault(term, sentence)
+        self._context = context
+
+    def context(self, term: str) -> str | None:
+        return self._context.get(term)
@@ -0,0 +1,110 @@
+"""Precompiled multi-keyword substring matcher for the EPUB pipeline scripts.
+
+scan-epubs.py (SUBJECT_MAP categories) and catalog-analyze.py (academic /
+fiction / publisher signals) both ask "which of these ~150 keywords occur in
+this text?". Instead of one `kw in haystack` scan per keyword, all keywords of
+a matcher are compiled into a single trie-shaped regex and the text is walked
+once.
+
+Semantics are exactly those of `kw in text` for every keyword: occurrences may
+overlap and one keyword may be a prefix of another ("art" / "artificial
+intelligence"). At each hit position the regex returns the longest keyword
+starting there; every shorter keyword that is a prefix of it also occurs at
+that position and is reported too.
+
+Build one matcher per process (module level) and reuse it for every book.
+"""
+
+import re
+from typing import Iterable, Iterator
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Compile words into a regex that matches the longest word at a position."""
+    trie: dict = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def build(node: dict) -> str:
+        alts = [re.escape(ch) + build(child)
+                for ch, child in sorted((k, v) for k, v in node.items() if k)]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        if "" in node:
+            # Greedy optional: longer words win, the prefix word still matches.
+            body = "(?:" + body + ")?"
+        return body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """Find every occurrence of a fixed set of lowercase keywords in one pass.
+
+    `groups` maps a group label (a category, "academic", "publisher", …) to
+    its keywords. A keyword may belong to several groups.
+    """
+
+    def __init__(self, groups: dict[str, Iterable[str]]):
+        self.groups: dict[str, tuple[str, ...]] = {g: tuple(kws) for g, kws in groups.items()}
+        self.keywords: list[str] = list(dict.fromkeys(
+            kw for kws in self.groups.values() for kw in kws))
+        if not self.keywords or any(not kw for kw in self.keywords):
+            raise ValueError("KeywordMatcher needs at least one non-empty keyword")
+        self._regex = re.compile(_trie_pattern(self.keywords))
+        self._kw_groups: dict[str, tuple[str, ...]] = {
+            kw: tuple(g for g, kws in self.groups.items() if kw in kws) for kw in self.keywords
+        }
+        kw_set = set(self.keywords)
+        # For each keyword: itself plus every keyword that is a proper prefix of it.
+        self._implied: dict[str, tuple[str, ...]] = {
+            kw: tuple(kw[:n] for n in range(1, len(kw) + 1) if kw[:n] in kw_set)
+            for kw in self.keywords
+        }
+
+    def finditer(self, text: str, pos: int = 0) -> Iterator[tuple[int, str]]:
+        """Yield (start, keyword) for every keyword occurrence, overlaps included."""
+        search = self._regex.search
+        implied = self._implied
+        m = search(text, pos)
+        while m is not None:
+            start = m.start()
+            for kw in implied[m.group()]:
+                yield start, kw
+            m = search(text, start + 1)
+
+    def counts(self, text: str, pos: int = 0) -> dict[str, int]:
+        """Return keyword → number of occurrences for keywords present in text."""
+        # Inlined finditer(): this is the per-book hot loop.
+        found: dict[str, int] = {}
+        search = self._regex.search
+        implied = self._implied
+        m = search(text, pos)
+        while m is not None:
+            for kw in implied[m.group()]:
+                found[kw] = found.get(kw, 0) + 1
+            m = search(text, m.start() + 1)
+        return found
+
+    def groups_hit(self, found: dict[str, int] | set[str]) -> list[str]:
+        """Groups (in declaration order) with at least one keyword in `found`."""
+        hit: set[str] = set()
+        for kw in found:
+            hit.update(self._kw_groups.get(kw, ()))
+        return [g for g in self.groups if g in hit]
+
+    def group_hits(self, found: dict[str, int] | set[str], group: str) -> list[str]:
+        """Keywords of `group` present in `found`, in declaration order."""
+        return [kw for kw in self.groups[group] if kw in found]
+
+    def hits_by_group(self, found: dict[str, int] | set[str]) -> dict[str, list[str]]:
+        """Group → keywords present in `found`; only touches the keywords found."""
+        by_group: dict[str, list[str]] = {}
+        for kw in found:
+            for g in self._kw_groups.get(kw, ()):
+                by_group.setdefault(g, []).append(kw)
+        return by_group
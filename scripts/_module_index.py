@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""Index of the modules already generated from EPUBs.
+
+The batch selection scripts used to decide whether a book was done by testing
+every catalog book against every file name in epub-generated/ with prefix and
+substring checks (`slug[:20] in es`, `title_slug in es`): O(books × modules),
+and wrong both ways — "Cosmos" matched any slug containing "cosmos", and a
+book whose title had changed slug form was missed.
+
+ModuleIndex takes each module's title, EPUB path and creator from the
+directory's provenance manifest (_provenance.py), reading a module's header
+(title, `// Source:` EPUB path, `// Author:` line) only when the manifest
+has no line for it, plus the registry imports, and answers lookups from
+dictionaries, in order of confidence:
+
+    source      the book's filepath, normalized (slashes, case, TS escaping)
+    title+creator   normalized title and first creator's surname
+    slug        the file name either generator would give the book
+    title       normalized title, when the module or the book has no creator
+    prefix      one title is the other plus a subtitle, same creator
+    fuzzy       trigram similarity of titles >= FUZZY_MIN, same creator
+
+The first four are exact; prefix and fuzzy matches are reported as such so
+callers can decide whether to trust them. Neither pairs titles whose numbers
+or volume words differ ("Calculus Volume 1" / "Calculus Volume 2", "… Vol.
+II" / "… Vol. I" or no volume at all): those are other books of a series.
+
+Usage:  py -3 scripts/_module_index.py stats
+        py -3 scripts/_module_index.py lookup TITLE [CREATOR] [--filepath PATH]
+"""
+import argparse
+import bisect
+import math
+import re
+import sys
+import unicodedata
+from pathlib import Path
+
+from _provenance import load_manifest
+
+ROOT = Path(__file__).resolve().parent.parent
+EPUB_GENERATED_DIR = ROOT / "src" / "lib" / "modules" / "catalog" / "epub-generated"
+REGISTRY_PATH = ROOT / "src" / "lib" / "modules" / "generated" / "registry.ts"
+
+EXACT_KINDS = ("source", "title+creator", "slug", "title")
+FUZZY_MIN = 0.72
+_HEADER_LINES = 40
+
+_SOURCE_RE = re.compile(r"^// Source: (.*)$")
+_AUTHOR_RE = re.compile(r"^// Author: (.*?)(?:\s+\|\s+Subject:.*)?$")
+_EXPORT_RE = re.compile(r"^export const (\w+)\s*:")
+_TITLE_RE = re.compile(r'^\s*title: "((?:[^"\\]|\\.)*)",')
+_DERIVED_RE = re.compile(r"Derived from '(.*)' by (.*)\.\",?\s*$")
+_REGISTRY_RE = re.compile(r'import \{ (\w+) \} from "@/lib/modules/catalog/epub-generated/([^"]+)"')
+_TS_UNESCAPE_RE = re.compile(r"\\(.)")
+_NUMBER_RE = re.compile(r"^(\d+)(?:st|nd|rd|th)?$")
+_ROMAN = {r: str(i) for i, r in enumerate(
+    "i ii iii iv v vi vii viii ix x xi xii xiii xiv xv xvi xvii xviii xix xx".split(), 1)}
+_VOLUME_WORDS = {"vol": "vol", "vols": "vol", "volume": "vol", "volumes": "vol",
+                 "part": "part", "parts": "part", "pt": "part"}
+
+
+# ── Normalization ───────────────────────────────────────────────────────────
+
+def norm_text(s: str) -> str:
+    """Lowercase, accents folded, punctuation to single spaces."""
+    s = unicodedata.normalize("NFKD", s)
+    s = "".join(c for c in s if not unicodedata.combining(c))
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", s.lower()).split())
+
+
+def first_creator(creator: str) -> str:
+    return re.split(r";|&|\band\b", creator or "")[0].strip()
+
+
+def creator_surname(creator: str) -> str:
+    """Last name of the first creator ("Carl Sagan" and "Sagan, Carl" → "sagan")."""
+    first = first_creator(creator)
+    if "," in first:
+        first = first.split(",")[0]
+    words = [w for w in norm_text(first).split() if len(w) > 1]
+    return words[-1] if words else ""
+
+
+def norm_path(path: str) -> str:
+    """EPUB path as a lookup key: separators, case and doubled backslashes
+    (TS-escaped in generate-modules headers) don't matter."""
+    return re.sub(r"/+", "/", path.strip().replace("\\", "/")).casefold()
+
+
+def candidate_slugs(title: str, creator: str) -> set[str]:
+    """File names the two generators give a book (without .ts)."""
+    first = first_creator(creator)
+    s = re.sub(r"[^a-z0-9]+", "-", f"{title} {first}".lower()).strip("-")
+    slugs = {s[:50].rstrip("-") if len(s) > 50 else s}
+    # generate-modules-from-epubs.py: slug(f"{title}-{creator}"[:80]) or slug(title[:40])
+    s = re.sub(r"[^a-z0-9]+", "-", f"{title}-{creator}"[:80].lower()).strip("-")[:50]
+    slugs.add(s or re.sub(r"[^a-z0-9]+", "-", title[:40].lower()).strip("-")[:50])
+    slugs.discard("")
+    return slugs
+
+
+def volume_tokens(key: str) -> frozenset[str]:
+    """Numbers (1, 2nd, ii) and volume / part words of a normalized title."""
+    tokens = set()
+    for word in key.split():
+        if m := _NUMBER_RE.match(word):
+            tokens.add(str(int(m.group(1))))
+        elif word in _ROMAN:
+            tokens.add(_ROMAN[word])
+        elif word in _VOLUME_WORDS:
+            tokens.add(_VOLUME_WORDS[word])
+    return frozenset(tokens)
+
+
+def trigrams(key: str) -> set[str]:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+# ── Index ───────────────────────────────────────────────────────────────────
+
+class GeneratedModule:
+    """What a module's header says about the book it came from."""
+
+    __slots__ = ("slug", "export_name", "title", "creator", "source", "path", "registered")
+
+    def __init__(self, slug: str, path: Path | None = None):
+        self.slug = slug
+        self.path = path
+        self.export_name = ""
+        self.title = ""
+        self.creator = ""
+        self.source = ""
+        self.registered = False
+
+
+class Match:
+    __slots__ = ("module", "kind", "score")
+
+    def __init__(self, module: GeneratedModule, kind: str, score: float = 1.0):
+        self.module = module
+        self.kind = kind
+        self.score = score
+
+    @property
+    def exact(self) -> bool:
+        return self.kind in EXACT_KINDS
+
+    def __repr__(self) -> str:
+        return f"Match({self.module.slug!r}, {self.kind!r}, {self.score:.2f})"
+
+
+def read_header(path: Path) -> GeneratedModule:
+    """Parse the leading lines of a generated module (both generators' layouts)."""
+    module = GeneratedModule(path.stem, path)
+    description = ""
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for _, line in zip(range(_HEADER_LINES), f):
+            line = line.rstrip("\n")
+            if m := _SOURCE_RE.match(line):
+                module.source = m.group(1).replace("\\\\", "\\")
+            elif m := _AUTHOR_RE.match(line):
+                module.creator = _TS_UNESCAPE_RE.sub(r"\1", m.group(1))
+            elif m := _EXPORT_RE.match(line):
+                module.export_name = m.group(1)
+            elif not module.title and (m := _TITLE_RE.match(line)):
+                module.title = _TS_UNESCAPE_RE.sub(r"\1", m.group(1))
+            elif "Derived from '" in line:
+                description = line
+            elif line.strip().startswith("lessons:"):
+                break
+    if not module.creator and (m := _DERIVED_RE.search(_TS_UNESCAPE_RE.sub(r"\1", description))):
+        module.creator = m.group(2)
+    return module
+
+
+def manifest_module(path: Path, entry: dict) -> GeneratedModule:
+    """A module as its provenance manifest line describes it."""
+    module = GeneratedModule(path.stem, path)
+    module.export_name = entry["export"]
+    module.title = entry["title"]
+    module.creator = entry["creator"]
+    module.source = entry["source"]
+    return module
+
+
+class _Titles:
+    """Normalized titles of a set of modules, for prefix and trigram search."""
+
+    def __init__(self):
+        self.by_key: dict[str, list[GeneratedModule]] = {}
+        self.by_trigram: dict[str, list[str]] = {}
+        self.grams: dict[str, set[str]] = {}
+        self.volumes: dict[str, frozenset[str]] = {}
+        self._sorted: list[str] | None = None
+
+    def add(self, key: str, module: GeneratedModule) -> None:
+        if key not in self.by_key:
+            self.by_key[key] = []
+            self.grams[key] = grams = trigrams(key)
+            self.volumes[key] = volume_tokens(key)
+            for g in grams:
+                self.by_trigram.setdefault(g, []).append(key)
+            self._sorted = None
+        self.by_key[key].append(module)
+
+    def prefix(self, key: str) -> Match | None:
+        # A module title extending the book's ("cosmos" → "cosmos a personal voyage") …
+        if self._sorted is None:
+            self._sorted = sorted(self.by_key)
+        volumes = volume_tokens(key)
+        head = key + " "
+        i = bisect.bisect_left(self._sorted, head)
+        while i < len(self._sorted) and self._sorted[i].startswith(head):
+            longer = self._sorted[i]
+            if self.volumes[longer] == volumes:
+                return Match(self.by_key[longer][0], "prefix", len(key) / len(longer))
+            i += 1
+        # … or the book's title extending a module's, cut at a word boundary.
+        words = key.split()
+        for n in range(len(words) - 1, 0, -1):
+            shorter = " ".join(words[:n])
+            if shorter in self.by_key and self.volumes[shorter] == volumes:
+                return Match(self.by_key[shorter][0], "prefix", n / len(words))
+        return None
+
+    def fuzzy(self, key: str) -> Match | None:
+        grams = trigrams(key)
+        volumes = volume_tokens(key)
+        # Jaccard >= FUZZY_MIN needs at least ceil(FUZZY_MIN·|grams|) shared
+        # trigrams, so a match must hold one of any |grams| - that + 1 of
+        # ours: only the rarest few seed candidates, not " th" and friends.
+        need = len(grams) - math.ceil(FUZZY_MIN * len(grams)) + 1
+        seeds = sorted(grams, key=lambda g: len(self.by_trigram.get(g, ())))[:need]
+        lo, hi = FUZZY_MIN * len(grams), len(grams) / FUZZY_MIN
+        best = None
+        for other in {k for g in seeds for k in self.by_trigram.get(g, ())}:
+            other_grams = self.grams[other]
+            if not lo <= len(other_grams) <= hi or self.volumes[other] != volumes:
+                continue
+            n = len(grams & other_grams)
+            score = n / (len(grams) + len(other_grams) - n)
+            if score >= FUZZY_MIN and (best is None or score > best.score):
+                best = Match(self.by_key[other][0], "fuzzy", score)
+        return best
+
+
+class ModuleIndex:
+    """Generated modules keyed every way a catalog book can be matched."""
+
+    def __init__(self, modules: list[GeneratedModule]):
+        self.modules = {m.slug: m for m in modules}
+        self.by_source: dict[str, GeneratedModule] = {}
+        self.by_title_creator: dict[tuple[str, str], GeneratedModule] = {}
+        self.by_title: dict[str, list[GeneratedModule]] = {}
+        # Title sets for the inexact lookups: every titled module, each
+        # creator's, and those with no creator (which any creator may match).
+        self._titles = _Titles()
+        self._titles_by_surname: dict[str, _Titles] = {}
+        self._titles_anonymous = _Titles()
+        for m in modules:
+            if m.source:
+                self.by_source.setdefault(norm_path(m.source), m)
+            if not m.title:
+                continue
+            key = norm_text(m.title)
+            self.by_title.setdefault(key, []).append(m)
+            self._titles.add(key, m)
+            if m.creator:
+                surname = creator_surname(m.creator)
+                self.by_title_creator.setdefault((key, surname), m)
+                self._titles_by_surname.setdefault(surname, _Titles()).add(key, m)
+            else:
+                self._titles_anonymous.add(key, m)
+
+    @classmethod
+    def build(cls, directory: str | Path = EPUB_GENERATED_DIR,
+              registry: str | Path | None = REGISTRY_PATH) -> "ModuleIndex":
+        """Index every .ts file in `directory`, flagging those the registry imports.
+
+        Modules recorded in the directory's provenance manifest are indexed
+        from it; the others from their headers.
+        """
+        directory = Path(directory)
+        manifest = load_manifest(directory)
+        modules = {}
+        for p in sorted(directory.glob("*.ts")) if directory.is_dir() else ():
+            entry = manifest.get(p.stem)
+            modules[p.stem] = manifest_module(p, entry) if entry else read_header(p)
+        if registry is not None and Path(registry).exists():
+            text = Path(registry).read_text(encoding="utf-8", errors="replace")
+            for export_name, slug in _REGISTRY_RE.findall(text):
+                module = modules.get(slug)
+                if module is None:                   # registered, but the file is gone
+                    module = modules[slug] = GeneratedModule(slug)
+                    module.export_name = export_name
+                module.registered = True
+        return cls(list(modules.values()))
+
+    def __len__(self) -> int:
+        return len(self.modules)
+
+    def __contains__(self, slug: str) -> bool:
+        return slug in self.modules
+
+    # ── Lookup ──────────────────────────────────────────────────────────────
+    def lookup(self, title: str, creator: str = "", filepath: str = "",
+               fuzzy: bool = True) -> Match | None:
+        """Best match for a catalog book, or None if it has no module yet."""
+        if filepath and (m := self.by_source.get(norm_path(filepath))):
+            return Match(m, "source")
+        key = norm_text(title)
+        surname = creator_surname(creator)
+        if key and (m := self.by_title_creator.get((key, surname))):
+            return Match(m, "title+creator")
+        for s in sorted(candidate_slugs(title, creator)):
+            if s in self.modules:
+                return Match(self.modules[s], "slug")
+        if not key:
+            return None
+        for m in self.by_title.get(key, ()):
+            if not m.creator or not surname:
+                return Match(m, "title")
+        if not fuzzy:
+            return None
+        # Inexact matches must agree on the creator when both sides name one.
+        if surname:
+            title_sets = [t for t in (self._titles_by_surname.get(surname), self._titles_anonymous) if t]
+        else:
+            title_sets = [self._titles]
+        for search in (_Titles.prefix, _Titles.fuzzy):
+            found = [m for t in title_sets if (m := search(t, key))]
+            if found:
+                return max(found, key=lambda m: m.score)
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Look up books among the generated EPUB modules.")
+    parser.add_argument("--dir", default=str(EPUB_GENERATED_DIR))
+    parser.add_argument("--registry", default=str(REGISTRY_PATH))
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="What the index holds.")
+    p_look = sub.add_parser("lookup", help="Find the module generated for a book.")
+    p_look.add_argument("title")
+    p_look.add_argument("creator", nargs="?", default="")
+    p_look.add_argument("--filepath", default="")
+    args = parser.parse_args()
+
+    index = ModuleIndex.build(args.dir, args.registry)
+    if args.command == "stats":
+        mods = index.modules.values()
+        print(f"{len(index)} modules in {args.dir}")
+        print(f"  with source path:   {sum(1 for m in mods if m.source)}")
+        print(f"  with creator:       {sum(1 for m in mods if m.creator)}")
+        print(f"  registered:         {sum(1 for m in mods if m.registered)}")
+        print(f"  registry, no file:  {sum(1 for m in mods if m.path is None)}")
+        print(f"  files, unregistered: {sum(1 for m in mods if m.path and not m.registered)}")
+    elif args.command == "lookup":
+        match = index.lookup(args.title, args.creator, args.filepath)
+        if match is None:
+            print("no module"); sys.exit(1)
+        m = match.module
+        print(f"{match.kind} ({match.score:.2f}): {m.slug}  [{m.export_name}]")
+        print(f"  title:   {m.title}\n  creator: {m.creator}\n  source:  {m.source}")
+
+
+if __name__ == "__main__":
+    main()
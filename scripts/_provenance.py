@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""Provenance manifest of generated modules.
+
+Every generator appends one line per module it writes to
+`provenance.ndjson` in its output directory:
+
+    {"slug": ..., "export": ..., "title": ..., "creator": ..., "source": <EPUB path>,
+     "fingerprint": <book content fingerprint or null>,
+     "generator": "generate-modules-from-epubs.py", "generator_version": 1,
+     "lessons": 7, "lesson_types": {"video": 5, "quiz": 2},
+     "chunks": 15, "fallback_chunks": 0, "padded_chunks": 3,
+     "flashcards": 20, "questions": 10, "fallback_questions": 0,
+     "sha256": <of the module text, UTF-8 with \\n line ends>, "chars": 48210,
+     "generated": "2026-10-18T09:30:00Z"}
+
+The file is append-only; a module regenerated later gets a newer line, and
+readers keep the last line per slug. Selection, audit and registry scripts
+read it (through load_manifest) instead of re-deriving each module's source
+and stats from its .ts file; `compact` drops superseded lines.
+
+Usage:  py -3 scripts/_provenance.py [--dir DIR] summary
+        py -3 scripts/_provenance.py [--dir DIR] verify
+        py -3 scripts/_provenance.py [--dir DIR] compact
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+from _ts_emitter import TsEmitter
+
+MANIFEST_NAME = "provenance.ndjson"
+LESSON_TYPES = ("video", "quiz")
+# Counted by the generators themselves (w.counts[...] += 1); 0 when unused.
+CONTENT_STATS = ("fallback_chunks", "padded_chunks", "fallback_questions")
+
+
+def manifest_path(out_dir: str | Path) -> Path:
+    return Path(out_dir) / MANIFEST_NAME
+
+
+def module_entry(w: TsEmitter, *, slug: str, export_name: str, title: str, creator: str,
+                 source: str, fingerprint: str | None, generator: str,
+                 generator_version: int) -> dict:
+    """A manifest line for the module `w` has just written."""
+    lesson_types = {t: w.counts[t] for t in LESSON_TYPES if w.counts[t]}
+    return {
+        "slug":              slug,
+        "export":            export_name,
+        "title":             title,
+        "creator":           creator,
+        "source":            source,
+        "fingerprint":       fingerprint,
+        "generator":         generator,
+        "generator_version": generator_version,
+        "lessons":           sum(lesson_types.values()),
+        "lesson_types":      lesson_types,
+        "chunks":            w.counts["chunks"],
+        "flashcards":        w.counts["flashcards"],
+        "questions":         w.counts["questions"],
+        **{k: w.counts[k] for k in CONTENT_STATS},
+        "sha256":            w.sha256.hexdigest(),
+        "chars":             w.chars,
+        "generated":         time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+
+
+def append_entries(out_dir: str | Path, entries: list[dict]) -> None:
+    """Append entries to the directory's manifest in one write."""
+    if not entries:
+        return
+    data = "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in entries)
+    with open(manifest_path(out_dir), "a", encoding="utf-8") as f:
+        f.write(data)
+
+
+def load_manifest(out_dir: str | Path) -> dict[str, dict]:
+    """The latest entry per slug ({} when there is no manifest)."""
+    entries: dict[str, dict] = {}
+    try:
+        f = open(manifest_path(out_dir), encoding="utf-8")
+    except FileNotFoundError:
+        return entries
+    with f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:            # a line cut short by an interrupted run
+                continue
+            entries.pop(entry["slug"], None)        # keep file order = latest order
+            entries[entry["slug"]] = entry
+    return entries
+
+
+def text_sha256(path: str | Path) -> str:
+    """Hash a module file the way the writers do (UTF-8 text, \\n line ends)."""
+    with open(path, encoding="utf-8", newline=None) as f:
+        return hashlib.sha256(f.read().encode("utf-8")).hexdigest()
+
+
+def main():
+    from _module_index import EPUB_GENERATED_DIR
+
+    parser = argparse.ArgumentParser(description="Inspect the generated-module provenance manifest.")
+    parser.add_argument("--dir", default=str(EPUB_GENERATED_DIR), help="Module output directory.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("summary", help="Modules per generator with their content stats.")
+    sub.add_parser("verify", help="Compare the manifest against the .ts files on disk.")
+    sub.add_parser("compact", help="Rewrite the manifest with only the latest line per module.")
+    args = parser.parse_args()
+
+    entries = load_manifest(args.dir)
+    if args.command == "summary":
+        print(f"{manifest_path(args.dir)}: {len(entries)} modules")
+        groups: dict[tuple, list[dict]] = {}
+        for e in entries.values():
+            groups.setdefault((e["generator"], e["generator_version"]), []).append(e)
+        for (generator, version), group in sorted(groups.items()):
+            t = {k: sum(e.get(k, 0) for e in group)
+                 for k in ("lessons", "chunks", "questions") + CONTENT_STATS}
+            print(f"  {generator} v{version}: {len(group)} modules, {t['lessons']} lessons, "
+                  f"{t['chunks']} chunks ({t['fallback_chunks']} fallback, "
+                  f"{t['padded_chunks']} padded), {t['questions']} questions "
+                  f"({t['fallback_questions']} fallback)")
+    elif args.command == "verify":
+        on_disk = {p.stem: p for p in Path(args.dir).glob("*.ts")}
+        changed = [s for s, e in entries.items() if s in on_disk and text_sha256(on_disk[s]) != e["sha256"]]
+        missing = [s for s in entries if s not in on_disk]
+        unrecorded = [s for s in on_disk if s not in entries]
+        for label, slugs in (("edited since generation", changed), ("recorded but missing", missing),
+                             ("not in the manifest", unrecorded)):
+            print(f"{len(slugs):5d} {label}")
+            for s in sorted(slugs)[:20]:
+                print(f"        {s}")
+        sys.exit(1 if changed or missing else 0)
+    elif args.command == "compact":
+        path = manifest_path(args.dir)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            for e in entries.values():
+                f.write(json.dumps(e, ensure_ascii=False) + "\n")
+        os.replace(tmp, path)
+        print(f"{path}: {len(entries)} entries")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Academic scoring profiles for catalog-analyze.py.
+
+academic_score() used to hard-code its weights (+5 per academic signal, −4
+per fiction signal, +15 per academic publisher, +5 for English). A profile
+names a set of weights instead. Profiles are read from
+scripts/scoring-profiles.json, one object per profile:
+
+    "curriculum": {
+      "description": "…",
+      "base": 50, "min": 0, "max": 100,
+      "groups":     {"academic": 5, "fiction": -4, "publisher": 15},
+      "terms":      {"sat": 0, "calculus": 5},
+      "publishers": {"penguin": -10},
+      "english":    5,
+      "repeats":    false
+    }
+
+  * groups      weight of each signal in catalog-analyze.py's lists;
+  * terms       per-term weights for the title/description/subjects text,
+                replacing the term's group weight; a term on none of the
+                lists becomes a new signal;
+  * publishers  the same for terms matched in the publisher field only;
+  * english     bonus for English (or unspecified) language;
+  * repeats     false counts each signal once per book (as academic_score
+                always has), true counts every occurrence.
+
+Keys a profile leaves out take the built-in default's value, so a profile
+only states what it changes. "default" is always defined; the file may
+override it.
+"""
+
+import json
+from pathlib import Path
+
+PROFILES_PATH = Path(__file__).parent / "scoring-profiles.json"
+DEFAULT_NAME = "default"
+
+# The weights academic_score() has always used
+DEFAULT_SPEC = {
+    "description": "Original weights.",
+    "base": 50.0,
+    "min": 0,
+    "max": 100,
+    "groups": {"academic": 5, "fiction": -4, "publisher": 15},
+    "terms": {},
+    "publishers": {},
+    "english": 5,
+    "repeats": False,
+}
+
+
+class ScoringProfile:
+    """One named set of scoring weights; see the module docstring."""
+
+    __slots__ = ("name", "description", "base", "min", "max", "groups", "terms",
+                 "publishers", "english", "repeats")
+
+    def __init__(self, name: str, spec: dict):
+        unknown = set(spec) - set(DEFAULT_SPEC)
+        if unknown:
+            raise ValueError(f"profile {name!r}: unknown keys {sorted(unknown)}")
+        spec = {**DEFAULT_SPEC, **spec}
+        self.name = name
+        self.description = str(spec["description"])
+        # Kept a float so unclamped scores stay floats whatever the file says
+        self.base = float(spec["base"])
+        self.min = spec["min"]
+        self.max = spec["max"]
+        self.groups = {**DEFAULT_SPEC["groups"], **spec["groups"]}
+        self.terms = {t.lower(): w for t, w in spec["terms"].items()}
+        self.publishers = {t.lower(): w for t, w in spec["publishers"].items()}
+        self.english = spec["english"]
+        self.repeats = bool(spec["repeats"])
+        for label, weights in (("groups", self.groups), ("terms", self.terms),
+                               ("publishers", self.publishers),
+                               ("english/min/max", {"english": self.english, "min": self.min,
+                                                    "max": self.max})):
+            bad = [k for k, w in weights.items()
+                   if isinstance(w, bool) or not isinstance(w, (int, float))]
+            if bad:
+                raise ValueError(f"profile {name!r}: non-numeric {label} {bad}")
+        if any(not t for t in (*self.terms, *self.publishers)):
+            raise ValueError(f"profile {name!r}: empty term")
+        if self.min > self.max:
+            raise ValueError(f"profile {name!r}: min > max")
+
+    def term_weight(self, term: str, groups: tuple[str, ...]) -> float:
+        """Weight of a text signal that belongs to `groups`."""
+        if term in self.terms:
+            return self.terms[term]
+        return sum(self.groups.get(g, 0) for g in groups)
+
+    def publisher_weight(self, term: str, listed: bool) -> float:
+        """Weight of a publisher-field term (`listed`: on the publisher list)."""
+        if term in self.publishers:
+            return self.publishers[term]
+        return self.groups.get("publisher", 0) if listed else 0
+
+    def clamp(self, score: float) -> float:
+        return max(self.min, min(self.max, score))
+
+
+DEFAULT_PROFILE = ScoringProfile(DEFAULT_NAME, {})
+
+
+def load_profiles(path: str | Path = PROFILES_PATH) -> dict[str, ScoringProfile]:
+    """Every profile in the file, by name, with "default" first.
+
+    A missing file gives just the built-in default; a malformed one raises
+    ValueError.
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            specs = json.load(f)
+    except FileNotFoundError:
+        specs = {}
+    if not isinstance(specs, dict) or not all(isinstance(s, dict) for s in specs.values()):
+        raise ValueError(f"{path}: expected an object of profile objects")
+    profiles = {DEFAULT_NAME: ScoringProfile(DEFAULT_NAME, specs.get(DEFAULT_NAME, {}))}
+    for name, spec in specs.items():
+        if name != DEFAULT_NAME:
+            profiles[name] = ScoringProfile(name, spec)
+    return profiles
@@ -1,15 +1,15 @@
-import json, os, re
+import json
+from collections import Counter
+
+from _module_index import ModuleIndex
 
 with open('scripts/epub-educational-picks.json', encoding='utf-8') as f:
     data = json.load(f)
 
-# Get all existing module filenames (without .ts)
-existing = set()
-for fn in os.listdir('src/lib/modules/catalog/epub-generated'):
-    if fn.endswith('.ts'):
-        existing.add(fn[:-3])
+# Index the existing modules (source path, title + creator, slug) once
+index = ModuleIndex.build()
 
-print(f"Existing modules: {len(existing)}")
+print(f"Existing modules: {len(index)}")
 
 # Collect all books
 all_books = []
@@ -25,33 +25,31 @@ for cat, books in data.items():
 
 all_books.sort(key=lambda x: -x['score'])
 
-# Check which are already done
-def title_to_slug(title, creator):
-    raw = (title + ' ' + creator).lower()
-    slug = re.sub(r'[^a-z0-9]+', '-', raw).strip('-')
-    return slug[:50]
-
+# Check which are already done: only exact matches count; prefix / fuzzy
+# ones (a subtitle, another volume of a series …) are listed for review
 available = []
+review = []
+matched = Counter()
 for b in all_books:
-    slug = title_to_slug(b['title'], b['creator'])
-    is_done = False
-    for es in existing:
-        # Match on first 20 chars of slug
-        if slug[:20] == es[:20]:
-            is_done = True
-            break
-        # Also try title-only match
-        title_slug = re.sub(r'[^a-z0-9]+', '-', b['title'].lower()).strip('-')[:25]
-        if title_slug in es:
-            is_done = True
-            break
-    if not is_done:
+    match = index.lookup(b['title'], b['creator'], b['filepath'])
+    if match and match.exact:
+        matched[match.kind] += 1
+    else:
         available.append(b)
+        if match:
+            review.append((b, match))
 
 print(f"Total in catalog: {len(all_books)}")
-print(f"Available (not yet done): {len(available)}")
+print(f"Already done: {sum(matched.values())}  ({', '.join(f'{k} {n}' for k, n in matched.most_common())})")
+print(f"Available (not yet done): {len(available)}  ({len(review)} with an inexact match to review)")
 print()
 
+if review:
+    print("=== INEXACT MATCHES (check before selecting) ===")
+    for b, match in review:
+        print(f"  [{match.kind} {match.score:.2f}] {b['title'][:55]:55s} | {b['creator'][:25]:25s} -> {match.module.slug}")
+    print()
+
 # Filter for practical/educational content - skip pure fiction, poetry, travel guides
 skip_categories = set()  # We'll include all and pick manually
 # Prefer score >= 70
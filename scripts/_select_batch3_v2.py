@@ -1,12 +1,11 @@
-import json, os, re
+import json
+
+from _module_index import ModuleIndex
 
 with open('scripts/epub-educational-picks.json', encoding='utf-8') as f:
     data = json.load(f)
 
-existing = set()
-for fn in os.listdir('src/lib/modules/catalog/epub-generated'):
-    if fn.endswith('.ts'):
-        existing.add(fn[:-3])
+index = ModuleIndex.build()
 
 # De-duplicate by filepath, keep highest score and all categories
 by_path = {}
@@ -31,19 +30,23 @@ for cat, books in data.items():
 all_unique = list(by_path.values())
 all_unique.sort(key=lambda x: -x['score'])
 
-# Check which are already done
-def is_done(book):
-    title_slug = re.sub(r'[^a-z0-9]+', '-', book['title'].lower()).strip('-')
-    for es in existing:
-        if title_slug[:20] in es or es[:20] in title_slug[:25]:
-            return True
-    return False
-
-available = [b for b in all_unique if not is_done(b)]
+# Check which are already done: only exact matches count; prefix / fuzzy
+# ones (a subtitle, another volume of a series …) are listed for review
+available = []
+review = []
+for b in all_unique:
+    match = index.lookup(b['title'], b['creator'], b['filepath'])
+    if match and match.exact:
+        continue
+    available.append(b)
+    if match:
+        review.append((b, match))
 
 print(f"Unique books in catalog: {len(all_unique)}")
 print(f"Already processed: {len(all_unique) - len(available)}")
-print(f"Available: {len(available)}")
+print(f"Available: {len(available)}  ({len(review)} with an inexact match to review)")
+for b, match in review:
+    print(f"  [{match.kind} {match.score:.2f}] {b['title'][:55]:55s} | {b['creator'][:30]:30s} -> {match.module.slug}")
 
 # Classify as educational/practical
 def is_educational(b):
@@ -0,0 +1,266 @@
+"""Streaming writers for generated LearningModule TypeScript sources.
+
+generate_ts (_b3_core.py), build_module (_gen_batch3_auto.py) and
+build_module_ts (generate-modules-from-epubs.py) used to build each module as
+a list of lines or one big f-string, join it and write it in one go —
+build_module_ts also round-tripping its questions through
+json.dumps(indent=8) and a string replace. The writers here emit the same
+bytes piece by piece into an open text file instead, escaping every field
+exactly once as it is written:
+
+  * CurriculumWriter — the batch 3 layout (video lessons with chunks and
+    flashcards, quiz lessons with lettered options);
+  * QuizModuleWriter — the generate-modules layout (one video lesson per
+    chapter with JSON-style question objects).
+
+Each element (header, lesson banner, chunk, question …) is formatted as one
+block, staged in a short list and handed to the file every FLUSH_PIECES
+blocks, so memory stays flat however many lessons a module has and the file
+sees a few large writes rather than one per line. Along the way a writer
+counts lessons (per type), chunks, flashcards and questions and hashes the
+text, for the provenance manifest (_provenance.py).
+"""
+
+import hashlib
+import json
+from collections import Counter
+from typing import Callable, Iterable, TextIO
+
+FLUSH_PIECES = 64
+BANNER_RULE = "─" * 49
+TYPES_IMPORT = 'import type { LearningModule } from "@/lib/modules/types";'
+
+_json_str = json.encoder.encode_basestring          # json.dumps(s, ensure_ascii=False)
+
+
+class TsEmitter:
+    """Buffered block writer; counts and hashes what it writes."""
+
+    def __init__(self, f: TextIO, escape: Callable[[str], str]):
+        self.f = f
+        self.escape = escape
+        self.chars = 0
+        self.newlines = 0
+        self.counts: Counter = Counter()
+        self.sha256 = hashlib.sha256()        # of the text as UTF-8 with \n line ends
+        self._out: list[str] = []
+
+    def write(self, s: str) -> None:
+        self._out.append(s)
+        if len(self._out) >= FLUSH_PIECES:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._out:
+            block = "".join(self._out)
+            self._out.clear()
+            self.f.write(block)
+            self.sha256.update(block.encode("utf-8"))
+            self.chars += len(block)
+            self.newlines += block.count("\n")
+
+    @property
+    def lines(self) -> int:
+        """Line count as the old ``content.count('\\n') + 1`` reported it."""
+        return self.newlines + 1
+
+
+class CurriculumWriter(TsEmitter):
+    """The batch 3 curriculum module layout.
+
+    `spaced_lessons` puts a blank line before each lesson banner and
+    `escape_banners` escapes the title in it (_b3_core.py writes both the
+    other way round from _gen_batch3_auto.py).
+    """
+
+    def __init__(self, f: TextIO, escape: Callable[[str], str],
+                 spaced_lessons: bool = False, escape_banners: bool = True):
+        super().__init__(f, escape)
+        self.spaced_lessons = spaced_lessons
+        self.escape_banners = escape_banners
+
+    def open_module(self, *, comments: Iterable[str], export_name: str, slug: str, title: str,
+                    description: str, subject: str, tags: Iterable[str],
+                    objectives: Iterable[str], min_age: int = 18, max_age: int = 99,
+                    version: str = "2.0.0") -> None:
+        esc = self.escape
+        comments_s = "".join(f"// {c}\n" for c in comments)
+        tags_s = ", ".join(f'"{t}"' for t in tags)
+        objectives_s = "".join(f'    "{esc(o)}",\n' for o in objectives)
+        self.write(
+            f"{TYPES_IMPORT}\n"
+            f"\n"
+            f"{comments_s}"
+            f"\n"
+            f"export const {export_name}: LearningModule = {{\n"
+            f'  id: "{slug}",\n'
+            f'  title: "{esc(title)}",\n'
+            f"  description:\n"
+            f'    "{esc(description)}",\n'
+            f'  subject: "{esc(subject)}",\n'
+            f"  tags: [{tags_s}],\n"
+            f"  minAge: {min_age},\n"
+            f"  maxAge: {max_age},\n"
+            f'  moduleVersion: "{version}",\n'
+            f'  version: "{version}",\n'
+            f"  learningObjectives: [\n"
+            f"{objectives_s}"
+            f"  ],\n"
+            f"  lessons: [\n")
+
+    def open_lesson(self, lesson_id: str, number: int, title: str, type: str, duration: int) -> None:
+        escaped = self.escape(title)
+        self.counts[type] += 1
+        gap = "\n" if self.spaced_lessons else ""
+        self.write(
+            f"{gap}"
+            f"    /* {BANNER_RULE}\n"
+            f"       L{number:02d}  {escaped if self.escape_banners else title}\n"
+            f"    {BANNER_RULE} */\n"
+            f"    {{\n"
+            f'      id: "{lesson_id}",\n'
+            f'      title: "{escaped}",\n'
+            f'      type: "{type}",\n'
+            f"      duration: {duration},\n")
+
+    def objectives(self, items: Iterable[str], inline: bool = False) -> None:
+        esc = self.escape
+        if inline:
+            items_s = ", ".join(f'"{esc(o)}"' for o in items)
+            self.write(f"      objectives: [{items_s}],\n")
+        else:
+            items_s = "".join(f'        "{esc(o)}",\n' for o in items)
+            self.write(f"      objectives: [\n{items_s}      ],\n")
+
+    def open_list(self, name: str) -> None:
+        self.write(f"      {name}: [\n")
+
+    def close_list(self) -> None:
+        self.write("      ],\n")
+
+    def chunk(self, chunk_id: str, title: str, content: str) -> None:
+        self.counts["chunks"] += 1
+        self.write(
+            f"        {{\n"
+            f'          id: "{chunk_id}",\n'
+            f'          title: "{self.escape(title)}",\n'
+            f"          content:\n"
+            f'            "{self.escape(content)}",\n'
+            f"        }},\n")
+
+    def flashcard(self, card_id: str, front: str, back: str) -> None:
+        self.counts["flashcards"] += 1
+        self.write(
+            f"        {{\n"
+            f'          id: "{card_id}",\n'
+            f'          front: "{self.escape(front)}",\n'
+            f"          back:\n"
+            f'            "{self.escape(back)}",\n'
+            f"        }},\n")
+
+    def question(self, question_id: str, text: str, options: Iterable[tuple[str, str]],
+                 correct: str, explanation: str) -> None:
+        """A lettered multiple-choice question; options are (id, text) pairs."""
+        esc = self.escape
+        self.counts["questions"] += 1
+        options_s = "".join(f'            {{ id: "{oid}", text: "{esc(ot)}" }},\n'
+                            for oid, ot in options)
+        self.write(
+            f"        {{\n"
+            f'          id: "{question_id}",\n'
+            f'          text: "{esc(text)}",\n'
+            f"          options: [\n"
+            f"{options_s}"
+            f"          ],\n"
+            f'          correctOptionId: "{correct}",\n'
+            f"          explanation:\n"
+            f'            "{esc(explanation)}",\n'
+            f"        }},\n")
+
+    def close_lesson(self) -> None:
+        self.write("    },\n")
+
+    def close_module(self) -> None:
+        self.write("  ],\n};\n")
+        self.flush()
+
+
+class QuizModuleWriter(TsEmitter):
+    """The generate-modules-from-epubs.py layout.
+
+    Question objects are written as json.dumps(questions, indent=8) would
+    print them, shifted right by six spaces to sit under `questions:`.
+    """
+
+    QUESTION_MARGIN = "      "
+    JSON_INDENT = " " * 8
+
+    def __init__(self, f: TextIO, escape: Callable[[str], str]):
+        super().__init__(f, escape)
+        self._lessons = 0
+
+    def open_module(self, *, source: str, generator: str, export_name: str, module_id: str,
+                    title: str, description: str, subject: str) -> None:
+        """Header through `lessons: [`; title is written into an objective
+        as well, so it is escaped once here for both."""
+        esc = self.escape
+        title = esc(title)
+        self.write(
+            f"{TYPES_IMPORT}\n"
+            f"\n"
+            f"// Auto-generated from EPUB library.\n"
+            f"// Source: {esc(source)}\n"
+            f"// Generator: {generator}\n"
+            f"\n"
+            f"export const {export_name}: LearningModule = {{\n"
+            f'  id: "{module_id}",\n'
+            f'  title: "{title}",\n'
+            f'  description: "{esc(description)}",\n'
+            f'  subject: "{subject}",\n'
+            f'  tags: ["epub-derived", "curriculum", "interactive"],\n'
+            f"  minAge: 10,\n"
+            f"  maxAge: 18,\n"
+            f'  moduleVersion: "1.0.0",\n'
+            f'  version: "1.0.0",\n'
+            f"  learningObjectives: [\n"
+            f'    "Understand foundational concepts presented in \\"{title}\\"",\n'
+            f'    "Apply key ideas through chapter-based guided practice",\n'
+            f'    "Demonstrate recall with curriculum-aligned quiz questions",\n'
+            f"  ],\n"
+            f"  lessons: [\n")
+
+    def lesson(self, lesson_id: str, title: str, questions: list[dict]) -> None:
+        self.counts["video"] += 1
+        self.counts["questions"] += len(questions)
+        sep = ",\n" if self._lessons else ""
+        self.write(
+            f"{sep}"
+            f"    {{\n"
+            f'      id: "{lesson_id}",\n'
+            f'      title: "{self.escape(title)}",\n'
+            f'      type: "video",\n'
+            f"      duration: 10,\n"
+            f"      questions: {self._json(questions, self.QUESTION_MARGIN)},\n"
+            f"    }}")
+        self._lessons += 1
+
+    def _json(self, value, margin: str) -> str:
+        """`value` as json.dumps(indent=8, ensure_ascii=False) lays it out,
+        with `margin` before every line after the first."""
+        if isinstance(value, str):
+            return _json_str(value)
+        if isinstance(value, dict) and value:
+            inner = margin + self.JSON_INDENT
+            sep = ",\n" + inner
+            items = sep.join(f"{_json_str(k)}: {self._json(v, inner)}" for k, v in value.items())
+            return f"{{\n{inner}{items}\n{margin}}}"
+        if isinstance(value, list) and value:
+            inner = margin + self.JSON_INDENT
+            sep = ",\n" + inner
+            items = sep.join(self._json(v, inner) for v in value)
+            return f"[\n{inner}{items}\n{margin}]"
+        return json.dumps(value, ensure_ascii=False)
+
+    def close_module(self) -> None:
+        self.write("\n  ],\n};\n")
+        self.flush()
@@ -0,0 +1,240 @@
+"""Tolerant reader for generated LearningModule TypeScript sources.
+
+The counterpart of _ts_emitter.py: it turns a module file back into Python
+values without a JavaScript toolchain. It is not a TypeScript parser. It
+knows the subset the generators (and hand edits of their output) produce:
+
+  * `export const Name: Type = <value>;` at the top level, everything else
+    (imports, comments, banners) skipped;
+  * object literals with bare, quoted or numeric keys, arrays, and trailing
+    commas;
+  * "…", '…' and `…` strings with JS escapes, joined by `+`, plus numbers
+    and true / false / null / undefined.
+
+Damage is recorded rather than raised. An unterminated string runs to the
+end of its line, an unknown token is skipped, and a missing bracket closes
+the value at end of file. Each problem is kept in `TsModule.errors` as
+(line, message), so an audit can report a broken module and still read the
+rest of it.
+
+    module = read_module(path)
+    module.export_name, module.value["lessons"][0]["chunks"], module.errors
+"""
+
+import re
+from pathlib import Path
+
+_TOKEN_RE = re.compile(r"""
+    (?P<skip>\s+|//[^\n]*|/\*.*?(?:\*/|\Z))
+  | (?P<str>"[^"\\\n]*(?:\\.[^"\\\n]*)*"
+          | '[^'\\\n]*(?:\\.[^'\\\n]*)*'
+          | `[^`\\]*(?:\\.[^`\\]*)*`)
+  | (?P<num>-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)
+  | (?P<name>[A-Za-z_$][\w$]*)
+  | (?P<punct>\.\.\.|[{}\[\]():,;=+<>.?|&!*/-])
+  | (?P<open>["'][^\n]*)
+  | (?P<bad>.)
+""", re.S | re.X)
+
+_ESCAPE_RE = re.compile(r"\\(u[dD][89abAB][0-9a-fA-F]{2}\\u[dD][c-fC-F][0-9a-fA-F]{2}"
+                        r"|u\{[0-9a-fA-F]+\}|u[0-9a-fA-F]{4}|x[0-9a-fA-F]{2}|\n|.)", re.S)
+_SIMPLE_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f", "v": "\v",
+                   "0": "\0", "\n": ""}
+_LITERALS = {"true": True, "false": False, "null": None, "undefined": None}
+_CLOSERS = {"{": "}", "[": "]", "(": ")"}
+_EOF = ("eof", "", -1)
+
+
+def _unescape(m: re.Match) -> str:
+    s = m.group(1)
+    if s[0] == "u" and len(s) == 11:                   # surrogate pair
+        hi, lo = int(s[1:5], 16), int(s[7:11], 16)
+        return chr(0x10000 + ((hi - 0xD800) << 10) + (lo - 0xDC00))
+    if s[0] == "u" and len(s) > 1:
+        return chr(int(s[2:-1] if s[1] == "{" else s[1:], 16))
+    if s[0] == "x" and len(s) == 3:
+        return chr(int(s[1:], 16))
+    return _SIMPLE_ESCAPES.get(s, s)
+
+
+def decode_string(token: str) -> str:
+    """The value of a quoted string token (quotes included; the closing quote
+    may be missing)."""
+    body = token[1:-1] if len(token) > 1 and token[-1] == token[0] else token[1:]
+    return _ESCAPE_RE.sub(_unescape, body) if "\\" in body else body
+
+
+class TsModule:
+    """One `export const` of a module file: its name, value and read errors."""
+
+    __slots__ = ("export_name", "value", "errors")
+
+    def __init__(self, export_name: str, value, errors: list[tuple[int, str]]):
+        self.export_name = export_name
+        self.value = value
+        self.errors = errors
+
+
+class _Reader:
+    def __init__(self, text: str):
+        self.text = text
+        self.errors: list[tuple[int, str]] = []
+        self.toks: list[tuple[str, str, int]] = []
+        for m in _TOKEN_RE.finditer(text):
+            kind = m.lastgroup
+            if kind == "skip":
+                continue
+            if kind == "open":
+                self.error("unterminated string", m.start())
+                kind = "str"
+            elif kind == "bad":
+                self.error(f"unexpected character {m.group()!r}", m.start())
+                continue
+            self.toks.append((kind, m.group(), m.start()))
+        self.i = 0
+
+    def error(self, message: str, pos: int) -> None:
+        line = self.text.count("\n", 0, pos) + 1 if pos >= 0 else self.text.count("\n") + 1
+        self.errors.append((line, message))
+
+    def peek(self) -> tuple[str, str, int]:
+        return self.toks[self.i] if self.i < len(self.toks) else _EOF
+
+    def take(self) -> tuple[str, str, int]:
+        tok = self.peek()
+        self.i += 1
+        return tok
+
+    def skip_to(self, stops: str) -> None:
+        """Skip the rest of a value (`as const`, a call …) up to a stop token
+        at this nesting level, reporting what was skipped."""
+        start = self.peek()
+        depth = 0
+        while (tok := self.peek()) is not _EOF:
+            text = tok[1]
+            if depth == 0 and text in stops:
+                break
+            if text in _CLOSERS:
+                depth += 1
+            elif text in "}])" and tok[0] == "punct":
+                if depth == 0:
+                    break
+                depth -= 1
+            self.i += 1
+        if self.peek() is not start:
+            self.error(f"skipped {start[1]!r}…", start[2])
+
+    def value(self):
+        kind, text, pos = self.take()
+        if kind == "str":
+            parts = [decode_string(text)]
+            while self.peek()[1] == "+" and self.i + 1 < len(self.toks) and self.toks[self.i + 1][0] == "str":
+                parts.append(decode_string(self.toks[self.i + 1][1]))
+                self.i += 2
+            return "".join(parts)
+        if kind == "num":
+            return float(text) if "." in text or "e" in text.lower() else int(text)
+        if kind == "name":
+            if text in _LITERALS:
+                return _LITERALS[text]
+            self.error(f"unsupported value {text!r}", pos)
+            return None
+        if text == "{":
+            return self.object(pos)
+        if text == "[":
+            return self.array(pos)
+        self.error("missing value" if kind == "eof" else f"unexpected {text!r}", pos)
+        if text in "}]),;":
+            self.i -= 1                         # leave the closer to its container
+        return None
+
+    def object(self, open_pos: int) -> dict:
+        out: dict = {}
+        while True:
+            kind, text, pos = self.peek()
+            if kind == "eof":
+                self.error("unclosed object", open_pos)
+                return out
+            if text == "}":
+                self.i += 1
+                return out
+            if text in "])" and kind == "punct":
+                self.error(f"object closed by {text!r}", pos)
+                return out
+            if text == ",":
+                self.i += 1
+                continue
+            if kind in ("name", "str", "num"):
+                self.i += 1
+                key = decode_string(text) if kind == "str" else text
+                if self.peek()[1] == ":":
+                    self.i += 1
+                    out[key] = self.value()
+                    self.skip_to(",}")
+                else:                           # shorthand `{ key }`
+                    out[key] = None
+                    self.skip_to(",}")
+            else:
+                self.error(f"unexpected {text!r} in object", pos)
+                self.i += 1
+
+    def array(self, open_pos: int) -> list:
+        out: list = []
+        while True:
+            kind, text, pos = self.peek()
+            if kind == "eof":
+                self.error("unclosed array", open_pos)
+                return out
+            if text == "]":
+                self.i += 1
+                return out
+            if text in "})" and kind == "punct":
+                self.error(f"array closed by {text!r}", pos)
+                return out
+            if text == ",":
+                self.i += 1
+                continue
+            out.append(self.value())
+            self.skip_to(",]")
+
+    def exports(self) -> list[TsModule]:
+        found = []
+        toks = self.toks
+        while self.i < len(toks):
+            if (toks[self.i][1] == "export" and self.i + 2 < len(toks)
+                    and toks[self.i + 1][1] in ("const", "let", "var")):
+                name = toks[self.i + 2][1]
+                self.i += 3
+                while self.i < len(toks) and toks[self.i][1] not in ("=", ";", "export"):
+                    self.i += 1                 # `: LearningModule`
+                if self.peek()[1] == "=":
+                    self.i += 1
+                    mark = len(self.errors)
+                    value = self.value()
+                    found.append(TsModule(name, value, self.errors[mark:]))
+                    continue
+            self.i += 1
+        return found
+
+
+def read_exports(text: str) -> tuple[list[TsModule], list[tuple[int, str]]]:
+    """Every `export const` in a module source, plus all read errors
+    (including those outside the exported values)."""
+    reader = _Reader(text)
+    return reader.exports(), reader.errors
+
+
+def read_module(path: str | Path) -> TsModule:
+    """The module object a generated file exports.
+
+    That is the first export whose value is an object with `lessons`, else
+    the first export. errors covers the whole file. A file with no export
+    reads as TsModule("", None, errors).
+    """
+    with open(path, encoding="utf-8", errors="replace", newline=None) as f:
+        exports, errors = read_exports(f.read())
+    module = next((m for m in exports if isinstance(m.value, dict) and "lessons" in m.value),
+                  exports[0] if exports else None)
+    if module is None:
+        return TsModule("", None, errors + [(0, "no export")])
+    return TsModule(module.export_name, module.value, errors)
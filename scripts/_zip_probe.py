@@ -0,0 +1,206 @@
+"""Lightweight ZIP reader for metadata-only EPUB probes.
+
+`zipfile.ZipFile` parses the whole central directory into ZipInfo objects on
+open, which is wasted work (and bytes pulled over a network-synced mount) when
+all scan-epubs.py needs is META-INF/container.xml and one OPF file.
+
+ZipProbe reads the end-of-central-directory record from the file tail, pulls
+the central directory in one ranged read, finds the wanted entries by name
+with a bytes search and inflates only those. It exposes the small subset of
+the ZipFile API the scanner uses (read / namelist / open_stream / file_size),
+so the same parsing code runs against either reader.
+
+Anything unusual — ZIP64, multi-disk, encryption, compression other than
+stored/deflate, a CRC mismatch — raises ProbeUnsupported; callers fall back to
+zipfile for those archives.
+"""
+
+import struct
+import zlib
+from typing import Iterator
+
+_EOCD_SIG = b"PK\x05\x06"
+_CDH_SIG = b"PK\x01\x02"
+_LFH_SIG = b"PK\x03\x04"
+_EOCD = struct.Struct("<4s4H2LH")             # 22 bytes
+_CDH = struct.Struct("<4s6H3L5H2L")           # 46 bytes
+_LFH = struct.Struct("<4s5H3L2H")             # 30 bytes
+_MAX_COMMENT = 0xFFFF
+_STREAM_CHUNK = 64 * 1024
+
+
+class ProbeUnsupported(Exception):
+    """The archive needs the full zipfile module."""
+
+
+class ZipProbe:
+    """Read selected members of a ZIP archive without a full directory parse."""
+
+    def __init__(self, path: str):
+        self._f = open(path, "rb")
+        try:
+            self._load_directory()
+        except Exception:
+            self._f.close()
+            raise
+        self._entries: dict[str, tuple] = {}
+
+    # ── Context manager ──────────────────────────────────────────────────
+    def __enter__(self) -> "ZipProbe":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._f.close()
+
+    # ── Directory ────────────────────────────────────────────────────────
+    def _load_directory(self) -> None:
+        f = self._f
+        f.seek(0, 2)
+        file_size = f.tell()
+        tail_len = min(file_size, _EOCD.size + _MAX_COMMENT)
+        f.seek(file_size - tail_len)
+        tail = f.read(tail_len)
+        pos = tail.rfind(_EOCD_SIG)
+        if pos < 0 or len(tail) - pos < _EOCD.size:
+            raise ProbeUnsupported("no end-of-central-directory record")
+        (_, disk, cd_disk, _, n_entries, cd_size, cd_offset, _) = \
+            _EOCD.unpack_from(tail, pos)
+        if disk or cd_disk or n_entries == 0xFFFF or cd_offset == 0xFFFFFFFF \
+                or cd_size == 0xFFFFFFFF:
+            raise ProbeUnsupported("multi-disk or ZIP64 archive")
+        eocd_offset = file_size - tail_len + pos
+        # Bytes prepended to the archive shift every recorded offset
+        self._base = eocd_offset - cd_size - cd_offset
+        if self._base < 0:
+            raise ProbeUnsupported("inconsistent central directory offsets")
+        start = self._base + cd_offset
+        if start >= file_size - tail_len:
+            self._cd = tail[start - (file_size - tail_len):pos]
+        else:
+            f.seek(start)
+            self._cd = f.read(cd_size)
+        if len(self._cd) != cd_size:
+            raise ProbeUnsupported("truncated central directory")
+
+    def _parse_header(self, hdr: int) -> tuple:
+        (sig, _, _, flags, method, _, _, crc, csize, usize,
+         name_len, _, _, _, _, _, local_offset) = _CDH.unpack_from(self._cd, hdr)
+        if sig != _CDH_SIG:
+            raise ProbeUnsupported("bad central directory header")
+        if flags & 0x1:
+            raise ProbeUnsupported("encrypted member")
+        if 0xFFFFFFFF in (csize, usize, local_offset):
+            raise ProbeUnsupported("ZIP64 member")
+        if method not in (0, 8):
+            raise ProbeUnsupported(f"compression method {method}")
+        return method, crc, csize, usize, local_offset
+
+    def _find(self, name: str) -> tuple | None:
+        """Locate `name` in the central directory by searching its bytes."""
+        if name in self._entries:
+            return self._entries[name]
+        cd = self._cd
+        found = None
+        for encoding in ("utf-8", "cp437"):
+            try:
+                needle = name.encode(encoding)
+            except UnicodeEncodeError:
+                continue
+            i = cd.find(needle, _CDH.size)
+            while i >= 0:
+                hdr = i - _CDH.size
+                if (cd[hdr:hdr + 4] == _CDH_SIG
+                        and struct.unpack_from("<H", cd, hdr + 28)[0] == len(needle)):
+                    found = self._parse_header(hdr)
+                    break
+                i = cd.find(needle, i + 1)
+            if found is not None:
+                break
+        self._entries[name] = found
+        return found
+
+    def namelist(self) -> list[str]:
+        """Every member name (full directory walk — only used on fallback paths)."""
+        names = []
+        cd = self._cd
+        hdr = 0
+        while hdr + _CDH.size <= len(cd) and cd[hdr:hdr + 4] == _CDH_SIG:
+            flags = struct.unpack_from("<H", cd, hdr + 8)[0]
+            name_len, extra_len, comment_len = struct.unpack_from("<3H", cd, hdr + 28)
+            raw = cd[hdr + _CDH.size:hdr + _CDH.size + name_len]
+            names.append(raw.decode("utf-8" if flags & 0x800 else "cp437", errors="replace"))
+            hdr += _CDH.size + name_len + extra_len + comment_len
+        return names
+
+    def file_size(self, name: str) -> int:
+        """Uncompressed size of a member (KeyError if absent)."""
+        entry = self._find(name)
+        if entry is None:
+            raise KeyError(name)
+        return entry[3]
+
+    # ── Member data ──────────────────────────────────────────────────────
+    def _data_offset(self, local_offset: int) -> int:
+        f = self._f
+        f.seek(self._base + local_offset)
+        lfh = f.read(_LFH.size)
+        if len(lfh) != _LFH.size or lfh[:4] != _LFH_SIG:
+            raise ProbeUnsupported("bad local file header")
+        name_len, extra_len = struct.unpack_from("<2H", lfh, 26)
+        return self._base + local_offset + _LFH.size + name_len + extra_len
+
+    def read(self, name: str) -> bytes:
+        """Return the decompressed bytes of a member (KeyError if absent)."""
+        entry = self._find(name)
+        if entry is None:
+            raise KeyError(name)
+        method, crc, csize, usize, local_offset = entry
+        self._f.seek(self._data_offset(local_offset))
+        raw = self._f.read(csize)
+        if len(raw) != csize:
+            raise ProbeUnsupported("truncated member")
+        try:
+            data = raw if method == 0 else zlib.decompress(raw, -15)
+        except zlib.error as exc:
+            raise ProbeUnsupported(f"corrupt deflate stream: {exc}") from None
+        if len(data) != usize or zlib.crc32(data) != crc:
+            raise ProbeUnsupported("CRC mismatch")
+        return data
+
+    def open_stream(self, name: str, chunk_size: int = _STREAM_CHUNK) -> Iterator[bytes]:
+        """Yield a member's decompressed bytes incrementally.
+
+        Lets a caller stop part-way (e.g. once the OPF <metadata> block has been
+        parsed) without reading or inflating the rest of the member. No CRC
+        check is possible on a partial read.
+        """
+        entry = self._find(name)
+        if entry is None:
+            raise KeyError(name)
+        method, _, csize, _, local_offset = entry
+        offset = self._data_offset(local_offset)
+        inflater = None if method == 0 else zlib.decompressobj(-15)
+        remaining = csize
+        while remaining > 0:
+            self._f.seek(offset)
+            raw = self._f.read(min(chunk_size, remaining))
+            if not raw:
+                raise ProbeUnsupported("truncated member")
+            offset += len(raw)
+            remaining -= len(raw)
+            if inflater is None:
+                yield raw
+                continue
+            try:
+                out = inflater.decompress(raw)
+            except zlib.error as exc:
+                raise ProbeUnsupported(f"corrupt deflate stream: {exc}") from None
+            if out:
+                yield out
+        if inflater is not None:
+            tail = inflater.flush()
+            if tail:
+                yield tail
@@ -2,22 +2,48 @@
 """
 EPUB Catalog Analyzer for Koydo Content Pipeline
 ==================================================
-Reads the epub-catalog.json produced by scan-epubs.py and:
+Streams the epub-catalog.ndjson produced by scan-epubs.py (legacy
+epub-catalog.json is also accepted) and:
  1. Shows distribution stats across curriculum categories
  2. Writes epub-educational-picks.json — a ranked list of the most
-    curriculum-relevant books per Koydo subject
+    curriculum-relevant books per Koydo subject, scoring only one
+    representative per duplicate group recorded by the scan
  3. Writes epub-content-plan.md — a human-readable action plan
 
+Scores use a profile from scoring-profiles.json (_scoring_profiles.py;
+--profile, "default" = the original weights).
+
+With NumPy installed the catalog is read through its columnar table
+(_catalog_table.py, rebuilt only when the catalog changes). Signal hit counts
+are cached beside it per term, as a sparse books × terms matrix: scoring with
+any profile is one matrix-vector product, a profile's new term is matched
+once and added as a column, and --compare ranks the whole catalog under
+several profiles side by side. Without NumPy the catalog is
+streamed and scored book by book, with the same results.
+
 Usage:
-    py -3 catalog-analyze.py [--catalog PATH] [--top N]
+    py -3 catalog-analyze.py [--catalog PATH] [--top N] [--rebuild-table]
+        [--profiles PATH] [--profile NAME] [--compare [NAME ...]]
 """
 
 import argparse
+import heapq
 import json
 import re
+import time
 from pathlib import Path
 from collections import defaultdict
 
+from _epub_catalog import duplicate_filepaths, iter_catalog, load_catalog_meta
+from _keyword_matcher import KeywordMatcher
+from _scoring_profiles import DEFAULT_PROFILE, PROFILES_PATH, ScoringProfile, load_profiles
+
+try:
+    import numpy as np
+    from _catalog_table import CatalogTable, load_table
+except ImportError:          # optional: books are then streamed and scored one by one
+    np = None
+
 # Koydo subject → how important keywords for educational books
 # (scored to surface textbooks, study guides, academic works over fiction)
 ACADEMIC_SIGNALS = [
@@ -35,6 +61,20 @@ FICTION_SIGNALS = [
     "love story", "paranormal", "sci-fi adventure",
 ]
 
+ACADEMIC_PUBLISHERS = [
+    "cambridge", "oxford", "springer", "pearson", "mcgraw", "wiley",
+    "mit press", "routledge", "cengage", "elsevier", "sage",
+]
+
+ENGLISH_CODES = ("en", "eng", "english")
+
+# Derived columns of the catalog table holding the signal hits
+HITS_SIDECAR = "hits"
+HITS_VERSION = 1
+
+# generate-modules-from-epubs.py's default --min-score, for --compare
+GENERATE_MIN_SCORE = 65
+
 # Maps Koydo catalog subjects → preferred EPUB categories
 KOYDO_TO_EPUB_CAT = {
     "Mathematics":           ["Mathematics"],
@@ -55,45 +95,292 @@ KOYDO_TO_EPUB_CAT = {
 }
 
 
-def academic_score(book: dict) -> float:
-    """Score 0..100 — higher = more likely an academic/educational book."""
-    haystack = " ".join([
-        book.get("title", ""),
-        book.get("description", ""),
-        " ".join(book.get("subjects", [])),
-        book.get("publisher", ""),
-    ]).lower()
-
-    score = 50.0  # neutral base
-
-    # Boost for academic signals
-    for kw in ACADEMIC_SIGNALS:
-        if kw in haystack:
-            score += 5
-    # Penalise pure fiction signals
-    for kw in FICTION_SIGNALS:
-        if kw in haystack:
-            score -= 4
-
-    # Bonus for known academic publishers
-    pub = book.get("publisher", "").lower()
-    for acad in ["cambridge", "oxford", "springer", "pearson", "mcgraw", "wiley",
-                  "mit press", "routledge", "cengage", "elsevier", "sage"]:
-        if acad in pub:
-            score += 15
+class SignalSet:
+    """The signal terms scored, with one matcher over all of them.
+
+    Text terms (the academic and fiction lists plus any term a profile
+    weights) are matched in title + description + subjects + publisher;
+    publisher terms (the publisher list plus any a profile adds) only inside
+    the publisher field. Each term is a column of the hit matrix, and a
+    profile becomes one weight per column.
+
+    Counts follow `kw in text` (see _keyword_matcher.py), so a term's column
+    does not depend on the other terms matched with it: columns cached for
+    one set of profiles serve any other.
+    """
+
+    def __init__(self, profiles: list[ScoringProfile] = ()):
+        extra_text = [t for p in profiles for t in p.terms]
+        extra_publishers = [t for p in profiles for t in p.publishers]
+        self.matcher = KeywordMatcher({
+            "academic":        ACADEMIC_SIGNALS,
+            "fiction":         FICTION_SIGNALS,
+            "publisher":       ACADEMIC_PUBLISHERS,
+            "extra":           extra_text,
+            "extra_publisher": extra_publishers,
+        })
+        self.text_terms = list(dict.fromkeys(ACADEMIC_SIGNALS + FICTION_SIGNALS + extra_text))
+        self.publisher_terms = list(dict.fromkeys(ACADEMIC_PUBLISHERS + extra_publishers))
+        self._text_col = {t: i for i, t in enumerate(self.text_terms)}
+        self._publisher_col = {t: i for i, t in enumerate(self.publisher_terms)}
+        self._groups = {t: tuple(g for g, terms in (("academic", ACADEMIC_SIGNALS),
+                                                    ("fiction", FICTION_SIGNALS)) if t in terms)
+                        for t in self.text_terms}
+        self._term_weights: dict[ScoringProfile, tuple[dict[str, float], dict[str, float]]] = {}
+
+    def hits(self, book: dict) -> tuple[dict[str, int], dict[str, int]]:
+        """One matcher pass over the book text → (text hit counts, publisher hit counts)."""
+        pub = book.get("publisher", "").lower()
+        haystack = " ".join([
+            book.get("title", ""),
+            book.get("description", ""),
+            " ".join(book.get("subjects", [])),
+            book.get("publisher", ""),
+        ]).lower()
+        return self._split(self.matcher.counts(haystack), pub)
+
+    def _split(self, found: dict[str, int], pub: str) -> tuple[dict[str, int], dict[str, int]]:
+        text_hits = {t: n for t, n in found.items() if t in self._text_col}
+        # Re-walking just the short publisher field is cheaper than tracking offsets.
+        pub_hits: dict[str, int] = {}
+        if pub and any(t in self._publisher_col for t in found):
+            pub_hits = {t: n for t, n in self.matcher.counts(pub).items() if t in self._publisher_col}
+        return text_hits, pub_hits
+
+    def term_weights(self, profile: ScoringProfile) -> tuple[dict[str, float], dict[str, float]]:
+        """The profile's weight of every text term and publisher term."""
+        weights = self._term_weights.get(profile)
+        if weights is None:
+            weights = self._term_weights[profile] = (
+                {t: profile.term_weight(t, self._groups[t]) for t in self.text_terms},
+                {t: profile.publisher_weight(t, t in ACADEMIC_PUBLISHERS)
+                 for t in self.publisher_terms})
+        return weights
+
+    def score(self, profile: ScoringProfile, text_hits: dict[str, int],
+              pub_hits: dict[str, int], english: bool) -> float:
+        w_text, w_pub = self.term_weights(profile)
+        if profile.repeats:
+            score = (profile.base + sum(w_text[t] * n for t, n in text_hits.items())
+                     + sum(w_pub[t] * n for t, n in pub_hits.items()))
+        else:
+            score = (profile.base + sum(map(w_text.__getitem__, text_hits))
+                     + sum(map(w_pub.__getitem__, pub_hits)))
+        if english:
+            score += profile.english
+        return profile.clamp(score)
+
+    # ── Whole-table scoring (NumPy) ───────────────────────────────────────
+    def hit_columns(self, table: "CatalogTable") -> dict:
+        """Per-term hit counts of every book, and the English flag.
+
+        Hits are kept in the table's "hits" sidecar as (row, term, count)
+        triplets for text and for publisher terms; only terms not in it yet
+        are matched, and only then is the sidecar rewritten.
+        """
+        info, cols = table.load_derived(HITS_SIDECAR)
+        if info.get("version") != HITS_VERSION:
+            info, cols = {}, {}
+        changed = False
+        for part, terms, column in (("text", self.text_terms, "text_lc"),
+                                    ("publisher", self.publisher_terms, "publisher_lc")):
+            known = info.get(f"{part}_terms", [])
+            missing = [t for t in terms if t not in known]
+            if not missing:
+                continue
+            rows, ids, counts = _match_terms(table.columns[column].tolist(), missing, len(known))
+            if known:
+                rows = np.concatenate([cols[f"{part}.row"], rows])
+                ids = np.concatenate([cols[f"{part}.term"], ids])
+                counts = np.concatenate([cols[f"{part}.count"], counts])
+            info[f"{part}_terms"] = known + missing
+            cols[f"{part}.row"], cols[f"{part}.term"], cols[f"{part}.count"] = rows, ids, counts
+            changed = True
+        if info.get("english_codes") != list(ENGLISH_CODES) or "english" not in cols:
+            languages = np.asarray(table.columns["language"].tolist())
+            cols["english"] = np.isin(languages, ENGLISH_CODES) | table.language_missing
+            info["english_codes"] = list(ENGLISH_CODES)
+            changed = True
+        if changed:
+            info["version"] = HITS_VERSION
+            table.save_derived(HITS_SIDECAR, info, cols)
+        return {**cols, "text_terms": info["text_terms"], "publisher_terms": info["publisher_terms"]}
+
+    def weights(self, profile: ScoringProfile, cols: dict) -> tuple["np.ndarray", "np.ndarray"]:
+        """The profile as one weight per cached text term and publisher term.
+
+        Terms cached for other profiles weigh 0 unless on a signal list.
+        """
+        w_text = [profile.term_weight(t, self._groups.get(t, ())) for t in cols["text_terms"]]
+        w_pub = [profile.publisher_weight(t, t in ACADEMIC_PUBLISHERS) for t in cols["publisher_terms"]]
+        return np.asarray(w_text, dtype=np.float64), np.asarray(w_pub, dtype=np.float64)
+
+    def scores(self, profile: ScoringProfile, cols: dict) -> "np.ndarray":
+        """score() of every book at once: base + hits · weights (+ English bonus)."""
+        n = len(cols["english"])
+        score = np.full(n, profile.base)
+        for part, weights in zip(("text", "publisher"), self.weights(profile, cols)):
+            contrib = weights[cols[f"{part}.term"]]
+            if profile.repeats:
+                contrib = contrib * cols[f"{part}.count"]
+            # Sparse matrix-vector product: each book's weighted hits summed
+            score += np.bincount(cols[f"{part}.row"], weights=contrib, minlength=n)
+        score += profile.english * cols["english"]
+        return np.clip(score, profile.min, profile.max)
+
+
+def _match_terms(texts: list[str], terms: list[str], first_id: int
+                 ) -> tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    """(row, term id, count) of every term of `terms` found in `texts`; term
+    ids are positions in `terms` plus `first_id`."""
+    matcher = KeywordMatcher({"terms": terms})
+    ids = {t: first_id + i for i, t in enumerate(terms)}
+    rows: list[int] = []
+    found: list[int] = []
+    counts: list[int] = []
+    for row, text in enumerate(texts):
+        if not text:
+            continue
+        for term, k in matcher.counts(text).items():
+            rows.append(row)
+            found.append(ids[term])
+            counts.append(min(k, 0xFFFF))
+    return (np.asarray(rows, dtype=np.int32), np.asarray(found, dtype=np.int32),
+            np.asarray(counts, dtype=np.uint16))
+
+
+# The original signal lists; profiles that add terms get their own SignalSet
+DEFAULT_SIGNALS = SignalSet()
+SIGNAL_MATCHER = DEFAULT_SIGNALS.matcher
+
 
+def academic_score(book: dict, profile: ScoringProfile = DEFAULT_PROFILE,
+                   signals: SignalSet = DEFAULT_SIGNALS) -> float:
+    """Score 0..100 — higher = more likely an academic/educational book."""
+    text_hits, pub_hits = signals.hits(book)
     # English-language bonus (most curriculum content is EN)
-    if book.get("language", "en") in ("en", "eng", "english"):
-        score += 5
+    english = book.get("language", "en") in ENGLISH_CODES
+    return signals.score(profile, text_hits, pub_hits, english)
+
+
+def pick_entry(book: dict, score: float) -> dict:
+    """Project a catalog book down to the fields kept in the picks file."""
+    return {
+        "title":          book.get("title", ""),
+        "creator":        book.get("creator", ""),
+        "publisher":      book.get("publisher", ""),
+        "language":       book.get("language", ""),
+        "subjects":       book.get("subjects", [])[:4],
+        "academic_score": round(score, 1),
+        "filepath":       book.get("filepath", ""),
+    }
+
+
+def rank_stream(catalog_path: Path, skip: set[str], top: int, profile: ScoringProfile,
+                signals: SignalSet) -> tuple[dict[str, list[dict]], dict[str, float], int, int]:
+    """Score the catalog book by book → (picks per category, best score per
+    category, books read, duplicates skipped)."""
+    # Stream the catalog once, keeping only a bounded top-N candidate list per
+    # category. Ties keep the old title order via (-score, title, seq).
+    keep = max(1, top)
+    candidates: dict[str, list[tuple]] = defaultdict(list)
+    best_score: dict[str, float] = {}
+    total_books = 0
+    skipped = 0
+    for seq, book in enumerate(iter_catalog(catalog_path)):
+        total_books += 1
+        if book.get("filepath") in skip:
+            skipped += 1
+            continue
+        score = academic_score(book, profile, signals)
+        entry = None
+        for cat in book.get("categories", ["Uncategorized"]):
+            best_score[cat] = max(best_score.get(cat, 0), score)
+            bucket = candidates[cat]
+            if entry is None:
+                entry = pick_entry(book, score)
+            bucket.append((-score, book.get("title", "").lower(), seq, entry))
+            if len(bucket) >= keep * 4:
+                candidates[cat] = heapq.nsmallest(keep, bucket)
+
+    # Top-N per category by academic score desc
+    result_by_category: dict[str, list[dict]] = {
+        cat: [c[3] for c in heapq.nsmallest(top, candidates[cat])]
+        for cat in sorted(candidates.keys())
+    }
+    return result_by_category, best_score, total_books, skipped
+
+
+def skip_mask(table: "CatalogTable", skip: set[str]) -> "np.ndarray":
+    """True for the books to score (not a duplicate copy)."""
+    if not skip:
+        return np.ones(len(table), dtype=bool)
+    return np.fromiter((fp not in skip for fp in table.columns["filepath"].tolist()),
+                       dtype=bool, count=len(table))
+
+
+def rank_table(table: "CatalogTable", score: "np.ndarray", mask: "np.ndarray", top: int,
+               profile: ScoringProfile) -> tuple[dict[str, list[dict]], dict[str, float]]:
+    """rank_stream() over the columnar table, vectorized, from precomputed scores."""
+    top_rows, best_score = table.top_by_category(score, mask, top)
+    entries: dict[int, dict] = {}
+    for rows in top_rows.values():
+        for r in rows:
+            if r not in entries:
+                # clamp() again so a clamped score is the profile's own bound,
+                # exactly as academic_score() returns it
+                entries[r] = pick_entry(table.row(r), profile.clamp(float(score[r])))
+    result_by_category = {cat: [entries[r] for r in top_rows[cat]] for cat in sorted(top_rows)}
+    return result_by_category, best_score
+
+
+def compare_profiles(table: "CatalogTable", signals: SignalSet, cols: dict, mask: "np.ndarray",
+                     profiles: list[ScoringProfile], top: int) -> None:
+    """Print the catalog ranked under each profile, against the first one."""
+    rankings = []
+    for profile in profiles:
+        score = signals.scores(profile, cols)
+        top_rows, _ = table.top_by_category(score, mask, top)
+        rankings.append((profile, score[mask], top_rows))
 
-    return max(0, min(100, score))
+    ref_name, ref_top = profiles[0].name, rankings[0][2]
+    categories = sorted(ref_top)
+    print()
+    print(f"=== Profile comparison (top {top} per category; overlap with {ref_name!r}) ===")
+    print(f"  {'Profile':<24} {'Mean':>6} {f'>= {GENERATE_MIN_SCORE}':>9} {'Overlap':>14}")
+    for profile, score, top_rows in rankings:
+        same = sum(len(set(top_rows.get(c, ())) & set(ref_top[c])) for c in categories)
+        total = sum(len(ref_top[c]) for c in categories)
+        mean = float(score.mean()) if len(score) else 0.0
+        print(f"  {profile.name:<24} {mean:6.1f} {int((score >= GENERATE_MIN_SCORE).sum()):9,} "
+              f"{same:>8,}/{total:,}")
+    print()
+    header = "".join(f" {p.name[:14]:>14}" for p, _, _ in rankings[1:])
+    print(f"  {'Category':<40}{header}")
+    for cat in categories:
+        ref = set(ref_top[cat])
+        cells = "".join(f" {f'{len(ref & set(top_rows.get(cat, ())))}/{len(ref)}':>14}"
+                        for _, _, top_rows in rankings[1:])
+        print(f"  {cat:<40}{cells}")
+
+
+def _fmt_count(value) -> str:
+    return f"{value:,}" if isinstance(value, int) else "?"
+
+
+def default_catalog_path() -> Path:
+    """Prefer the NDJSON catalog, falling back to a legacy epub-catalog.json."""
+    here = Path(__file__).parent
+    ndjson = here / "epub-catalog.ndjson"
+    legacy = here / "epub-catalog.json"
+    return ndjson if ndjson.exists() or not legacy.exists() else legacy
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Analyze EPUB catalog for curriculum planning.")
     parser.add_argument("--catalog",
-                        default=str(Path(__file__).parent / "epub-catalog.json"),
-                        help="Path to epub-catalog.json")
+                        default=str(default_catalog_path()),
+                        help="Path to epub-catalog.ndjson (or legacy epub-catalog.json)")
     parser.add_argument("--picks-out",
                         default=str(Path(__file__).parent / "epub-educational-picks.json"),
                         help="Output path for educational picks JSON")
@@ -102,55 +389,72 @@ def main() -> None:
                         help="Output path for content plan markdown")
     parser.add_argument("--top", type=int, default=20,
                         help="Top N books per category to include")
+    parser.add_argument("--rebuild-table", action="store_true",
+                        help="Rebuild the catalog's columnar table even if it is up to date")
+    parser.add_argument("--profiles", default=str(PROFILES_PATH),
+                        help="Scoring profiles file (see _scoring_profiles.py)")
+    parser.add_argument("--profile", default="default",
+                        help="Profile used for the picks and the plan")
+    parser.add_argument("--compare", nargs="*", metavar="NAME",
+                        help="Also rank the catalog under these profiles (default: all) "
+                             "and compare them with --profile")
     args = parser.parse_args()
 
+    try:
+        profiles = load_profiles(args.profiles)
+    except ValueError as e:
+        print(f"[ERROR] {e}")
+        return
+    names = [args.profile] + [n for n in (profiles if args.compare == [] else args.compare or ())
+                              if n != args.profile]
+    missing = [n for n in names if n not in profiles]
+    if missing:
+        print(f"[ERROR] Unknown scoring profile(s): {', '.join(missing)} "
+              f"(defined: {', '.join(profiles)})")
+        return
+    profile = profiles[args.profile]
+    # Only the terms of the profiles in use are matched (and cached)
+    used = [profiles[n] for n in names]
+    signals = SignalSet(used) if any(p.terms or p.publishers for p in used) else DEFAULT_SIGNALS
+
     catalog_path = Path(args.catalog)
     if not catalog_path.exists():
         print(f"[ERROR] Catalog not found: {catalog_path}")
         print("Run scan-epubs.py first.")
         return
 
-    print(f"Loading catalog from {catalog_path} …")
-    with open(catalog_path, encoding="utf-8") as f:
-        catalog = json.load(f)
+    meta: dict = load_catalog_meta(catalog_path)
+    if not meta.get("complete"):
+        print("[WARN] Catalog summary missing or scan incomplete — analysing the partial catalog.")
 
-    books: list[dict] = catalog.get("books", [])
-    meta: dict = catalog.get("meta", {})
+    # Duplicate copies/editions are skipped; their group representative stands
+    # in for them (see DuplicateIndex in _epub_catalog.py).
+    skip = duplicate_filepaths(meta)
 
-    print(f"  Total books in catalog : {len(books):,}")
-    print(f"  Total EPUBs scanned    : {meta.get('total_scanned', '?'):,}")
-    print(f"  Scan failures          : {meta.get('total_errors', '?'):,}")
-    print()
+    if profile.name != "default":
+        print(f"Scoring profile: {profile.name} — {profile.description}")
+    if np is not None:
+        print(f"Loading catalog table for {catalog_path} …")
+        table = load_table(catalog_path, rebuild=args.rebuild_table)
+        cols = signals.hit_columns(table)
+        mask = skip_mask(table, skip)
+        start = time.perf_counter()
+        score = signals.scores(profile, cols)
+        result_by_category, best_score = rank_table(table, score, mask, args.top, profile)
+        total_books, skipped = len(table), int(len(table) - mask.sum())
+        print(f"  Scored and ranked in {time.perf_counter() - start:.2f} s")
+    else:
+        print(f"Streaming catalog from {catalog_path} …")
+        result_by_category, best_score, total_books, skipped = rank_stream(
+            catalog_path, skip, args.top, profile, signals)
 
-    # Score every book
-    for book in books:
-        book["_academic_score"] = academic_score(book)
+    print(f"  Total books in catalog : {total_books:,}")
+    print(f"  Total EPUBs scanned    : {_fmt_count(meta.get('total_scanned'))}")
+    print(f"  Scan failures          : {_fmt_count(meta.get('total_errors'))}")
+    print(f"  Duplicates skipped     : {skipped:,} "
+          f"({len(meta.get('duplicate_groups', [])):,} duplicate groups)")
+    print()
 
-    # Build per-category picks
-    picks_by_category: dict[str, list[dict]] = defaultdict(list)
-    for book in books:
-        for cat in book.get("categories", ["Uncategorized"]):
-            picks_by_category[cat].append(book)
-
-    # Sort each category by academic score desc, take top-N
-    result_by_category: dict[str, list[dict]] = {}
-    for cat in sorted(picks_by_category.keys()):
-        sorted_books = sorted(picks_by_category[cat],
-                               key=lambda b: b["_academic_score"], reverse=True)
-        top = sorted_books[:args.top]
-        result_by_category[cat] = [
-            {
-                "title":          b.get("title", ""),
-                "creator":        b.get("creator", ""),
-                "publisher":      b.get("publisher", ""),
-                "language":       b.get("language", ""),
-                "subjects":       b.get("subjects", [])[:4],
-                "academic_score": round(b["_academic_score"], 1),
-                "filepath":       b.get("filepath", ""),
-            }
-            for b in top
-        ]
-    
     # Output picks JSON
     picks_path = Path(args.picks_out)
     with open(picks_path, "w", encoding="utf-8") as f:
@@ -165,7 +469,7 @@ def main() -> None:
     print()
     print("=== Category Distribution (all extracted books) ===")
     for cat, count in sorted(cat_dist.items(), key=lambda x: -x[1]):
-        top_score = max((b["_academic_score"] for b in picks_by_category.get(cat, [])), default=0)
+        top_score = best_score.get(cat, 0)
         print(f"  {cat:<40} {count:>5}  (best academic score: {top_score:.0f})")
 
     print()
@@ -176,7 +480,7 @@ def main() -> None:
     # ── Generate markdown content plan ────────────────────────────────────
     lines = [
         "# Koydo EPUB Content Plan",
-        f"Generated from {len(books):,} books across {len(result_by_category)} categories.",
+        f"Generated from {total_books:,} books across {len(result_by_category)} categories.",
         "",
     ]
     for cat, top_books in sorted(result_by_category.items()):
@@ -194,6 +498,14 @@ def main() -> None:
         f.write("\n".join(lines))
     print(f"Content plan saved      → {plan_path}")
 
+    if len(names) > 1:
+        if np is None:
+            print("[WARN] --compare needs NumPy; skipped.")
+        else:
+            start = time.perf_counter()
+            compare_profiles(table, signals, cols, mask, [profiles[n] for n in names], args.top)
+            print(f"\n  Compared {len(names)} profiles in {time.perf_counter() - start:.2f} s")
+
 
 if __name__ == "__main__":
     main()
@@ -8,13 +8,19 @@ TypeScript source files ready to drop into src/lib/modules/catalog/.
 Usage:
     py -3 generate-modules-from-epubs.py --picks scripts/epub-educational-picks.json
         [--category "Mathematics"] [--max-books 5] [--lessons-per-book 10]
-        [--out-dir src/lib/modules/catalog/epub-generated]
+        [--out-dir src/lib/modules/catalog/epub-generated] [--workers N]
+        [--cache-dir DIR | --no-cache]
+
+Extracted chapters are cached by book fingerprint (_chapter_cache.py), so a
+re-run after a template change skips extraction for books seen before.
+Every module written is recorded in the output directory's provenance
+manifest (_provenance.py).
 
 What it produces:
   • One .ts file per book that has enough chapter content
   • Each module has 10–15 lessons derived from chapter headings
-  • Each lesson has 4 MCQ quiz questions auto-generated from a keyword
-    extraction strategy (no LLM required)
+  • Each lesson has 4 MCQ quiz questions auto-generated from the chapter's
+    top TF-IDF keywords (_keyword_engine.py; no LLM required)
   • A registry-patch.json that can be merged into the module registry
 """
 
@@ -22,107 +28,41 @@ import argparse
 import json
 import os
 import re
-import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from itertools import repeat
 from pathlib import Path
-from html.parser import HTMLParser
-from xml.etree import ElementTree as ET
+from typing import TextIO
+
+from _chapter_cache import DEFAULT_CACHE_DIR, open_cache
+from _epub_reader import EpubBook, book_fingerprint
+from _html_text import html_to_text
+from _keyword_engine import SentenceIndex, book_keywords
+from _provenance import append_entries, module_entry
+from _ts_emitter import QuizModuleWriter
 
 
 # ────────────────────────────────────────────────────────────────────────────
 # HTML → plain-text stripper
 # ────────────────────────────────────────────────────────────────────────────
 
-class _HTMLTextExtractor(HTMLParser):
-    SKIP_TAGS = {"script", "style", "head"}
-
-    def __init__(self):
-        super().__init__()
-        self.parts: list[str] = []
-        self._skip = 0
-
-    def handle_starttag(self, tag, attrs):
-        if tag.lower() in self.SKIP_TAGS:
-            self._skip += 1
-
-    def handle_endtag(self, tag):
-        if tag.lower() in self.SKIP_TAGS:
-            self._skip = max(0, self._skip - 1)
-
-    def handle_data(self, data):
-        if self._skip == 0:
-            stripped = data.strip()
-            if stripped:
-                self.parts.append(stripped)
-
-
-def strip_html(html: str) -> str:
-    p = _HTMLTextExtractor()
-    p.feed(html)
-    return " ".join(p.parts)
+def strip_html(html: str, sep: str = "\n\n") -> str:
+    """Plain text of a chapter document; paragraphs and headings are kept
+    apart by blank lines (pass sep=" " for a single line)."""
+    return html_to_text(html, sep)
 
 
 # ────────────────────────────────────────────────────────────────────────────
 # EPUB Chapter Extractor
 # ────────────────────────────────────────────────────────────────────────────
 
-NS = {
-    "dc":        "http://purl.org/dc/elements/1.1/",
-    "opf":       "http://www.idpf.org/2007/opf",
-    "container": "urn:oasis:names:tc:opendocument:xmlns:container",
-}
-
-
-def get_opf_path(zf: zipfile.ZipFile) -> str | None:
-    try:
-        data = zf.read("META-INF/container.xml")
-        root = ET.fromstring(data)
-        rf = root.find(".//container:rootfile", NS)
-        if rf is not None:
-            return rf.get("full-path")
-    except Exception:
-        pass
-    return next((n for n in zf.namelist() if n.endswith(".opf")), None)
-
-
-def get_spine_items(zf: zipfile.ZipFile, opf_path: str) -> list[str]:
-    """Return a list of spine HTML item paths in reading order."""
-    try:
-        opf_data = zf.read(opf_path)
-        root = ET.fromstring(opf_data)
-        opf_dir = "/".join(opf_path.split("/")[:-1])
-
-        # Build id → href manifest
-        manifest: dict[str, str] = {}
-        mf = root.find("opf:manifest", NS)
-        if mf is None:
-            for child in root:
-                if child.tag.endswith("manifest"):
-                    mf = child
-        if mf is not None:
-            for item in mf:
-                item_id = item.get("id", "")
-                href = item.get("href", "")
-                if href:
-                    full = f"{opf_dir}/{href}".lstrip("/") if opf_dir else href
-                    manifest[item_id] = full
-
-        # Get spine order
-        spine = root.find("opf:spine", NS)
-        if spine is None:
-            for child in root:
-                if child.tag.endswith("spine"):
-                    spine = child
-        if spine is None:
-            return []
-
-        paths = []
-        for item in spine:
-            idref = item.get("idref", "")
-            if idref in manifest:
-                paths.append(manifest[idref])
-        return paths
-    except Exception:
-        return []
+CHAPTER_TEXT_CHARS = 2000   # chapter text kept per lesson
+# Cache key of extract_chapters() output (_chapter_cache.py); bump whenever
+# what it returns changes.
+EXTRACTOR_VERSION = 1
+# Recorded in the provenance manifest; bump whenever the module layout or the
+# question templates change.
+GENERATOR_VERSION = 1
 
 
 def extract_chapters(epub_path: str, max_chapters: int = 15) -> list[dict]:
@@ -132,29 +72,22 @@ def extract_chapters(epub_path: str, max_chapters: int = 15) -> list[dict]:
     """
     chapters = []
     try:
-        with zipfile.ZipFile(epub_path, "r") as zf:
-            opf_path = get_opf_path(zf)
-            if not opf_path:
-                return []
-            spine = get_spine_items(zf, opf_path)
-            if not spine:
-                # fallback: try all HTML files alphabetically
-                spine = sorted(n for n in zf.namelist()
-                               if n.endswith((".html", ".xhtml", ".htm")))
-
-            for item_path in spine[:max_chapters * 2]:  # read extra, filter later
+        with EpubBook(epub_path) as book:
+            # Sections follow the table of contents when the book has one,
+            # otherwise they are the spine documents.
+            for section in book.sections[:max_chapters * 2]:  # read extra, filter later
                 try:
-                    raw = zf.read(item_path).decode("utf-8", errors="replace")
-                    text = strip_html(raw)
-                    if len(text) < 100:
+                    # Stubs are skipped from their size alone, and only enough
+                    # of a section is inflated for the text kept below. One
+                    # pass yields the text and the heading hierarchy.
+                    chapter = book.read_section(section, min_chars=100,
+                                                max_chars=CHAPTER_TEXT_CHARS)
+                    if chapter is None or len(chapter) < 100:
                         continue  # skip stub pages
-                    # Try to find a heading
-                    heading_m = re.search(
-                        r"<h[1-4][^>]*>(.*?)</h[1-4]>", raw, re.IGNORECASE | re.DOTALL
-                    )
-                    heading = strip_html(heading_m.group(1)) if heading_m else ""
-                    heading = heading[:80].strip() or f"Chapter {len(chapters) + 1}"
-                    chapters.append({"heading": heading, "text": text[:2000]})
+                    text = chapter.text
+                    heading = ((section.title or chapter.heading())[:80].strip()
+                               or f"Chapter {len(chapters) + 1}")
+                    chapters.append({"heading": heading, "text": text[:CHAPTER_TEXT_CHARS]})
                     if len(chapters) >= max_chapters:
                         break
                 except Exception:
@@ -168,29 +101,11 @@ def extract_chapters(epub_path: str, max_chapters: int = 15) -> list[dict]:
 # Keyword → MCQ generator (no LLM, pure heuristic)
 # ────────────────────────────────────────────────────────────────────────────
 
-def extract_keywords(text: str, n: int = 20) -> list[str]:
-    """Return a list of candidate content keywords from chapter text."""
-    words = re.findall(r"\b[A-Z][a-z]{3,}\b", text)
-    freq: dict[str, int] = {}
-    for w in words:
-        freq[w] = freq.get(w, 0) + 1
-    # Filter out super-common words
-    STOP = {"This", "That", "They", "There", "Their", "These", "With",
-            "From", "Have", "Will", "Your", "More", "Into", "When",
-            "What", "Which", "Some", "About", "Because", "After"}
-    keywords = [w for w, cnt in sorted(freq.items(), key=lambda x: -x[1])
-                if w not in STOP and cnt >= 2]
-    return keywords[:n]
-
-
-def make_mcq(lesson_id: str, q_idx: int, keyword: str, chapter_text: str) -> dict:
+def make_mcq(lesson_id: str, q_idx: int, keyword: str, sentences: SentenceIndex) -> dict:
     """Generate a basic MCQ question for a keyword found in chapter text."""
-    # Extract a sentence containing the keyword for context
-    sentences = re.split(r"[.!?]", chapter_text)
-    ctx_sentence = next(
-        (s.strip() for s in sentences if keyword in s and len(s.strip()) > 20),
-        f"The concept of {keyword} is central to this topic."
-    )
+    # A sentence containing the keyword gives the context
+    ctx_sentence = (sentences.context(keyword)
+                    or f"The concept of {keyword} is central to this topic.")
     ctx_sentence = ctx_sentence[:200]
 
     question_text = f"Which of the following best describes the role of {keyword} in this context?"
@@ -237,78 +152,104 @@ def escape_ts(s: str) -> str:
     return s.replace("\\", "\\\\").replace('"', '\\"')
 
 
-def build_module_ts(
+def write_module_ts(
     book: dict,
     chapters: list[dict],
     module_id: str,
     subject_mapping: str,
     lessons_per_book: int,
-) -> str:
-    """Render a complete LearningModule TypeScript source string."""
-    title        = escape_ts(book.get("title", "Unknown Title"))
-    creator      = escape_ts(book.get("creator", ""))
-    description  = escape_ts(book.get("description", "")[:200] or
-                              f"Derived from '{title}' by {creator}.")
-    const_name   = to_const_name(module_id)
-
-    lesson_items = []
+    f: TextIO,
+) -> QuizModuleWriter:
+    """Stream a complete LearningModule TypeScript source into file `f`;
+    returns the writer, with its counts and hash."""
+    title = book.get("title", "Unknown Title")
+    w = QuizModuleWriter(f, escape_ts)
+    w.open_module(
+        source=book.get("filepath", ""),
+        generator="scripts/generate-modules-from-epubs.py",
+        export_name=to_const_name(module_id),
+        module_id=module_id,
+        title=title,
+        description=(book.get("description", "")[:200] or
+                     f"Derived from '{escape_ts(title)}' by {escape_ts(book.get('creator', ''))}."),
+        subject=subject_mapping,
+    )
+
     selected_chapters = chapters[:lessons_per_book]
+    # Keywords are ranked by TF-IDF against every extracted chapter of the
+    # book, so terms that run through the whole book give way to each
+    # chapter's own.
+    book_kws = book_keywords([ch["text"] for ch in chapters], n=4)
     for i, ch in enumerate(selected_chapters):
         lesson_id = f"{module_id}-l{i+1:02d}"
-        ch_title  = escape_ts(ch["heading"])
-        keywords  = extract_keywords(ch["text"])
+        sentences = SentenceIndex(ch["text"])
         # Build 4 quiz questions from top 4 keywords (or fewer if not enough)
-        questions = []
-        for q_idx, kw in enumerate(keywords[:4], start=1):
-            questions.append(make_mcq(lesson_id, q_idx, kw, ch["text"]))
-
-        qs_json = json.dumps(questions, ensure_ascii=False, indent=8)
-        # Indent to align with TS
-        qs_indented = qs_json.replace("\n", "\n      ")
-
-        lesson_items.append(f'''    {{
-      id: "{lesson_id}",
-      title: "{ch_title}",
-      type: "video",
-      duration: 10,
-      questions: {qs_indented},
-    }}''')
-
-    lessons_str = ",\n".join(lesson_items)
-    src_label   = escape_ts(book.get("filepath", ""))
-
-    return f'''import type {{ LearningModule }} from "@/lib/modules/types";
-
-// Auto-generated from EPUB library.
-// Source: {src_label}
-// Generator: scripts/generate-modules-from-epubs.py
-
-export const {const_name}: LearningModule = {{
-  id: "{module_id}",
-  title: "{title}",
-  description: "{description}",
-  subject: "{subject_mapping}",
-  tags: ["epub-derived", "curriculum", "interactive"],
-  minAge: 10,
-  maxAge: 18,
-  moduleVersion: "1.0.0",
-  version: "1.0.0",
-  learningObjectives: [
-    "Understand foundational concepts presented in \\"{title}\\"",
-    "Apply key ideas through chapter-based guided practice",
-    "Demonstrate recall with curriculum-aligned quiz questions",
-  ],
-  lessons: [
-{lessons_str}
-  ],
-}};
-'''
+        questions = [make_mcq(lesson_id, q_idx, kw, sentences)
+                     for q_idx, kw in enumerate(book_kws[i], start=1)]
+        w.counts["fallback_questions"] += sum(sentences.context(kw) is None for kw in book_kws[i])
+        w.lesson(lesson_id, ch["heading"], questions)
+
+    w.close_module()
+    return w
 
 
 # ────────────────────────────────────────────────────────────────────────────
 # Main
 # ────────────────────────────────────────────────────────────────────────────
 
+def render_book(book: dict, category: str, lessons_per_book: int,
+                cache_dir: str | None, tmp_path: Path
+                ) -> tuple[str | None, int, dict | None, str | None]:
+    """Extract one book and stream its module source to `tmp_path` (pool
+    worker entry point).
+
+    Chapters come from the chapter cache in `cache_dir` when the book was
+    extracted before (None disables the cache). Returns (module_id, chapter
+    count, provenance entry, error); module_id and the entry are None, and
+    nothing is left at `tmp_path`, when the book has too few chapters or
+    failed (error then says why, and the run goes on with the next book).
+    The caller moves the file to `<module_id>.ts`.
+    """
+    try:
+        return _render_book(book, category, lessons_per_book, cache_dir, tmp_path) + (None,)
+    except Exception as e:
+        try:
+            tmp_path.unlink(missing_ok=True)
+        except OSError:
+            pass
+        return None, 0, None, f"{type(e).__name__}: {e}"
+
+
+def _render_book(book: dict, category: str, lessons_per_book: int,
+                 cache_dir: str | None, tmp_path: Path) -> tuple[str | None, int, dict | None]:
+    title = book.get("title", "")
+    creator = book.get("creator", "")
+    filepath = book.get("filepath", "")
+    max_chapters = lessons_per_book + 5
+    cache = open_cache(cache_dir) if cache_dir else None
+    if cache:
+        chapters = cache.chapters(filepath, "generate-modules", EXTRACTOR_VERSION,
+                                  extract_chapters, max_chapters=max_chapters)
+    else:
+        chapters = extract_chapters(filepath, max_chapters=max_chapters)
+    if len(chapters) < 3:
+        return None, len(chapters), None
+
+    module_id = slug(f"{title}-{creator}"[:80]) or slug(title[:40])
+
+    # Map to Koydo subject name
+    koydo_subject = category.replace(" & ", " and ")
+
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        w = write_module_ts(book, chapters, module_id, koydo_subject, lessons_per_book, f)
+    entry = module_entry(w, slug=module_id, export_name=to_const_name(module_id),
+                         title=title, creator=creator, source=filepath,
+                         fingerprint=cache.fingerprint(filepath) if cache else book_fingerprint(filepath),
+                         generator="generate-modules-from-epubs.py",
+                         generator_version=GENERATOR_VERSION)
+    return module_id, len(chapters), entry
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Generate Koydo modules from EPUB catalog.")
     parser.add_argument("--picks",
@@ -323,6 +264,12 @@ def main() -> None:
                         help="Max books to process per category")
     parser.add_argument("--lessons-per-book", type=int, default=10,
                         help="Lessons (chapters) to extract per book")
+    parser.add_argument("--workers", type=int, default=min(8, os.cpu_count() or 4),
+                        help="Parallel extraction processes (1 = run in-process)")
+    parser.add_argument("--cache-dir", default=str(DEFAULT_CACHE_DIR),
+                        help="Extracted-chapter cache (see _chapter_cache.py)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Always extract chapters from the EPUBs")
     parser.add_argument("--out-dir",
                         default=str(Path(__file__).parent.parent /
                                     "src/lib/modules/catalog/epub-generated"),
@@ -345,43 +292,70 @@ def main() -> None:
     registry_patches: list[str] = []
     generated = 0
 
+    # Plan the run in the serial order first, then extract/render the books on
+    # the pool. Workers write each module to a per-job temporary file;
+    # executor.map yields results in submission order and the files are moved
+    # into place in that order, so the log, the files written and
+    # generated-modules.json match a serial run.
+    plan: list[tuple] = []
+    jobs: list[tuple[dict, str]] = []
     for category in categories:
         books = picks.get(category, [])
         edu_books = [b for b in books if b.get("academic_score", 0) >= args.min_score]
-        print(f"\n--- {category} --- {len(edu_books)} qualifying books")
+        plan.append(("category", category, len(edu_books)))
 
         for book in edu_books[:args.max_books]:
-            title = book.get("title", "")
-            creator = book.get("creator", "")
             filepath = book.get("filepath", "")
-            score = book.get("academic_score", 0)
-
             if not filepath or not Path(filepath).exists():
-                print(f"  [miss] File not found: {filepath}")
-                continue
-
-            print(f"  Extracting: {title[:60]} (score {score:.0f}) ...", end=" ", flush=True)
-            chapters = extract_chapters(filepath, max_chapters=args.lessons_per_book + 5)
-
-            if len(chapters) < 3:
-                print("[skip] too few chapters")
+                plan.append(("miss", filepath))
                 continue
+            plan.append(("book", book))
+            jobs.append((book, category))
 
-            module_id = slug(f"{title}-{creator}"[:80]) or slug(title[:40])
-            out_path  = out_dir / f"{module_id}.ts"
-
-            # Map to Koydo subject name
-            koydo_subject = category.replace(" & ", " and ")
-
-            ts_src = build_module_ts(book, chapters, module_id, koydo_subject,
-                                     args.lessons_per_book)
-
-            with open(out_path, "w", encoding="utf-8") as f:
-                f.write(ts_src)
+    tmp_paths = [out_dir / f".{os.getpid()}-{n}.ts.tmp" for n in range(len(jobs))]
+    pending = iter(tmp_paths)
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) if args.workers > 1 else nullcontext() as executor:
+            mapper = executor.map if executor else map
+            results = mapper(render_book, [b for b, _ in jobs], [c for _, c in jobs],
+                             repeat(args.lessons_per_book, len(jobs)),
+                             repeat(None if args.no_cache else args.cache_dir, len(jobs)),
+                             tmp_paths)
+            for step in plan:
+                if step[0] == "category":
+                    print(f"\n--- {step[1]} --- {step[2]} qualifying books")
+                    continue
+                if step[0] == "miss":
+                    print(f"  [miss] File not found: {step[1]}")
+                    continue
+                book = step[1]
+                title = book.get("title", "")
+                score = book.get("academic_score", 0)
+                print(f"  Extracting: {title[:60]} (score {score:.0f}) ...", end=" ", flush=True)
+                module_id, n_chapters, entry, error = next(results)
+                tmp_path = next(pending)
+
+                if error is not None:
+                    print(f"[error] {error}")
+                    continue
+                if module_id is None:
+                    print("[skip] too few chapters")
+                    continue
 
-            registry_patches.append(module_id)
-            generated += 1
-            print(f"[ok] -> {out_path.name}  ({len(chapters)} chapters)")
+                out_path = out_dir / f"{module_id}.ts"
+                os.replace(tmp_path, out_path)
+                append_entries(out_dir, [entry])
+
+                registry_patches.append(module_id)
+                generated += 1
+                print(f"[ok] -> {out_path.name}  ({n_chapters} chapters)")
+    finally:
+        # A run stopped early (Ctrl-C, a failed move) leaves unconsumed modules behind
+        for tmp_path in tmp_paths:
+            try:
+                tmp_path.unlink(missing_ok=True)
+            except OSError:
+                pass
 
     # Write registry patch list
     patch_path = out_dir / "generated-modules.json"
@@ -3,31 +3,60 @@
 EPUB Metadata Scanner for Koydo Content Pipeline
 =================================================
 Scans a directory of .epub files and extracts metadata from each book's OPF file.
-Produces a JSON catalog categorized by educational subject.
+Produces an NDJSON catalog (one book per line) categorized by educational
+subject, written as results arrive, plus a small .meta.json summary sidecar.
+
+Rescans are incremental: a scan manifest remembers each book's size, mtime
+(and optionally a content hash) together with its catalog entry, so only
+added or changed files are reopened.
+
+Books are discovered lazily and handed to the worker pool in chunks while the
+directory walk is still running; each worker returns one compact batch of
+results per chunk.
+
+Scans are checkpointed: every completed book is journaled, and the journal is
+fsync'd and committed (atomic rename of a small state file) at regular
+intervals. After a crash or Ctrl-C, `--resume` replays the committed journal
+and only scans what was left.
+
+Each book gets a content fingerprint (hash of the OPF + spine document sizes)
+and a normalized title+creator key; books sharing either are grouped and the
+groups are written to the summary sidecar so later stages process one
+representative per work.
+
+Every book opened is timed per phase (open, container.xml, OPF, categorize);
+the run ends with p50/p95/p99 latencies, the slowest books and failures
+bucketed by reason. `--telemetry-out` exports the same data as JSON.
 
 Usage:
     python3 scan-epubs.py [--epub-dir PATH] [--output PATH] [--workers N]
+                          [--chunk-size N] [--manifest PATH] [--full] [--hash]
+                          [--resume] [--checkpoint-every SECONDS]
+                          [--telemetry-out PATH]
 
 Default epub-dir: G:\\My Drive\\15_E-BOOKS
-Default output:   scripts/epub-catalog.json
+Default output:   scripts/epub-catalog.ndjson  (+ epub-catalog.meta.json)
+Default manifest: scripts/epub-scan-manifest.json
+Checkpoint:       <manifest>.checkpoint.json + <manifest>.journal.ndjson
 """
 
 import argparse
+import hashlib
 import json
 import os
 import re
 import sys
+import time
 import zipfile
-from concurrent.futures import ProcessPoolExecutor, as_completed
+import zlib
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
 from pathlib import Path
-from xml.etree import ElementTree as ET
+from typing import Iterator
 
-# ── Dublin Core / OPF XML namespaces ────────────────────────────────────────
-NS = {
-    "dc":        "http://purl.org/dc/elements/1.1/",
-    "opf":       "http://www.idpf.org/2007/opf",
-    "container": "urn:oasis:names:tc:opendocument:xmlns:container",
-}
+from _epub_catalog import CatalogWriter, DuplicateIndex, work_key
+from _epub_reader import content_fingerprint, find_opf_path, read_opf
+from _keyword_matcher import KeywordMatcher
+from _zip_probe import ProbeUnsupported, ZipProbe
 
 # ── Curriculum subject keywords → category mapping ──────────────────────────
 SUBJECT_MAP: list[tuple[list[str], str]] = [
@@ -63,87 +92,8 @@ SUBJECT_MAP: list[tuple[list[str], str]] = [
       "education", "pedagogy", "teaching", "learning"], "General Education"),
 ]
 
-
-def extract_text(element: ET.Element | None) -> str:
-    """Safely extract stripped text from an XML element."""
-    if element is None:
-        return ""
-    return (element.text or "").strip()
-
-
-def find_opf_path(zf: zipfile.ZipFile) -> str | None:
-    """Read META-INF/container.xml and return the path to the OPF file."""
-    try:
-        container_xml = zf.read("META-INF/container.xml")
-        root = ET.fromstring(container_xml)
-        rootfile = root.find(".//container:rootfile", NS)
-        if rootfile is not None:
-            return rootfile.get("full-path")
-    except (KeyError, ET.ParseError):
-        pass
-    # Fallback: find any .opf file in the archive
-    for name in zf.namelist():
-        if name.endswith(".opf"):
-            return name
-    return None
-
-
-def _first_el(
-    meta: ET.Element, tag: str
-) -> ET.Element | None:
-    """Find the first matching element, trying DC namespace first, then bare tag.
-    Uses explicit is-None checks to avoid Python 3.14 Element truthiness issues."""
-    el = meta.find(f"dc:{tag}", NS)
-    if el is not None:
-        return el
-    return meta.find(tag)
-
-
-def _all_els(meta: ET.Element, tag: str) -> list[ET.Element]:
-    """Find all matching elements across DC namespace and bare tag."""
-    els = meta.findall(f"dc:{tag}", NS)
-    if not els:
-        els = meta.findall(tag)
-    return els
-
-
-def parse_opf(zf: zipfile.ZipFile, opf_path: str) -> dict:
-    """Parse OPF metadata file and return a dict of book metadata."""
-    try:
-        opf_data = zf.read(opf_path)
-        root = ET.fromstring(opf_data)
-    except (KeyError, ET.ParseError):
-        return {}
-
-    # Locate the <metadata> element robustly across namespace variants
-    meta = root.find("opf:metadata", NS)
-    if meta is None:
-        meta = root.find("metadata")
-    if meta is None:
-        for child in root:
-            if child.tag.endswith("metadata"):
-                meta = child
-                break
-
-    if meta is None:
-        return {}
-
-    def get(tag: str) -> str:
-        return extract_text(_first_el(meta, tag))
-
-    def get_all(tag: str) -> list[str]:
-        return [extract_text(e) for e in _all_els(meta, tag) if extract_text(e)]
-
-    desc = get("description")
-    return {
-        "title":       get("title"),
-        "creator":     get("creator"),
-        "publisher":   get("publisher"),
-        "language":    get("language"),
-        "description": desc[:500] if desc else "",
-        "subjects":    get_all("subject"),
-        "date":        get("date")[:4] if get("date") else "",
-    }
+# All SUBJECT_MAP keywords compiled once per process (workers included).
+SUBJECT_MATCHER = KeywordMatcher({category: keywords for keywords, category in SUBJECT_MAP})
 
 
 def categorize(metadata: dict) -> list[str]:
@@ -154,30 +104,367 @@ def categorize(metadata: dict) -> list[str]:
         " ".join(metadata.get("subjects", [])),
     ]).lower()
 
-    matched: list[str] = []
-    for keywords, category in SUBJECT_MAP:
-        if any(kw in haystack for kw in keywords):
-            matched.append(category)
-
+    matched = SUBJECT_MATCHER.groups_hit(SUBJECT_MATCHER.counts(haystack))
     return matched or ["Uncategorized"]
 
 
+# ── Per-book telemetry ──────────────────────────────────────────────────────
+PHASES = ("open", "container", "opf", "fingerprint", "categorize", "total")
+
+# Classified reasons a book yields no catalog entry. Anything else (corrupt
+# members, unexpected exceptions) counts as a scan error and is retried on
+# the next run instead of being cached in the manifest.
+EXPECTED_FAILURES = {"io_error", "bad_zip", "no_opf", "bad_opf", "no_title"}
+
+
+class ScanFailure(Exception):
+    """A book that cannot be catalogued, with a classified reason."""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+def _ms_since(t: float) -> float:
+    return (time.perf_counter() - t) * 1000
+
+
+def _scan_archive(zf: zipfile.ZipFile | ZipProbe, epub_path: str,
+                  timings: dict[str, float]) -> dict:
+    t = time.perf_counter()
+    opf_path = find_opf_path(zf)
+    timings["container"] = _ms_since(t)
+    if not opf_path:
+        raise ScanFailure("no_opf")
+    t = time.perf_counter()
+    opf = read_opf(zf, opf_path)
+    meta = opf[1].metadata if opf else {}
+    timings["opf"] = _ms_since(t)
+    if not meta:
+        raise ScanFailure("bad_opf")
+    if not meta.get("title"):
+        raise ScanFailure("no_title")
+    t = time.perf_counter()
+    meta["fingerprint"], meta["spine_bytes"] = content_fingerprint(zf, opf_path, *opf)
+    meta["work_key"] = work_key(meta.get("title", ""), meta.get("creator", ""))
+    timings["fingerprint"] = _ms_since(t)
+    t = time.perf_counter()
+    meta["filename"]   = os.path.basename(epub_path)
+    meta["filepath"]   = epub_path
+    meta["categories"] = categorize(meta)
+    timings["categorize"] = _ms_since(t)
+    return meta
+
+
+def scan_epub_timed(epub_path: str) -> tuple[dict | None, str | None, dict]:
+    """Scan one EPUB → (metadata or None, failure reason or None, telemetry).
+
+    Telemetry holds per-phase wall times in ms and which reader was used. The
+    raw central-directory probe reads only container.xml and the OPF;
+    archives it cannot handle are re-read with zipfile.
+    """
+    timings: dict[str, float] = {}
+    telemetry = {"reader": "probe", "ms": timings}
+    meta = None
+    reason = None
+    t0 = time.perf_counter()
+    try:
+        try:
+            t = time.perf_counter()
+            with ZipProbe(epub_path) as zp:
+                timings["open"] = _ms_since(t)
+                meta = _scan_archive(zp, epub_path, timings)
+        except ProbeUnsupported:
+            telemetry["reader"] = "zipfile"
+            t = time.perf_counter()
+            with zipfile.ZipFile(epub_path, "r") as zf:
+                timings["open"] = _ms_since(t)
+                meta = _scan_archive(zf, epub_path, timings)
+    except ScanFailure as failure:
+        reason = failure.reason
+    except zipfile.BadZipFile:
+        reason = "bad_zip"
+    except OSError:
+        reason = "io_error"
+    except zlib.error:
+        reason = "corrupt_member"
+    except Exception as exc:
+        reason = f"exception:{type(exc).__name__}"
+    timings["total"] = _ms_since(t0)
+    return meta, reason, telemetry
+
+
 def scan_epub(epub_path: str) -> dict | None:
     """Scan a single EPUB and return its metadata dict (or None on error)."""
+    return scan_epub_timed(epub_path)[0]
+
+
+# (path, metadata or None, sha1 or None, failure reason or None, telemetry)
+BatchRow = tuple[str, dict | None, str | None, str | None, dict]
+
+
+def scan_batch(epub_paths: list[str], with_hash: bool = False) -> list[BatchRow]:
+    """Worker entry point: scan a chunk of EPUBs and return one result batch.
+
+    Failures are classified per book so one bad file cannot discard the rest
+    of its chunk.
+    """
+    rows: list[BatchRow] = []
+    for p in epub_paths:
+        result, reason, telemetry = scan_epub_timed(p)
+        sha1 = None
+        if with_hash and reason in (None, *EXPECTED_FAILURES):
+            try:
+                sha1 = file_sha1(p)
+            except OSError:
+                pass
+        rows.append((p, result, sha1, reason, telemetry))
+    return rows
+
+
+def iter_epub_paths(epub_dir: Path) -> Iterator[str]:
+    """Lazily yield .epub paths under epub_dir as the walk discovers them."""
+    for p in epub_dir.rglob("*.epub"):
+        yield str(p)
+
+
+# ── Incremental scan manifest ───────────────────────────────────────────────
+MANIFEST_VERSION = 2   # 2: entries carry fingerprint / spine_bytes / work_key
+
+
+def file_sha1(path: str, chunk_size: int = 1 << 20) -> str:
+    """Return the SHA-1 hex digest of a file's contents."""
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def load_manifest(path: Path) -> dict[str, dict]:
+    """Load the per-book scan manifest (path → fingerprint + entry)."""
     try:
-        with zipfile.ZipFile(epub_path, "r") as zf:
-            opf_path = find_opf_path(zf)
-            if not opf_path:
-                return None
-            meta = parse_opf(zf, opf_path)
-            if not meta.get("title"):
-                return None
-            meta["filename"]   = os.path.basename(epub_path)
-            meta["filepath"]   = epub_path
-            meta["categories"] = categorize(meta)
-            return meta
-    except (zipfile.BadZipFile, OSError):
-        return None
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != MANIFEST_VERSION:
+        return {}
+    return data.get("books", {})
+
+
+def save_manifest(path: Path, books: dict[str, dict]) -> None:
+    """Atomically write the scan manifest."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": MANIFEST_VERSION, "books": books}, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def is_unchanged(record: dict | None, st: os.stat_result, epub_path: str, use_hash: bool) -> bool:
+    """True if a manifest record still describes the file on disk.
+
+    Size + mtime is the fast path. With use_hash, a file whose mtime moved
+    (e.g. re-synced by Google Drive) but whose bytes are identical is still
+    treated as unchanged; the record's mtime is refreshed in place.
+    """
+    if record is None:
+        return False
+    if record.get("size") == st.st_size and record.get("mtime_ns") == st.st_mtime_ns:
+        return True
+    if use_hash and record.get("size") == st.st_size and record.get("sha1"):
+        try:
+            if file_sha1(epub_path) == record["sha1"]:
+                record["mtime_ns"] = st.st_mtime_ns
+                return True
+        except OSError:
+            return False
+    return False
+
+
+# ── Crash-safe checkpoints ──────────────────────────────────────────────────
+
+class ScanCheckpoint:
+    """Journal of the books scanned by the current run, for --resume.
+
+    Each scanned book's manifest record is appended to an NDJSON journal.
+    commit() fsyncs the journal and atomically replaces a small state file
+    holding the durable journal length, so a crash can only lose records
+    written after the last commit; a torn tail is truncated on resume.
+    """
+
+    def __init__(self, manifest_path: Path, options: dict, interval: float):
+        self.state_path = manifest_path.with_name(manifest_path.stem + ".checkpoint.json")
+        self.journal_path = manifest_path.with_name(manifest_path.stem + ".journal.ndjson")
+        self.options = options
+        self.interval = interval
+        self._journal = None
+        self._last_commit = time.monotonic()
+        self._dirty = 0
+
+    def exists(self) -> bool:
+        return self.state_path.exists()
+
+    def load(self) -> tuple[dict, dict[str, dict]]:
+        """Return (options, records) committed by an interrupted run."""
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return {}, {}
+        records: dict[str, dict] = {}
+        try:
+            with open(self.journal_path, "rb") as f:
+                data = f.read(state.get("offset", 0))
+        except OSError:
+            data = b""
+        for line in data.splitlines():
+            try:
+                path, record = json.loads(line)
+            except ValueError:
+                continue
+            records[path] = record
+        return state.get("options", {}), records
+
+    def start(self, resume: bool) -> None:
+        """Open the journal — continuing after the last commit when resuming."""
+        offset = 0
+        if resume:
+            try:
+                with open(self.state_path, encoding="utf-8") as f:
+                    offset = json.load(f).get("offset", 0)
+            except (OSError, ValueError):
+                offset = 0
+        self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+        mode = "r+b" if offset and self.journal_path.exists() else "wb"
+        self._journal = open(self.journal_path, mode)
+        self._journal.seek(offset)
+        self._journal.truncate()
+        self.commit()
+
+    def record(self, path: str, record: dict) -> None:
+        line = json.dumps([path, record], ensure_ascii=False) + "\n"
+        self._journal.write(line.encode("utf-8"))
+        self._dirty += 1
+
+    def maybe_commit(self) -> None:
+        if self._dirty and time.monotonic() - self._last_commit >= self.interval:
+            self.commit()
+
+    def commit(self) -> None:
+        """Make every journaled record durable."""
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+        tmp = self.state_path.with_name(self.state_path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"offset": self._journal.tell(), "options": self.options}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.state_path)
+        self._last_commit = time.monotonic()
+        self._dirty = 0
+
+    def finish(self) -> None:
+        """The run completed and the manifest is saved — drop the checkpoint."""
+        if self._journal is not None:
+            self._journal.close()
+        for p in (self.state_path, self.journal_path):
+            try:
+                p.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def print_changes(label: str, paths: list[str], limit: int = 10) -> None:
+    print(f"  {label:<10} {len(paths):>6}")
+    for p in sorted(paths)[:limit]:
+        print(f"      {os.path.basename(p)}")
+    if len(paths) > limit:
+        print(f"      … and {len(paths) - limit:,} more")
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list (0.0 if empty)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+class ScanTelemetry:
+    """Per-book timings and failure buckets for one scan run.
+
+    Only books actually opened this run are recorded — unchanged books reused
+    from the manifest cost nothing and would drag every percentile down.
+    """
+
+    def __init__(self):
+        self.books: list[dict] = []
+        self.failures: dict[str, list[str]] = {}
+
+    def add(self, path: str, reason: str | None, telemetry: dict) -> None:
+        self.books.append({"path": path, "reason": reason, **telemetry})
+        if reason:
+            self.failures.setdefault(reason, []).append(path)
+
+    def fail(self, path: str, reason: str) -> None:
+        """Bucket a book rejected after a successful scan (e.g. a short title)."""
+        self.failures.setdefault(reason, []).append(path)
+
+    def phase_stats(self) -> dict[str, dict[str, float]]:
+        stats = {}
+        for phase in PHASES:
+            values = sorted(b["ms"][phase] for b in self.books if phase in b["ms"])
+            if not values:
+                continue
+            stats[phase] = {
+                "n": len(values),
+                "p50": percentile(values, 50),
+                "p95": percentile(values, 95),
+                "p99": percentile(values, 99),
+                "max": values[-1],
+                "sum": sum(values),
+            }
+        return stats
+
+    def slowest(self, n: int = 20) -> list[dict]:
+        return sorted(self.books, key=lambda b: -b["ms"].get("total", 0.0))[:n]
+
+    def print_report(self, slowest: int = 20, examples: int = 3) -> None:
+        if not self.books:
+            return
+        print(f"\n=== Scan timings ({len(self.books):,} books opened, ms) ===")
+        print(f"  {'phase':<11} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>9}")
+        for phase, st in self.phase_stats().items():
+            print(f"  {phase:<11} {st['p50']:>8.1f} {st['p95']:>8.1f} "
+                  f"{st['p99']:>8.1f} {st['max']:>9.1f}")
+        readers: dict[str, int] = {}
+        for b in self.books:
+            readers[b["reader"]] = readers.get(b["reader"], 0) + 1
+        print("  readers: " + ", ".join(f"{r} {n:,}" for r, n in sorted(readers.items())))
+
+        print(f"\n=== {min(slowest, len(self.books))} slowest books ===")
+        for b in self.slowest(slowest):
+            status = b["reason"] or "ok"
+            print(f"  {b['ms']['total']:>9.1f} ms  {b['reader']:<7} {status:<14} "
+                  f"{os.path.basename(b['path'])}")
+
+        if self.failures:
+            print("\n=== Failure buckets ===")
+            for reason, paths in sorted(self.failures.items(), key=lambda x: -len(x[1])):
+                print(f"  {reason:<24} {len(paths):>6}")
+                for path in paths[:examples]:
+                    print(f"      {path}")
+
+    def to_json(self, slowest: int = 20) -> dict:
+        return {
+            "books_opened": len(self.books),
+            "phases": self.phase_stats(),
+            "slowest": self.slowest(slowest),
+            "failures": {r: {"count": len(p), "paths": p} for r, p in self.failures.items()},
+            "books": self.books,
+        }
 
 
 def main() -> None:
@@ -189,8 +476,8 @@ def main() -> None:
     )
     parser.add_argument(
         "--output",
-        default=str(Path(__file__).parent / "epub-catalog.json"),
-        help="Output JSON catalog path.",
+        default=str(Path(__file__).parent / "epub-catalog.ndjson"),
+        help="Output NDJSON catalog path (summary goes to a .meta.json sidecar).",
     )
     parser.add_argument(
         "--workers",
@@ -198,12 +485,49 @@ def main() -> None:
         default=min(8, os.cpu_count() or 4),
         help="Number of parallel worker processes.",
     )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=64,
+        help="EPUBs handed to a worker per task (larger = less IPC overhead).",
+    )
     parser.add_argument(
         "--min-title-len",
         type=int,
         default=3,
         help="Minimum title length to include a book.",
     )
+    parser.add_argument(
+        "--manifest",
+        default=str(Path(__file__).parent / "epub-scan-manifest.json"),
+        help="Scan manifest used to skip unchanged books on rescans.",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Ignore the manifest and rescan every book.",
+    )
+    parser.add_argument(
+        "--hash",
+        action="store_true",
+        help="Also fingerprint books by SHA-1 so touched-but-identical files are reused.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted scan from its last checkpoint.",
+    )
+    parser.add_argument(
+        "--checkpoint-every",
+        type=float,
+        default=15.0,
+        help="Seconds between checkpoint commits (default: 15).",
+    )
+    parser.add_argument(
+        "--telemetry-out",
+        default=None,
+        help="Write per-book timings and failure buckets to this JSON file.",
+    )
     args = parser.parse_args()
 
     epub_dir = Path(args.epub_dir)
@@ -211,71 +535,171 @@ def main() -> None:
         print(f"[ERROR] EPUB directory not found: {epub_dir}", file=sys.stderr)
         sys.exit(1)
 
-    # Collect all epub paths
-    epub_paths = [str(p) for p in epub_dir.rglob("*.epub")]
-    total = len(epub_paths)
-    print(f"Found {total:,} EPUB files in {epub_dir}")
-
-    if total == 0:
-        print("Nothing to scan.", file=sys.stderr)
-        sys.exit(0)
-
-    # Parallel scan
-    results: list[dict] = []
-    errors = 0
-    processed = 0
-    report_every = max(1, total // 20)  # report at 5% intervals
-
-    print(f"Scanning with {args.workers} workers …\n")
-    with ProcessPoolExecutor(max_workers=args.workers) as executor:
-        futures = {executor.submit(scan_epub, p): p for p in epub_paths}
-        for future in as_completed(futures):
-            processed += 1
-            if processed % report_every == 0 or processed == total:
-                pct = processed / total * 100
-                print(f"  {processed:>6}/{total} ({pct:.0f}%)  — {len(results)} books extracted")
-            try:
-                result = future.result()
-                if result and len(result.get("title", "")) >= args.min_title_len:
-                    results.append(result)
-            except Exception:
-                errors += 1
-
-    print(f"\nExtracted metadata for {len(results):,} books ({errors} failures).\n")
-
-    # Build summary statistics
+    manifest_path = Path(args.manifest)
+    options = {"epub_dir": str(epub_dir), "full": args.full, "hash": args.hash}
+    checkpoint = ScanCheckpoint(manifest_path, options, args.checkpoint_every)
+    resumed: dict[str, dict] = {}
+    if args.resume:
+        saved_options, resumed = checkpoint.load()
+        if not resumed and not saved_options:
+            print("[WARN] No checkpoint to resume from — starting a fresh scan.")
+        elif saved_options.get("epub_dir") != str(epub_dir):
+            print(f"[ERROR] Checkpoint belongs to {saved_options.get('epub_dir')}, "
+                  f"not {epub_dir}.", file=sys.stderr)
+            sys.exit(1)
+        else:
+            # Keep the interrupted run's mode so --resume alone is enough
+            args.full = saved_options.get("full", args.full)
+            args.hash = saved_options.get("hash", args.hash)
+            options.update(saved_options)
+            print(f"Resuming: {len(resumed):,} books already scanned before the interruption.")
+    elif checkpoint.exists():
+        print("[WARN] Found a checkpoint from an interrupted scan; discarding it "
+              "(pass --resume to continue it instead).")
+    previous = {} if args.full else load_manifest(manifest_path)
+    previous.update(resumed)
+    checkpoint.start(resume=bool(resumed))
+    manifest: dict[str, dict] = {}
+    catalog = CatalogWriter(Path(args.output))
     category_counts: dict[str, int] = {}
     language_counts: dict[str, int] = {}
-    for book in results:
+    added: list[str] = []
+    changed: list[str] = []
+    seen: set[str] = set()
+    stats: dict[str, os.stat_result] = {}
+    errors = 0
+    scanned = 0
+    report_every = 500
+    telemetry = ScanTelemetry()
+    duplicates = DuplicateIndex()
+
+    def emit(book: dict | None) -> None:
+        """Append a book to the catalog and fold it into the summary counts."""
+        if not book or len(book.get("title", "")) < args.min_title_len:
+            return
+        catalog.write(book)
+        duplicates.add(book)
         for cat in book.get("categories", ["Uncategorized"]):
             category_counts[cat] = category_counts.get(cat, 0) + 1
         lang = book.get("language", "unknown") or "unknown"
         language_counts[lang] = language_counts.get(lang, 0) + 1
 
+    def collect(future: Future) -> None:
+        nonlocal errors, scanned
+        for p, result, sha1, reason, book_telemetry in future.result():
+            scanned += 1
+            telemetry.add(p, reason, book_telemetry)
+            if reason and reason not in EXPECTED_FAILURES:
+                errors += 1
+                continue
+            if result and len(result.get("title", "")) < args.min_title_len:
+                telemetry.fail(p, "short_title")
+            st = stats.pop(p)
+            record = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "entry": result}
+            if sha1:
+                record["sha1"] = sha1
+            manifest[p] = record
+            checkpoint.record(p, record)
+            emit(result)
+            if scanned % report_every == 0:
+                print(f"  {scanned:>6} scanned, {len(seen):,} found so far  — {catalog.count} books extracted")
+        catalog.flush()
+        checkpoint.maybe_commit()
+
+    # Walk the library and stream added/changed books to the pool in chunks;
+    # unchanged books reuse their manifest entry without being reopened.
+    chunk_size = max(1, args.chunk_size)
+    max_in_flight = args.workers * 4
+    in_flight: set[Future] = set()
+    chunk: list[str] = []
+    print(f"Scanning {epub_dir} with {args.workers} workers (chunks of {chunk_size}) …\n")
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            def submit(paths: list[str]) -> None:
+                while len(in_flight) >= max_in_flight:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        in_flight.discard(fut)
+                        collect(fut)
+                in_flight.add(executor.submit(scan_batch, paths, args.hash))
+
+            for p in iter_epub_paths(epub_dir):
+                seen.add(p)
+                try:
+                    st = os.stat(p)
+                except OSError:
+                    continue
+                record = previous.get(p)
+                if is_unchanged(record, st, p, args.hash):
+                    manifest[p] = record
+                    emit(record.get("entry"))
+                    continue
+                (changed if record is not None else added).append(p)
+                stats[p] = st
+                chunk.append(p)
+                if len(chunk) >= chunk_size:
+                    submit(chunk)
+                    chunk = []
+            if chunk:
+                submit(chunk)
+            for fut in in_flight:
+                collect(fut)
+    except KeyboardInterrupt:
+        checkpoint.commit()
+        print(f"\n[interrupted] {scanned:,} scanned books checkpointed — "
+              "rerun with --resume to continue.", file=sys.stderr)
+        sys.exit(130)
+
+    total = len(seen)
+    print(f"Found {total:,} EPUB files in {epub_dir} ({scanned:,} scanned, "
+          f"{total - scanned:,} unchanged)")
+    if total == 0:
+        print("Nothing to scan.", file=sys.stderr)
+
+    if previous:
+        removed = [p for p in previous if p not in seen]
+        print("\n=== Changes since last scan ===")
+        n_resumed = sum(1 for p in resumed if p in seen)
+        print(f"  {'unchanged':<10} {total - len(added) - len(changed) - n_resumed:>6}")
+        if resumed:
+            print(f"  {'resumed':<10} {n_resumed:>6}  (scanned before the interruption)")
+        print_changes("added", added)
+        print_changes("changed", changed)
+        print_changes("removed", removed)
+
+    telemetry.print_report()
+    if args.telemetry_out:
+        with open(args.telemetry_out, "w", encoding="utf-8") as f:
+            json.dump(telemetry.to_json(), f, ensure_ascii=False, indent=2)
+        print(f"\nTelemetry saved → {args.telemetry_out}")
+
+    save_manifest(manifest_path, manifest)
+    checkpoint.finish()
+
+    extracted = catalog.count
+    print(f"\nExtracted metadata for {extracted:,} books ({errors} failures).")
+    duplicate_groups = duplicates.groups()
+    n_duplicates = sum(len(g["duplicates"]) for g in duplicate_groups)
+    print(f"Duplicate groups: {len(duplicate_groups):,} "
+          f"({n_duplicates:,} extra copies/editions, {extracted - n_duplicates:,} distinct works).\n")
+
     summary = {
         "total_scanned": total,
-        "total_extracted": len(results),
+        "total_extracted": extracted,
         "total_errors": errors,
+        "total_duplicates": n_duplicates,
         "category_distribution": dict(sorted(category_counts.items(), key=lambda x: -x[1])),
         "language_distribution": dict(sorted(language_counts.items(), key=lambda x: -x[1])[:30]),
+        "duplicate_groups": duplicate_groups,
     }
+    catalog.close(summary)
 
-    catalog = {
-        "meta": summary,
-        "books": sorted(results, key=lambda b: b.get("title", "").lower()),
-    }
-
-    output_path = Path(args.output)
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(catalog, f, ensure_ascii=False, indent=2)
-
-    print(f"Catalog saved → {output_path}\n")
+    print(f"Catalog saved → {catalog.path}  (summary → {catalog.meta_path.name})\n")
 
     # Print category summary
     print("=== Category Distribution ===")
     for cat, count in sorted(category_counts.items(), key=lambda x: -x[1]):
-        bar = "█" * min(40, count // max(1, len(results) // 40))
+        bar = "█" * min(40, count // max(1, extracted // 40))
         print(f"  {cat:<30} {count:>5}  {bar}")
 
     print("\n=== Top Languages ===")